@@ -1,11 +1,14 @@
 """
-Get Market Depth (Market Book) from MetaTrader 5 (MT5) in Python.
+Record the Market Depth (Market Book) from MetaTrader 5 (MT5) in Python.
 
-This script connects to a MetaTrader 5 account and retrieves the live market depth (order book)
-for a specified symbol (default: "EURUSD"). The output includes bid and ask levels with associated volumes.
+This script connects to a MetaTrader 5 account, subscribes to the market depth (order book) of several symbols
+and records it continuously: every INTERVAL seconds a snapshot of each book is stored in a preallocated buffer,
+which is flushed in bulk to OUTPUT/book/<symbol>/ (optionally delta encoded, only the levels that changed).
+At the end the last recorded book of the first symbol is printed with its bid and ask levels and volumes.
+A recording can be read back with mt5_algo_hub.depth.read_book or replayed with MT5_SOURCE=replay:<OUTPUT>.
 
 Setup Instructions:
-- You must manually open the Market Depth (order book) window on the MT5 terminal for the symbol you're targeting (e.g., EURUSD).
+- You must manually open the Market Depth (order book) window on the MT5 terminal for the symbols you're targeting (e.g., EURUSD).
 - Replace the blank login credentials below with your own demo or live MT5 account details.
 - Make sure MetaTrader 5 is installed and that the Python-MT5 API is working properly.
 
@@ -17,35 +20,51 @@ before making investment decisions.
 Author: Anthony Gocmen
 """
 
-import MetaTrader5 as mt5
 import pandas as pd
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.depth import DepthRecorder, read_book
+from mt5_algo_hub.sources import get_source
 
-# Initialize MetaTrader5
-if not mt5.initialize(login=, server="", password=""):
-    print("Initialization failed. Error code:", mt5.last_error())
-    mt5.shutdown()
-    quit()
-
-# Try to subscribe to the Market Book
-if mt5.market_book_add("EURUSD"):
-    book = mt5.market_book_get("EURUSD")
-    if book is not None:
-        # Parse book data into a DataFrame
-        book_list = [{
-            "type": 'bid' if item.type == mt5.BOOK_TYPE_BUY else 'ask',
-            "price": item.price,
-            "volume": item.volume
-        } for item in book]
-
-        df = pd.DataFrame(book_list)
+mt5 = get_source()
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY"]
+INTERVAL = 0.1          # seconds between two snapshots of every book
+DURATION = 60           # seconds of recording, None to record until Ctrl+C
+OUTPUT = Path("depth")  # recordings go to OUTPUT/book/<symbol>/
+DELTA = True            # store only the levels that changed between snapshots
+
+if __name__ == "__main__":
+    # Initialize MetaTrader5
+    if not mt5.initialize(login=, server="", password=""):
+        print("Initialization failed. Error code:", mt5.last_error())
+        mt5.shutdown()
+        sys.exit()
+
+    # Subscribe to the Market Books and record them, the books are released at the end
+    recorder = DepthRecorder(SYMBOLS, OUTPUT, terminal=mt5, delta=DELTA)
+    with recorder:
+        if not recorder.subscribed:
+            print("Failed to activate Market Book.")
+        else:
+            recorder.run(INTERVAL, DURATION)
+
+    for symbol in SYMBOLS:
+        print(f"{symbol}: {recorder.snapshots[symbol]} snapshots, {recorder.rows_written[symbol]} rows written")
+
+    book = read_book(OUTPUT / "book" / SYMBOLS[0]) if recorder.rows_written[SYMBOLS[0]] else None
+    if book is not None and len(book):
+        # Parse the last recorded snapshot into a DataFrame
+        last = book[book['time_msc'] == book['time_msc'][-1]]
+        df = pd.DataFrame({
+            "type": ['bid' if t == mt5.BOOK_TYPE_BUY else 'ask' for t in last['type']],
+            "price": last['price'],
+            "volume": last['volume']
+        })
         print(df.to_string(index=False))
     else:
         print("Failed to retrieve Market Book data.")
 
-    # Release the Market Book
-    mt5.market_book_release("EURUSD")
-else:
-    print("Failed to activate Market Book.")
-
-# Shutdown MetaTrader5
-mt5.shutdown()
+    # Shutdown MetaTrader5
+    mt5.shutdown()
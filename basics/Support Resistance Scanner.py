@@ -7,14 +7,14 @@ before making investment decisions.
 Author: Anthony Gocmen
 """
 
-import MetaTrader5 as mt5
-from datetime import datetime, timedelta
-import pandas as pd
-import numpy as np
-from collections import Counter
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.data import fetch_rates
+from mt5_algo_hub.levels import LevelHistogram, scan_levels
+from mt5_algo_hub.sources import get_source
 
-# Fill the following line with ur infos
-mt5.initialize(login=, server="", password="")
+mt5 = get_source()
 
 
 def analyze_highs_lows():
@@ -24,25 +24,16 @@ def analyze_highs_lows():
     rounding_digits = 2             # Better to keep 2 digits but U can change
 
     # Fetch data
-    rates = mt5.copy_rates_from(SYMBOL, timeframe, datetime.now(), 10000)
-    df = pd.DataFrame(rates, columns=['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume'])
-    df['time'] = pd.to_datetime(df['time'], unit='s')
-
-    # Round prices
-    df['rounded_high'] = df['high'].round(rounding_digits)
-    df['rounded_low'] = df['low'].round(rounding_digits)
-    df['rounded_close'] = df['close'].round(rounding_digits)
-
-    # Count price level occurrences
-    all_counter = Counter(df['rounded_high']) + Counter(df['rounded_low']) + Counter(df['rounded_close'])
-    high_counter = Counter(df['rounded_high'])
-    low_counter = Counter(df['rounded_low'])
-    close_counter = Counter(df['rounded_close'])
-
-    top_5_highs = high_counter.most_common(5)
-    top_5_lows = low_counter.most_common(5)
-    top_5_close = close_counter.most_common(5)
-    top_10 =  all_counter.most_common(10)
+    rates = fetch_rates(SYMBOL, timeframe, 10000, terminal=mt5)
+
+    # Round prices to integer ticks and count every price level occurrence in one pass
+    levels = LevelHistogram(rounding_digits)
+    levels.add_rates(rates)
+
+    top_5_highs = levels.most_common(5, 'high')
+    top_5_lows = levels.most_common(5, 'low')
+    top_5_close = levels.most_common(5, 'close')
+    top_10 = levels.most_common(10, 'all')
 
     print("\nTop 5 frequent highs:")
     for level, count in top_5_highs:
@@ -61,6 +52,21 @@ def analyze_highs_lows():
         print(f"Price: {level}, Occurrence: {count}")
 
 
-analyze_highs_lows()
-mt5.shutdown()
+def scan_watchlist():
+    # Top 5 cumulated levels of every symbol on M5, M15 and H1, at 1 and 10 ticks of resolution
+    WATCHLIST = ["The", "Tickers", "U Want"]
+    DIGITS = 2                      # an int or a dict {symbol: digits}
+    RESOLUTIONS = (1, 10)           # in ticks of 10^-DIGITS
+
+    table = scan_levels(WATCHLIST, (mt5.TIMEFRAME_M5, mt5.TIMEFRAME_M15, mt5.TIMEFRAME_H1), 10000, DIGITS, RESOLUTIONS, top=5, terminal=mt5)
+    table = table[table['Kind'] == 'all'].drop(columns='Kind')
+    print("\nTop 5 - cumulated, per symbol and timeframe:")
+    print(table.to_string(index=False))
+
 
+if __name__ == "__main__":
+    # Fill the following line with ur infos
+    mt5.initialize(login=, server="", password="")
+    analyze_highs_lows()
+    scan_watchlist()
+    mt5.shutdown()
@@ -0,0 +1,8 @@
+"""
+Shared building blocks for the MT5 Algo Hub scripts.
+
+The scripts in 'basics', 'pair trading' and 'stationarity' stay runnable on their own,
+the heavy lifting (backtest kernels, indicators, sweeps, data access) lives here so it can be reused.
+
+Author: Anthony Gocmen
+"""
@@ -0,0 +1,7 @@
+import sys
+
+from mt5_algo_hub.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
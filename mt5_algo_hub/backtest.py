@@ -0,0 +1,137 @@
+"""
+Array-based backtest kernels for the pair trading scripts.
+
+The kernels run on plain NumPy arrays instead of stepping through pandas Series with .iloc,
+but keep the exact logic of the original pairs_trading_algo loops:
+- enter short when the short signal fires, long when the long signal fires (short is checked first)
+- compound the spread into pnl on every following bar
+- close when pnl - 1 reaches the exit threshold or the stop loss, and compound pnl into final_return
+
+backtest_kernel runs one parameter set, batch_backtest runs a whole threshold grid in a single pass over the bars.
+"""
+
+import numpy as np
+
+from mt5_algo_hub.profiling import count, timed
+
+
+def entry_signals(z_score, z_entry):
+    z_score = np.asarray(z_score, dtype=float)
+    return z_score < -z_entry, z_score > z_entry
+
+
+def summarize(final_return, winning_trades, nb_trades):
+    win_rate = (winning_trades / nb_trades) * 100 if nb_trades > 0 else 0
+    return_per_trade = ((final_return - 1) / nb_trades) * 100 if nb_trades > 0 else 0
+    final_return = (final_return - 1) * 100
+    return final_return, win_rate, return_per_trade, nb_trades
+
+
+@timed('kernel')
+def backtest_kernel(spread, long_entry, short_entry, threshold_exit, stop_loss, start=0):
+    """Run the position state machine over the bars [start:], returns (final_return, win_rate, return_per_trade, nb_trades)."""
+    side = np.zeros(len(spread), dtype=np.int8)
+    side[np.asarray(long_entry, dtype=bool)] = 1
+    side[np.asarray(short_entry, dtype=bool)] = -1
+    count('backtested combinations')
+    entries = (np.flatnonzero(side[start:]) + start).tolist()
+    side = side.tolist()
+    spread = np.asarray(spread, dtype=float).tolist()
+    n = len(spread)
+
+    final_return = 1
+    nb_trades = 0
+    winning_trades = 0
+
+    # While flat, jump straight to the next bar with a signal instead of visiting every bar
+    i = start
+    k = 0
+    while True:
+        while k < len(entries) and entries[k] < i:
+            k += 1
+        if k == len(entries):
+            break
+        i = entries[k]
+        direction = side[i]
+        nb_trades += 1
+
+        pnl = 1
+        i += 1
+        while i < n:
+            pnl *= 1 + direction * spread[i]
+            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
+                final_return *= pnl
+                if pnl - 1 > 0: winning_trades += 1
+                break
+            i += 1
+        else:
+            break
+        i += 1
+
+    return summarize(final_return, winning_trades, nb_trades)
+
+
+def parameter_grid(*axes):
+    """Flatten the cartesian product of the axes in the same order as the nested for loops of optimization()."""
+    return [grid.ravel() for grid in np.meshgrid(*axes, indexing='ij')]
+
+
+@timed('batch kernel')
+def batch_backtest(spread, long_entry, short_entry, threshold_exit, stop_loss, start=0, signal_index=None):
+    """
+    Same state machine as backtest_kernel, with one position/pnl state per parameter combination.
+
+    long_entry/short_entry are (n_signals, n_bars) masks, signal_index maps each combination to its row
+    (combinations with the same entry thresholds share a row). threshold_exit/stop_loss hold one value per combination.
+    Returns the (final_return, win_rate, return_per_trade, nb_trades) columns as arrays.
+    """
+    spread = np.asarray(spread, dtype=float)
+    threshold_exit, stop_loss = np.broadcast_arrays(np.asarray(threshold_exit, dtype=float), np.asarray(stop_loss, dtype=float))
+    long_entry = np.atleast_2d(np.asarray(long_entry, dtype=bool))
+    short_entry = np.atleast_2d(np.asarray(short_entry, dtype=bool))
+    n_combos = len(threshold_exit)
+    if signal_index is None:
+        signal_index = np.zeros(n_combos, dtype=np.intp) if len(long_entry) == 1 else np.arange(n_combos)
+    count('backtested combinations', n_combos)
+
+    side = np.zeros(long_entry.shape, dtype=np.int8)
+    side[long_entry] = 1
+    side[short_entry] = -1
+    any_signal = side.any(axis=0).tolist()
+    side = np.ascontiguousarray(side.T)
+
+    position = np.zeros(n_combos, dtype=np.int8)
+    pnl = np.ones(n_combos)
+    final_return = np.ones(n_combos)
+    nb_trades = np.zeros(n_combos, dtype=np.int64)
+    winning_trades = np.zeros(n_combos, dtype=np.int64)
+    n_open = 0
+
+    for i in range(start, len(spread)):
+        is_open = None
+        if n_open:
+            is_open = position != 0
+            pnl[is_open] *= 1 + position[is_open] * spread[i]
+            ret = pnl - 1
+            closed = is_open & ((ret >= threshold_exit) | (ret <= -stop_loss))
+            if closed.any():
+                final_return[closed] *= pnl[closed]
+                winning_trades += closed & (ret > 0)
+                position[closed] = 0
+                pnl[closed] = 1
+
+        # Only combinations that were flat at the start of the bar can enter
+        if any_signal[i]:
+            opened = side[i, signal_index]
+            if is_open is not None:
+                opened[is_open] = 0
+            entered = opened != 0
+            position[entered] = opened[entered]
+            nb_trades += entered
+        n_open = np.count_nonzero(position)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(nb_trades > 0, (winning_trades / nb_trades) * 100, 0)
+        return_per_trade = np.where(nb_trades > 0, ((final_return - 1) / nb_trades) * 100, 0)
+    final_return = (final_return - 1) * 100
+    return final_return, win_rate, return_per_trade, nb_trades
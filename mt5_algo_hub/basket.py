@@ -0,0 +1,106 @@
+"""
+Basket divergence engine, the N-asset generalization of the Triangular Divergence Approach.
+
+On every bar the assets are ranked by return. When the median asset sits far enough from both the strongest and
+the weakest one (both gaps >= high-low range / ratio), the weakest asset is bought and the strongest one sold,
+and the position is held until its compounded pnl reaches the exit threshold or the stop loss.
+With three assets the median is the 'neutral' asset of the original script and the results are identical.
+
+The ranking of all bars is computed at once with array partitions, only the position loop walks the bars,
+and its per-bar cost does not depend on the number of assets.
+"""
+
+import numpy as np
+
+from mt5_algo_hub.backtest import summarize
+from mt5_algo_hub.profiling import count, section, timed
+
+
+class BasketRanking:
+    """Strongest/weakest asset of every bar and the high/neutral/low ranges, for a (bars x assets) returns array."""
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        n_assets = values.shape[1]
+        middle = (n_assets - 1) // 2
+
+        with section('basket ranking', assets=n_assets):
+            self.values = values
+            self.highest = values.argmax(axis=1)
+            self.lowest = values.argmin(axis=1)
+            ordered = np.partition(values, sorted({0, middle, n_assets - 1}), axis=1)
+            high, neutral, low = ordered[:, -1], ordered[:, middle], ordered[:, 0]
+            self.range_high_low = np.abs(high - low)
+            self.range_high_neutral = np.abs(high - neutral)
+            self.range_neutral_low = np.abs(neutral - low)
+
+    @classmethod
+    def from_arrays(cls, values, highest, lowest, range_high_low, range_high_neutral, range_neutral_low):
+        """A ranking from arrays computed earlier (e.g. published to worker processes), nothing is recomputed."""
+        ranking = cls.__new__(cls)
+        ranking.values = np.asarray(values, dtype=float)
+        ranking.highest = np.asarray(highest, dtype=np.intp)
+        ranking.lowest = np.asarray(lowest, dtype=np.intp)
+        ranking.range_high_low = np.asarray(range_high_low, dtype=float)
+        ranking.range_high_neutral = np.asarray(range_high_neutral, dtype=float)
+        ranking.range_neutral_low = np.asarray(range_neutral_low, dtype=float)
+        return ranking
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ('values', 'highest', 'lowest', 'range_high_low', 'range_high_neutral', 'range_neutral_low')}
+
+    def slice(self, start, stop):
+        """The ranking of the bars [start:stop], every bar is ranked on its own so nothing changes."""
+        return BasketRanking.from_arrays(**{name: array[start:stop] for name, array in self.arrays().items()})
+
+    def entries(self, ratio):
+        return (self.range_high_neutral >= self.range_high_low / ratio) & (self.range_neutral_low >= self.range_high_low / ratio)
+
+
+@timed('basket kernel')
+def basket_kernel(ranking, entry, threshold_exit, stop_loss):
+    count('backtested combinations')
+    values = ranking.values.tolist()
+    highest = ranking.highest.tolist()
+    lowest = ranking.lowest.tolist()
+    entries = np.flatnonzero(entry).tolist()
+    n = len(values)
+
+    final_return = 1
+    nb_trades = 0
+    winning_trades = 0
+
+    # While flat, jump straight to the next bar with a signal
+    i = 0
+    k = 0
+    while True:
+        while k < len(entries) and entries[k] < i:
+            k += 1
+        if k == len(entries):
+            break
+        i = entries[k]
+        bought, sold = lowest[i], highest[i]
+        nb_trades += 1
+
+        pnl = 1
+        i += 1
+        while i < n:
+            row = values[i]
+            pnl *= 1 + (row[bought] - row[sold])
+            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
+                final_return *= pnl
+                if pnl - 1 > 0: winning_trades += 1
+                break
+            i += 1
+        else:
+            break
+        i += 1
+
+    return summarize(final_return, winning_trades, nb_trades)
+
+
+def basket_divergence_algo(df, threshold_exit, stop_loss, ratio=3, ranking=None):
+    """Same inputs and (final_return, win_rate, return_per_trade, nb_trades) output as the Triangular pairs_trading_algo, for any number of columns."""
+    if ranking is None:
+        ranking = BasketRanking(df.to_numpy(dtype=float))
+    return basket_kernel(ranking, ranking.entries(ratio), threshold_exit / 100, stop_loss / 100)
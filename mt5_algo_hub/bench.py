@@ -0,0 +1,140 @@
+"""
+Benchmarks for the backtest kernels, the rolling indicators and the optimization sweeps, on synthetic data.
+
+    python -m mt5_algo_hub.bench                                   # every case on the small grids
+    python -m mt5_algo_hub.bench --bars 1000 10000 --only kernel   # a subset
+    python -m mt5_algo_hub.bench --output new.json --baseline old.json
+
+Each case reports its best wall time over --repeat runs and the peak memory traced during one extra run
+(tracemalloc, which also sees the NumPy buffers). --output writes the results as JSON, --baseline compares
+them with a previous JSON file and prints the speedup of every case found in both.
+"""
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.basket import basket_divergence_algo
+from mt5_algo_hub.indicators import RollingStats
+from mt5_algo_hub.sources import cointegrated_rates
+from mt5_algo_hub import strategies
+
+
+# Grids per size: 'small' for quick checks, 'full' is the grid of the scripts' optimization()
+GRIDS = {
+    'zscore': {
+        'small': (np.arange(0.5, 2, 0.5), np.arange(0.001, 0.008, 0.003), np.arange(0.001, 0.008, 0.003)),
+        'full': (np.arange(0.25, 2, 0.25), np.arange(0.001, 0.008, 0.001), np.arange(0.001, 0.008, 0.001)),
+    },
+    'dual_zscore': {
+        'small': (np.arange(0.2, 1.3, 0.5), np.arange(0.2, 1.3, 0.5), np.arange(0.001, 0.008, 0.004), np.arange(0.001, 0.008, 0.004), range(10, 50, 20), range(150, 400, 100)),
+        'full': (np.arange(0.2, 1.3, 0.2), np.arange(0.2, 1.3, 0.2), np.arange(0.001, 0.008, 0.002), np.arange(0.001, 0.008, 0.002), range(10, 50, 5), range(150, 400, 50)),
+    },
+    'triangular': {
+        'small': (np.arange(0.08, 0.25, 0.09), np.arange(0.05, 0.8, 0.35), np.arange(2.8, 3.1, 0.2)),
+        'full': (np.arange(0.08, 0.25, 0.03), np.arange(0.05, 0.8, 0.05), np.arange(2.8, 3.1, 0.2)),
+    },
+}
+
+
+def synthetic_returns(n_bars, n_assets=2, seed=0):
+    symbols = ['US30', 'US500', 'USTEC', 'GER40', 'UK100', 'JP225'][:n_assets]
+    rates = cointegrated_rates(symbols, 15, n_bars + 1, seed=seed)
+    index = pd.to_datetime(rates[symbols[0]]['time'], unit='s')
+    closes = pd.DataFrame({sym: rates[sym]['close'] for sym in symbols}, index=index)
+    return closes.pct_change().dropna()
+
+
+def cases(bars, grids, workers):
+    """Yield (case, bars, grid, callable) for every benchmark."""
+    for n in bars:
+        pair = synthetic_returns(n)
+        triple = synthetic_returns(n, n_assets=3)
+        basket = synthetic_returns(n, n_assets=6)
+        yield 'kernel/zscore', n, '-', lambda: strategies.zscore_algo(pair, 1.0, 0.003, 0.003, 50)
+        yield 'kernel/dual_zscore', n, '-', lambda: strategies.dual_zscore_algo(pair, 0.6, 0.8, 0.003, 0.005, 20, 200)
+        yield 'kernel/triangular', n, '-', lambda: strategies.triangular_algo(triple, 0.14, 0.4, 2.8)
+        yield 'kernel/basket', n, '-', lambda: basket_divergence_algo(basket, 0.14, 0.4, 2.8)
+        yield 'indicator/rolling_zscore', n, '-', lambda: RollingStats(strategies.pair_spread(pair)).zscore(50)
+        for grid in grids:
+            yield 'sweep/zscore', n, grid, lambda grid=grid: strategies.zscore_sweep(pair, *GRIDS['zscore'][grid], workers=workers)
+            yield 'sweep/dual_zscore', n, grid, lambda grid=grid: strategies.dual_zscore_sweep(pair, *GRIDS['dual_zscore'][grid], workers=workers)
+            yield 'sweep/triangular', n, grid, lambda grid=grid: strategies.triangular_sweep(triple, *GRIDS['triangular'][grid], workers=workers)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak / 1024 ** 2
+
+
+def run(bars, grids, only=None, repeat=3, workers=1):
+    results = []
+    for case, n, grid, func in cases(bars, grids, workers):
+        if only and not any(case.startswith(prefix) or case.split('/')[1] == prefix for prefix in only):
+            continue
+        seconds, peak_mb = measure(func, repeat)
+        results.append({'case': case, 'bars': n, 'grid': grid, 'seconds': seconds, 'peak_mb': peak_mb})
+        print(f"{case:<26} bars={n:<7} grid={grid:<6} {seconds:9.4f}s {peak_mb:9.2f} MB", flush=True)
+    return results
+
+
+def machine():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(results, baseline):
+    key = lambda row: (row['case'], row['bars'], row['grid'])
+    previous = {key(row): row for row in baseline['results']}
+    rows = [{**row, 'baseline_seconds': previous[key(row)]['seconds'], 'speedup': previous[key(row)]['seconds'] / row['seconds']}
+            for row in results if key(row) in previous]
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the backtest kernels, indicators and sweeps on synthetic data")
+    parser.add_argument('--bars', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--grid', nargs='+', choices=['small', 'full'], default=['small'])
+    parser.add_argument('--only', nargs='+', help="case prefixes or names to run (kernel, sweep/dual_zscore, triangular...)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1, help="processes used by the sweeps")
+    parser.add_argument('--output', help="write the results as JSON")
+    parser.add_argument('--baseline', help="JSON file of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    results = run(args.bars, args.grid, args.only, args.repeat, args.workers)
+    report = {'machine': machine(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    print("\nResults:")
+    print(pd.DataFrame(results).to_string(index=False, float_format="%.4f"))
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f))
+        print("\nCompared with baseline:")
+        print(comparison.to_string(index=False, float_format="%.3f"))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Command line interface of the package, one subcommand per tool.
+
+    mt5-algo-hub optimize dual_zscore --symbols US30 US500
+    mt5-algo-hub optimize zscore --symbols USTEC US500 --folds 3000 1000 --source synthetic
+    mt5-algo-hub adf --symbols US500 --timeframe H1 --bars 1000
+    mt5-algo-hub screen --symbols US30 US500 USTEC GER40 --bars 20000
+    python -m mt5_algo_hub work --db results.sqlite --wait
+    mt5-algo-hub live --pairs pairs.json --timeframe M15
+
+Parsing the command line only imports argparse. numpy, pandas, statsmodels and the MetaTrader5 module are imported by
+the command that runs, and the terminal is only initialized by the commands that need data from it. The credentials
+come from --login/--password/--server or the MT5_LOGIN/MT5_PASSWORD/MT5_SERVER environment variables, --source
+(or MT5_SOURCE) picks a replay or synthetic source instead of the terminal (see sources.get_source).
+"""
+
+import argparse
+import os
+import sys
+
+
+PAIR_STRATEGIES = ('zscore', 'dual_zscore')
+# Columns of the scripts' optimization() grids (values: bench.GRIDS[strategy]['full'])
+SPACE_COLUMNS = {
+    'zscore': ['Entry - z', 'Exit Threshold', 'Stop Loss'],
+    'dual_zscore': ['Entry - z Near', 'Entry - z Far', 'Exit Threshold', 'Stop Loss', 'Window - Near', 'Window - Far'],
+    'triangular': ['Exit Threshold', 'Stop Loss', 'Ratio'],
+}
+
+
+# ----- Shared helpers -----
+
+def _connect(args):
+    """The data source of --source, initialized with the credentials of the arguments or the environment."""
+    from mt5_algo_hub.sources import get_source
+    terminal = get_source(args.source)
+    credentials = {
+        'login': args.login or os.environ.get('MT5_LOGIN'),
+        'password': args.password or os.environ.get('MT5_PASSWORD'),
+        'server': args.server or os.environ.get('MT5_SERVER'),
+    }
+    credentials = {name: value for name, value in credentials.items() if value}
+    if 'login' in credentials:
+        credentials['login'] = int(credentials['login'])
+    if not terminal.initialize(**credentials):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {terminal.last_error()}")
+    return terminal
+
+
+def _timeframe(name):
+    from mt5_algo_hub.sources import Constants
+    value = getattr(Constants, f"TIMEFRAME_{name.upper()}", None)
+    if value is None:
+        raise ValueError(f"[ERROR] Unknown timeframe '{name}', expected M1, M5, M15, H1, D1...")
+    return value
+
+
+def _closes(args, join='inner', on_error='raise'):
+    from mt5_algo_hub.loader import load_bars
+    terminal = _connect(args)
+    try:
+        return load_bars(args.symbols, _timeframe(args.timeframe), args.bars, join=join, on_error=on_error, terminal=terminal)
+    finally:
+        terminal.shutdown()
+
+
+def _print(table, digits=3):
+    print(table.to_string(index=False, float_format=f"%.{digits}f"))
+
+
+# ----- Commands -----
+
+def _optimize(args):
+    from mt5_algo_hub.bench import GRIDS
+    from mt5_algo_hub.optimization import optimize
+
+    strategy = args.strategy
+    if strategy in PAIR_STRATEGIES and len(args.symbols) != 2:
+        raise ValueError(f"[ERROR] {strategy} trades a pair, got {len(args.symbols)} symbols")
+    data = _closes(args).pct_change().dropna()
+    space = dict(zip(SPACE_COLUMNS[strategy], GRIDS[strategy]['full']))
+    fixed = {'window': args.window} if strategy == 'zscore' else None
+    options = dict(fixed=fixed, k=args.top, sort_by=args.sort_by, where=[f"Nb Trades > {args.min_trades}", *args.where],
+                   min_trades=args.min_trades, workers=args.workers, search=args.search, budget=args.budget, folds=args.folds,
+                   spill=args.spill)
+
+    if args.folds or args.search or args.no_store:
+        best = optimize(strategy, data, space, **options)
+    else:
+        from mt5_algo_hub.results import ResultStore
+        from mt5_algo_hub.workqueue import WorkQueue
+        with ResultStore(args.db) as store:
+            if args.queue:
+                with WorkQueue(store) as queue:
+                    best = optimize(strategy, data, space, queue=queue, **options)
+            else:
+                best = optimize(strategy, data, space, store=store, **options)
+    if args.save_pairs and not args.folds:
+        from mt5_algo_hub.live import pairs_from_table, save_pairs
+        save_pairs(args.save_pairs, pairs_from_table(args.symbols, best, strategy, args.window, args.top))
+        print(f"Parameter sets saved to {args.save_pairs}")
+
+
+def _adf(args):
+    from mt5_algo_hub.unitroot import adf_batch
+    data = _closes(args, join='outer')
+    statistics, p_values, lags, _ = adf_batch(data.dropna())
+    for symbol, statistic, p_value, lag in zip(data.columns, statistics, p_values, lags):
+        print(f"{symbol}: statistic {statistic:.3f}, p-value {p_value:.3f}, lags {lag}")
+
+
+def _coint(args):
+    import numpy as np
+    from mt5_algo_hub.cointegration import rolling_cointegration
+    from mt5_algo_hub.unitroot import adf_batch, engle_granger
+
+    if len(args.symbols) != 2:
+        raise ValueError(f"[ERROR] The cointegration tests take a pair, got {len(args.symbols)} symbols")
+    data = _closes(args)
+    asset1, asset2 = data.iloc[:, 0], data.iloc[:, 1]
+    p_values = adf_batch(np.vstack([asset1 - asset2, asset1 / asset2]))[1]
+    print(f"ADF p-value of the spread difference: {p_values[0]:.4f}")
+    print(f"ADF p-value of the spread ratio: {p_values[1]:.4f}")
+    print(f"Engle-Granger p-value: {engle_granger(asset1, asset2)[1]:.4f}")
+
+    if args.window:
+        rolling = rolling_cointegration(asset1, asset2, window=args.window).iloc[args.window - 1:]
+        print(f"\nRolling Engle-Granger ({args.window} bars): cointegrated on {rolling['cointegrated'].mean():.1%} of the windows")
+        print(f"Hedge ratio: min {rolling['beta'].min():.4f} / max {rolling['beta'].max():.4f} / last {rolling['beta'].iloc[-1]:.4f}")
+
+
+def _screen(args):
+    from mt5_algo_hub.screener import screen_pairs
+    data = _closes(args, on_error='skip')
+    print(f"{len(data.columns)} symbols, {len(data)} common bars")
+    results = screen_pairs(data, min_correlation=args.min_correlation, workers=args.workers)
+    cointegrated = results[results['EG p-value'] < args.max_p_value]
+    print(f"\n{len(results)} pairs tested, {len(cointegrated)} cointegrated at {args.max_p_value:.0%}:")
+    _print(cointegrated, 4)
+
+
+def _levels(args):
+    from mt5_algo_hub.levels import scan_levels
+    terminal = _connect(args)
+    try:
+        table = scan_levels(args.symbols, [_timeframe(name) for name in args.timeframes], args.bars, args.digits,
+                            tuple(args.resolutions), top=args.top, terminal=terminal)
+    finally:
+        terminal.shutdown()
+    print(table[table['Kind'] == args.kind].drop(columns='Kind').to_string(index=False))
+
+
+def _depth(args):
+    from pathlib import Path
+    from mt5_algo_hub.depth import DepthRecorder
+    terminal = _connect(args)
+    try:
+        recorder = DepthRecorder(args.symbols, Path(args.output), terminal=terminal, delta=not args.full)
+        with recorder:
+            if not recorder.subscribed:
+                raise ConnectionError(f"[ERROR] Cannot subscribe to the Market Books - {terminal.last_error()}")
+            recorder.run(args.interval, args.duration)
+    finally:
+        terminal.shutdown()
+    for symbol in args.symbols:
+        print(f"{symbol}: {recorder.snapshots[symbol]} snapshots, {recorder.rows_written[symbol]} rows written")
+
+
+def _ticks(args):
+    from datetime import datetime, timedelta, timezone
+    from mt5_algo_hub.ticks import tick_backtest
+    if len(args.symbols) != 2:
+        raise ValueError(f"[ERROR] The tick backtest trades a pair, got {len(args.symbols)} symbols")
+    if len(args.z) != len(args.windows):
+        raise ValueError("[ERROR] --z and --windows need one value per z-score")
+    date_to = datetime.fromisoformat(args.to).replace(tzinfo=timezone.utc) if args.to else datetime.now(timezone.utc)
+    terminal = _connect(args)
+    try:
+        (final_return, win_rate, return_per_trade, nb_trades), trades = tick_backtest(
+            args.symbols, date_to - timedelta(days=args.days), date_to, args.z, args.exit, args.stop_loss, args.windows,
+            _timeframe(args.timeframe), timedelta(hours=args.chunk_hours), terminal=terminal)
+    finally:
+        terminal.shutdown()
+    print(f"Final Return: {final_return:.3f}% - Nb Trades: {nb_trades} - Win Rate: {win_rate:.3f}% - Win per Trade: {return_per_trade:.3f}%")
+    print(f"Spread paid: {trades['Spread Cost'].sum():.3f}% over {len(trades)} closed trades")
+
+
+def _live(args):
+    import asyncio
+    from mt5_algo_hub.live import PollingFeed, ReplayFeed, SignalDaemon, load_pairs
+    pairs = load_pairs(args.pairs)
+    terminal = _connect(args)
+    timeframe = _timeframe(args.timeframe)
+    if args.replay_from:
+        feed = ReplayFeed(timeframe, args.replay_from, args.replay_to, args.speed, terminal=terminal)
+    else:
+        feed = PollingFeed(timeframe, terminal=terminal, server_offset=args.server_offset * 3600, poll=args.poll)
+    daemon = SignalDaemon(pairs, feed)
+    print(f"{len(pairs)} parameter sets on {len(daemon.symbols)} symbols, warming up...")
+    try:
+        daemon.warm_up(args.warmup)
+        asyncio.run(daemon.run(args.duration))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        terminal.shutdown()
+    print(f"\n{len(daemon.signals)} signals")
+    _print(daemon.positions())
+    print("\nLatency from the bar close:")
+    _print(daemon.latency.table())
+
+
+def _work(args):
+    from mt5_algo_hub.results import ResultStore
+    from mt5_algo_hub.workqueue import WorkQueue
+    with ResultStore(args.db) as store, WorkQueue(store, lease=args.lease, max_attempts=args.max_attempts) as queue:
+        print(f"{queue.work(args.job, wait=args.wait, poll=args.poll)} units done")
+
+
+# ----- Parser -----
+
+def _source_arguments(parser, timeframe='M15', bars=5000):
+    parser.add_argument('--symbols', nargs='+', required=True)
+    parser.add_argument('--timeframe', default=timeframe, help="M1, M5, M15, H1, D1...")
+    parser.add_argument('--bars', type=int, default=bars)
+    _connection_arguments(parser)
+
+
+def _connection_arguments(parser):
+    parser.add_argument('--source', default=None, help="mt5 (default), replay:<directory> or synthetic[:seed], default MT5_SOURCE")
+    parser.add_argument('--login', default=None)
+    parser.add_argument('--password', default=None)
+    parser.add_argument('--server', default=None)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='mt5-algo-hub', description="MetaTrader 5 research tools")
+    parser.add_argument('--profile', action='store_true', help="print where the time went (see profiling.py)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    optimize = commands.add_parser('optimize', help="grid sweep, adaptive search or walk-forward of a pair strategy")
+    optimize.add_argument('strategy', choices=list(SPACE_COLUMNS))
+    _source_arguments(optimize)
+    optimize.add_argument('--window', type=int, default=50, help="z-score window of the zscore strategy")
+    optimize.add_argument('--workers', type=int, default=None)
+    optimize.add_argument('--search', choices=['halving', 'adaptive'], default=None)
+    optimize.add_argument('--budget', type=int, default=1000)
+    optimize.add_argument('--folds', nargs=2, type=int, metavar=('TRAIN', 'TEST'), default=None)
+    optimize.add_argument('--db', default=None, help="result store (default: MT5_RESULT_STORE or ~/.mt5_algo_hub/results.sqlite)")
+    optimize.add_argument('--queue', action='store_true', help="share the sweep with the 'work' commands using the same --db")
+    optimize.add_argument('--no-store', action='store_true', help="sweep without the result store, in memory bounded by --top")
+    optimize.add_argument('--sort-by', default='Final Return')
+    optimize.add_argument('--min-trades', type=int, default=10)
+    optimize.add_argument('--where', nargs='*', default=[], help="more filters, e.g. 'Final Return > 0' 'Win per Trade > 0.1'")
+    optimize.add_argument('--spill', default=None, help="write every result to columnar files in this directory (topk.read_spill)")
+    optimize.add_argument('--top', type=int, default=10)
+    optimize.add_argument('--save-pairs', default=None, help="write the top parameter sets to this JSON file for the live daemon")
+    optimize.set_defaults(run=_optimize)
+
+    adf = commands.add_parser('adf', help="Augmented Dickey-Fuller test of every symbol")
+    _source_arguments(adf, timeframe='H1', bars=1000)
+    adf.set_defaults(run=_adf)
+
+    coint = commands.add_parser('coint', help="ADF of the spreads, Engle-Granger and rolling cointegration of a pair")
+    _source_arguments(coint, bars=20000)
+    coint.add_argument('--window', type=int, default=2000, help="rolling window, 0 to skip")
+    coint.set_defaults(run=_coint)
+
+    screen = commands.add_parser('screen', help="cointegration screener over every pair of the symbols")
+    _source_arguments(screen, bars=20000)
+    screen.add_argument('--min-correlation', type=float, default=0.8)
+    screen.add_argument('--max-p-value', type=float, default=0.05)
+    screen.add_argument('--workers', type=int, default=None)
+    screen.set_defaults(run=_screen)
+
+    levels = commands.add_parser('levels', help="most frequent price levels of every symbol and timeframe")
+    _source_arguments(levels, bars=10000)
+    levels.add_argument('--timeframes', nargs='+', default=['M5', 'M15', 'H1'])
+    levels.add_argument('--digits', type=int, default=2)
+    levels.add_argument('--resolutions', nargs='+', type=int, default=[1, 10])
+    levels.add_argument('--kind', choices=['all', 'high', 'low', 'close'], default='all')
+    levels.add_argument('--top', type=int, default=5)
+    levels.set_defaults(run=_levels)
+
+    depth = commands.add_parser('depth', help="record the market books")
+    _source_arguments(depth)
+    depth.add_argument('--interval', type=float, default=0.1)
+    depth.add_argument('--duration', type=float, default=60)
+    depth.add_argument('--output', default='depth')
+    depth.add_argument('--full', action='store_true', help="store every level of every snapshot instead of the changes")
+    depth.set_defaults(run=_depth)
+
+    ticks = commands.add_parser('ticks', help="tick-level backtest of a pair with bid/ask fills")
+    _source_arguments(ticks)
+    ticks.add_argument('--z', nargs='+', type=float, default=[1.5], help="z-score entry levels, near then far")
+    ticks.add_argument('--windows', nargs='+', type=int, default=[50])
+    ticks.add_argument('--exit', type=float, default=0.003)
+    ticks.add_argument('--stop-loss', type=float, default=0.005)
+    ticks.add_argument('--days', type=float, default=30)
+    ticks.add_argument('--to', default=None, help="end date (ISO, UTC), default now")
+    ticks.add_argument('--chunk-hours', type=float, default=24)
+    ticks.set_defaults(run=_ticks)
+
+    live = commands.add_parser('live', help="signal daemon of chosen parameter sets, on the terminal or a replay")
+    live.add_argument('--pairs', required=True, help="JSON file of the parameter sets (optimize --save-pairs)")
+    live.add_argument('--timeframe', default='M15')
+    _connection_arguments(live)
+    live.add_argument('--warmup', type=int, default=None, help="bars of history fed first, default 2 x the longest window")
+    live.add_argument('--server-offset', type=float, default=0.0, help="server time - UTC, in hours")
+    live.add_argument('--poll', type=float, default=0.05, help="seconds between polls after a bar boundary")
+    live.add_argument('--replay-from', default=None, help="replay the bars of the source from this date (ISO, UTC) instead of polling")
+    live.add_argument('--replay-to', default=None)
+    live.add_argument('--speed', type=float, default=None, help="replay speed (3600: one hour per second), as fast as possible by default")
+    live.add_argument('--duration', type=float, default=None, help="seconds before stopping, until interrupted by default")
+    live.set_defaults(run=_live)
+
+    work = commands.add_parser('work', help="run units of the queued sweeps")
+    work.add_argument('--db', default=None)
+    work.add_argument('--job', default=None)
+    work.add_argument('--lease', type=float, default=600.0)
+    work.add_argument('--max-attempts', type=int, default=3)
+    work.add_argument('--wait', action='store_true')
+    work.add_argument('--poll', type=float, default=5.0)
+    work.set_defaults(run=_work)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        from mt5_algo_hub import profiling
+        profiling.enable()
+    try:
+        args.run(args)
+    except (ValueError, ConnectionError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    if args.profile:
+        profiling.report()
+    return 0
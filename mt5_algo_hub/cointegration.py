@@ -0,0 +1,165 @@
+"""
+Rolling Engle-Granger cointegration of a pair, bar by bar.
+
+RollingCointegration follows a pair over a sliding window of `window` bars without refitting anything over the window:
+- the hedge regression y0 = alpha + beta * y1 is kept up to date by adding the new bar and removing the oldest one
+  from its means and centered cross products (rank-one updates),
+- the ADF regression of the residuals (no constant and a fixed number of lagged differences, coint's test on the
+  residuals) is a linear map of the same design built on y0 and y1 themselves. The cross products of that raw design
+  are updated rank-one as well, and for every new (beta, alpha) the residual regression's cross products are obtained
+  by the map, so a statistic costs one Cholesky factor of (lags + 2) columns whatever the window length.
+Both running sums are rebuilt exactly from the window every `resync` bars to bound the drift of the updates.
+
+rolling_cointegration() runs it over a whole history and returns the hedge ratio, the statistic and its p-value per bar.
+Its 'cointegrated' column is a regime filter for the pair strategies (regime= of zscore_algo and dual_zscore_algo).
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.unitroot import _SQRTEPS, mackinnon_p_values
+
+
+class RollingCointegration:
+    def __init__(self, window, lags=1, resync=None):
+        if window < lags + 4:
+            raise ValueError(f"[ERROR] A window of {window} bars is too short for {lags} lags")
+        self.window = window
+        self.lags = lags
+        self.resync = resync or window
+        self.count = 0
+        self.beta = math.nan
+        self.alpha = math.nan
+        self.statistic = math.nan
+
+        self.bars = np.zeros((window, 2))
+        # Rows of the raw ADF design: [y0(t-1), y1(t-1), 1, dy0(t-1..t-lags), dy1(t-1..t-lags), dy0(t), dy1(t)]
+        self.n_rows = window - 1 - lags
+        self.rows = np.zeros((self.n_rows, 2 * lags + 5))
+        self.cross = np.zeros((2 * lags + 5, 2 * lags + 5))
+        self.shift = None
+
+        # hedge regression state (y1 is the regressor)
+        self._n = 0
+        self._mean = np.zeros(2)
+        self._comoments = np.zeros((2, 2))
+
+    def _add_bar(self, bar):
+        self._n += 1
+        delta = bar - self._mean
+        self._mean += delta / self._n
+        self._comoments += np.outer(delta, bar - self._mean)
+
+    def _remove_bar(self, bar):
+        self._n -= 1
+        delta = bar - self._mean
+        self._mean -= delta / self._n
+        self._comoments -= np.outer(delta, bar - self._mean)
+
+    def _design_row(self):
+        # Last lags + 2 bars, oldest first
+        slots = [(self.count - 1 - k) % self.window for k in range(self.lags + 1, -1, -1)]
+        bars = self.bars[slots] - self.shift
+        diffs = np.diff(bars, axis=0)
+        lagged = diffs[-2::-1]
+        return np.concatenate((bars[-2], [1.0], lagged[:, 0], lagged[:, 1], diffs[-1]))
+
+    def _resynchronize(self):
+        n_bars = min(self.count, self.window)
+        bars = self.bars[:n_bars]
+        self._n = n_bars
+        self._mean = bars.mean(axis=0)
+        centered = bars - self._mean
+        self._comoments = centered.T @ centered
+        rows = self.rows[:min(max(self.count - self.lags - 1, 0), self.n_rows)]
+        self.cross = rows.T @ rows
+
+    def update(self, y0, y1):
+        """Add the new bar of the pair, return the Engle-Granger statistic of the window (nan until it is full)."""
+        bar = np.array([float(y0), float(y1)])
+        if np.isnan(bar).any():
+            raise ValueError("[ERROR] RollingCointegration got a NaN price, align the pair and drop the NaN bars first")
+        if self.shift is None:
+            # Cross products of prices relative to the first bar keep their magnitude close to the residuals'
+            self.shift = bar.copy()
+
+        slot = self.count % self.window
+        if self.count >= self.window:
+            self._remove_bar(self.bars[slot])
+        self.bars[slot] = bar
+        self._add_bar(bar)
+        self.count += 1
+
+        if self.count >= self.lags + 2:
+            row = self._design_row()
+            row_slot = (self.count - self.lags - 2) % self.n_rows
+            if self.count - self.lags - 2 >= self.n_rows:
+                old = self.rows[row_slot]
+                self.cross -= np.outer(old, old)
+            self.rows[row_slot] = row
+            self.cross += np.outer(row, row)
+
+        if self.count % self.resync == 0:
+            self._resynchronize()
+        if self.count < self.window:
+            return self.statistic
+
+        cxx, cxy, cyy = self._comoments[1, 1], self._comoments[1, 0], self._comoments[0, 0]
+        self.beta = cxy / cxx
+        self.alpha = self._mean[0] - self.beta * self._mean[1]
+        self.statistic = self._statistic(cxy * cxy / (cxx * cyy))
+        return self.statistic
+
+    def _statistic(self, r_squared):
+        if r_squared >= 1 - 100 * _SQRTEPS:
+            # (almost) perfectly colinear, like coint
+            return -math.inf
+        lags = self.lags
+        # Residual design [de(t-1..t-lags), e(t-1), de(t)] as a map of the raw design's columns
+        e_map = np.zeros((2 * lags + 5, lags + 2))
+        for k in range(lags):
+            e_map[3 + k, k] = 1.0
+            e_map[3 + lags + k, k] = -self.beta
+        e_map[0, lags] = 1.0
+        e_map[1, lags] = -self.beta
+        e_map[2, lags] = -(self.alpha - self.shift[0] + self.beta * self.shift[1])
+        e_map[-2, -1] = 1.0
+        e_map[-1, -1] = -self.beta
+        try:
+            factor = np.linalg.cholesky(e_map.T @ self.cross @ e_map)
+        except np.linalg.LinAlgError:
+            return math.nan
+        sigma = factor[-1, -1] / math.sqrt(self.n_rows - lags - 1)
+        return factor[-1, -2] / sigma
+
+    @property
+    def p_value(self):
+        return float(mackinnon_p_values(self.statistic, 'c', N=2))
+
+
+def rolling_cointegration(y0, y1, window=1000, lags=1, level=0.05, resync=None):
+    """
+    Hedge ratio, intercept, Engle-Granger statistic and p-value of the last `window` bars at every bar, as a DataFrame
+    (indexed like y0 when it is a Series). 'cointegrated' is p-value < level, False until the first full window.
+    """
+    index = y0.index if isinstance(y0, pd.Series) else None
+    y0 = np.asarray(y0, dtype=float)
+    y1 = np.asarray(y1, dtype=float)
+    monitor = RollingCointegration(window, lags, resync)
+    beta = np.full(len(y0), np.nan)
+    alpha = np.full(len(y0), np.nan)
+    statistic = np.full(len(y0), np.nan)
+    for i, (a, b) in enumerate(zip(y0.tolist(), y1.tolist())):
+        statistic[i] = monitor.update(a, b)
+        beta[i] = monitor.beta
+        alpha[i] = monitor.alpha
+
+    p_value = mackinnon_p_values(statistic, 'c', N=2)
+    return pd.DataFrame({
+        'beta': beta,
+        'alpha': alpha,
+        'statistic': statistic,
+        'p_value': p_value,
+        'cointegrated': p_value < level
+    }, index=index)
@@ -0,0 +1,110 @@
+"""
+Local bar store for the rates downloaded by the get_data functions.
+
+Bars are kept per (symbol, timeframe) in a .npy file holding the structured array returned by copy_rates_from,
+and loaded back memory-mapped. On each run only the bars newer than the last cached one are requested
+from the terminal, the rest of the history is read from disk. fetch_rates always returns an in-memory copy: a
+caller holding a view of the mapped file would keep it open, and on Windows the next save could not replace it.
+
+The store lives in ~/.mt5_algo_hub/bars unless the MT5_BAR_CACHE environment variable points elsewhere.
+"""
+
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import numpy as np
+
+from mt5_algo_hub.profiling import count, section
+
+
+def default_root():
+    return Path(os.environ.get('MT5_BAR_CACHE') or Path.home() / '.mt5_algo_hub' / 'bars')
+
+
+class BarStore:
+    def __init__(self, root=None):
+        self.root = Path(root) if root is not None else default_root()
+
+    def path(self, symbol, timeframe):
+        name = re.sub(r'[^\w.-]', '_', symbol)
+        return self.root / f"{name}_{timeframe}.npy"
+
+    def load(self, symbol, timeframe):
+        path = self.path(symbol, timeframe)
+        if not path.exists():
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def save(self, symbol, timeframe, rates):
+        # Written to a temporary file first so a crash or a concurrent reader never sees half a file
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, np.ascontiguousarray(rates))
+        os.replace(tmp, self.path(symbol, timeframe))
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc)
+
+
+def _horizon():
+    # Bar times are in trade server time, which is usually a few hours ahead of UTC
+    return datetime.now(timezone.utc) + timedelta(days=1)
+
+
+def _request(terminal, call, symbol, *args):
+    # Every terminal request is timed per symbol, the MT5 latency shows apart from the cache work
+    with section(f'mt5 {call} {symbol}', symbol=symbol):
+        rates = getattr(terminal, call)(symbol, *args)
+    count('bars downloaded', 0 if rates is None else len(rates))
+    return rates
+
+
+def fetch_rates(symbol, timeframe, n_bars, store=None, terminal=None):
+    """Last n_bars of (symbol, timeframe), like copy_rates_from(symbol, timeframe, now, n_bars), served from the store."""
+    with section(f'fetch {symbol}', symbol=symbol, timeframe=timeframe, bars=n_bars):
+        return _fetch_rates(symbol, timeframe, n_bars, store, terminal)
+
+
+def _fetch_rates(symbol, timeframe, n_bars, store, terminal):
+    if terminal is None:
+        from mt5_algo_hub.sources import get_source
+        terminal = get_source()
+    # Replay and synthetic sources are local already, only the live terminal goes through the store
+    if not getattr(terminal, 'cacheable', True):
+        return _request(terminal, 'copy_rates_from', symbol, timeframe, _horizon(), n_bars)
+    store = store or BarStore()
+
+    cached = store.load(symbol, timeframe)
+    if cached is None or len(cached) == 0:
+        rates = _request(terminal, 'copy_rates_from', symbol, timeframe, _horizon(), n_bars)
+        if rates is not None and len(rates) > 0:
+            store.save(symbol, timeframe, rates)
+        return rates
+
+    parts = []
+    first, last = cached['time'][0], cached['time'][-1]
+    if len(cached) < n_bars:
+        older = _request(terminal, 'copy_rates_from', symbol, timeframe, _utc(first), n_bars - len(cached) + 1)
+        if older is not None and len(older) > 0:
+            parts.append(older[older['time'] < first])
+
+    # The last cached bar may still have been forming when it was stored, so it is requested again
+    newer = _request(terminal, 'copy_rates_range', symbol, timeframe, _utc(last), _horizon())
+    if newer is None or len(newer) == 0 or (len(newer) == 1 and newer[0] == cached[-1]):
+        newer = None
+
+    if newer is None and not any(len(part) for part in parts):
+        return np.array(cached[-n_bars:])
+
+    parts.append(cached[cached['time'] < newer['time'][0]] if newer is not None else cached)
+    if newer is not None:
+        parts.append(newer)
+    rates = np.concatenate(parts)
+    # Nothing may still map the file when it is replaced
+    del cached, parts
+    store.save(symbol, timeframe, rates)
+    return rates[-n_bars:]
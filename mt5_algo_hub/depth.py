@@ -0,0 +1,247 @@
+"""
+Continuous market depth recording.
+
+DepthRecorder subscribes to the book of many symbols and polls them in a loop. Every snapshot is copied straight
+into a preallocated structured ring buffer per symbol (BOOK_DTYPE rows, one per level, stamped with the poll time),
+with no per-snapshot DataFrame or dict. Filled rows are flushed in bulk to numbered chunk files:
+
+    <root>/book/<symbol>/000000.npy, 000001.npy, ...
+
+With delta=True a snapshot only stores the levels that changed since the previous one (volume 0 for a level that
+disappeared), and a full keyframe, announced by a KEYFRAME row, every keyframe_every snapshots, at the start of
+every chunk and whenever the delta would not be smaller than the keyframe (the prices of the levels shifted, every
+level is new and every old one is removed). A snapshot identical to the previous one is a single UNCHANGED row, so every poll keeps its timestamp
+and a replay keeps the sampling cadence. read_book() decodes a recording back to full snapshots, and ReplaySource serves a recording directory as is.
+"""
+
+import time
+from pathlib import Path
+import numpy as np
+
+from mt5_algo_hub.sources import BOOK_DTYPE, get_source
+
+
+# Level types of the marker rows of a delta encoded recording: start of a full snapshot, snapshot equal to the previous one
+KEYFRAME = 0
+UNCHANGED = -1
+
+LEVEL_DTYPE = np.dtype([('type', '<i4'), ('price', '<f8'), ('volume', '<u8'), ('volume_dbl', '<f8')])
+
+
+class BookRing:
+    """Preallocated ring of book rows, written snapshot by snapshot and drained in bulk."""
+
+    def __init__(self, capacity):
+        self.rows = np.zeros(capacity, dtype=BOOK_DTYPE)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def free(self):
+        return self.capacity - self.size
+
+    def append(self, time_msc, levels):
+        n = len(levels)
+        if n > self.free():
+            raise OverflowError(f"[ERROR] Book ring full ({self.capacity} rows), flush it first")
+        end = (self.start + self.size) % self.capacity
+        first = min(n, self.capacity - end)
+        for part, (a, b) in ((slice(end, end + first), (0, first)), (slice(0, n - first), (first, n))):
+            if b > a:
+                rows = self.rows[part]
+                rows['time_msc'] = time_msc
+                for field in LEVEL_DTYPE.names:
+                    rows[field] = levels[field][a:b]
+        self.size += n
+
+    def drain(self):
+        """All the buffered rows, oldest first, as a new array; the ring is empty afterwards."""
+        end = self.start + self.size
+        if end <= self.capacity:
+            rows = self.rows[self.start:end].copy()
+        else:
+            rows = np.concatenate((self.rows[self.start:], self.rows[:end - self.capacity]))
+        self.start = end % self.capacity
+        self.size = 0
+        return rows
+
+
+def book_levels(book):
+    """The BookInfo tuples returned by market_book_get as a LEVEL_DTYPE array."""
+    return np.fromiter(book, dtype=LEVEL_DTYPE, count=len(book))
+
+
+def book_delta(previous, levels):
+    """Levels of `levels` that are new or changed compared to `previous`, plus removed levels with a zero volume."""
+    if len(previous) == len(levels) and np.array_equal(previous['type'], levels['type']) and np.array_equal(previous['price'], levels['price']):
+        changed = (previous['volume'] != levels['volume']) | (previous['volume_dbl'] != levels['volume_dbl'])
+        return levels[changed]
+
+    before = {(t, p): (v, d) for t, p, v, d in previous.tolist()}
+    after = {(t, p): (v, d) for t, p, v, d in levels.tolist()}
+    rows = [(t, p, v, d) for (t, p), (v, d) in after.items() if before.get((t, p)) != (v, d)]
+    rows += [(t, p, 0, 0.0) for (t, p) in before if (t, p) not in after]
+    return np.array(rows, dtype=LEVEL_DTYPE)
+
+
+class DepthRecorder:
+    """
+    Records the market depth of `symbols` under `root` (see the module docstring for the layout).
+    capacity: rows per symbol ring, a flush is triggered when a snapshot does not fit or every flush_seconds.
+    """
+
+    def __init__(self, symbols, root, terminal=None, capacity=200_000, delta=False, keyframe_every=100, flush_seconds=60):
+        self.symbols = list(symbols)
+        self.root = Path(root) / 'book'
+        self.terminal = terminal or get_source()
+        self.delta = delta
+        self.keyframe_every = keyframe_every
+        self.flush_seconds = flush_seconds
+
+        self.rings = {symbol: BookRing(capacity) for symbol in self.symbols}
+        self.previous = {}
+        self.since_keyframe = {symbol: 0 for symbol in self.symbols}
+        self.last_time = {symbol: 0 for symbol in self.symbols}
+        self.chunks = {symbol: self._next_chunk(symbol) for symbol in self.symbols}
+        self.snapshots = {symbol: 0 for symbol in self.symbols}
+        self.rows_written = {symbol: 0 for symbol in self.symbols}
+        self.last_flush = time.monotonic()
+        self.subscribed = []
+
+    def _next_chunk(self, symbol):
+        folder = self.root / symbol
+        return max((int(path.stem) + 1 for path in folder.glob('*.npy') if path.stem.isdigit()), default=0)
+
+    # ----- Subscription -----
+    def start(self):
+        for symbol in self.symbols:
+            if self.terminal.market_book_add(symbol):
+                self.subscribed.append(symbol)
+            else:
+                print(f"[WARNING] Failed to activate the market book of {symbol}: {self.terminal.last_error()}")
+        return self.subscribed
+
+    def stop(self):
+        self.flush()
+        for symbol in self.subscribed:
+            self.terminal.market_book_release(symbol)
+        self.subscribed = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ----- Recording -----
+    def record(self, symbol, book, time_msc=None):
+        """Store one snapshot (the tuple of BookInfo returned by market_book_get), pushed feeds can call it directly."""
+        levels = book_levels(book)
+        # Snapshots are told apart by their time_msc, two polls within the same millisecond get consecutive stamps
+        time_msc = max(int(time.time() * 1000) if time_msc is None else int(time_msc), self.last_time[symbol] + 1)
+        self.last_time[symbol] = time_msc
+
+        ring = self.rings[symbol]
+        rows = self._encode(symbol, levels) if self.delta else levels
+        if len(rows) > ring.free():
+            self.flush(symbol)
+            # with delta encoding the new chunk starts with a keyframe
+            rows = self._encode(symbol, levels) if self.delta else levels
+        ring.append(time_msc, rows)
+        self.previous[symbol] = levels
+        self.snapshots[symbol] += 1
+
+    def _encode(self, symbol, levels):
+        previous = self.previous.get(symbol)
+        if previous is not None and self.since_keyframe[symbol] < self.keyframe_every:
+            delta = book_delta(previous, levels)
+            if len(delta) < len(levels) + 1:
+                self.since_keyframe[symbol] += 1
+                if not len(delta):
+                    delta = np.zeros(1, dtype=LEVEL_DTYPE)
+                    delta['type'] = UNCHANGED
+                return delta
+        self.since_keyframe[symbol] = 0
+        marker = np.zeros(1, dtype=LEVEL_DTYPE)
+        marker['type'] = KEYFRAME
+        return np.concatenate((marker, levels))
+
+    def poll(self):
+        """Fetch and record one snapshot of every subscribed symbol, returns the number of snapshots recorded."""
+        recorded = 0
+        for symbol in self.subscribed:
+            book = self.terminal.market_book_get(symbol)
+            if book:
+                self.record(symbol, book)
+                recorded += 1
+        if time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+        return recorded
+
+    def run(self, interval=0.1, duration=None):
+        """Poll every `interval` seconds for `duration` seconds (until interrupted by default)."""
+        end = time.monotonic() + duration if duration is not None else None
+        next_poll = time.monotonic()
+        try:
+            while end is None or time.monotonic() < end:
+                self.poll()
+                next_poll += interval
+                time.sleep(max(next_poll - time.monotonic(), 0))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.flush()
+
+    def flush(self, symbol=None):
+        for symbol in [symbol] if symbol is not None else self.symbols:
+            ring = self.rings[symbol]
+            if not ring.size:
+                continue
+            rows = ring.drain()
+            folder = self.root / symbol
+            folder.mkdir(parents=True, exist_ok=True)
+            tmp = folder / f"{self.chunks[symbol]:06d}.tmp.npy"
+            np.save(tmp, rows)
+            tmp.replace(folder / f"{self.chunks[symbol]:06d}.npy")
+            self.chunks[symbol] += 1
+            self.rows_written[symbol] += len(rows)
+            # every chunk starts with a keyframe
+            self.previous.pop(symbol, None)
+        self.last_flush = time.monotonic()
+
+
+def decode_book(rows):
+    """Full snapshots (BOOK_DTYPE) from delta encoded rows; rows without any KEYFRAME are returned as they are."""
+    if not len(rows) or not (rows['type'] == KEYFRAME).any():
+        return rows
+    starts = np.flatnonzero(np.diff(rows['time_msc'], prepend=rows['time_msc'][0] - 1))
+    state = {}
+    snapshots = []
+    for a, b in zip(starts, np.append(starts[1:], len(rows))):
+        snapshot = rows[a:b]
+        if snapshot['type'][0] == KEYFRAME:
+            state = {}
+            snapshot = snapshot[1:]
+        elif snapshot['type'][0] == UNCHANGED:
+            snapshot = snapshot[1:]
+        for t, p, v, d in snapshot[['type', 'price', 'volume', 'volume_dbl']].tolist():
+            if v == 0 and d == 0:
+                state.pop((t, p), None)
+            else:
+                state[(t, p)] = (v, d)
+        # MT5 order: sell levels then buy levels, highest price first
+        levels = sorted(state.items(), key=lambda item: (item[0][0], -item[0][1]))
+        snapshots.append([(rows['time_msc'][a], t, p, v, d) for (t, p), (v, d) in levels])
+    return np.array([row for levels in snapshots for row in levels], dtype=BOOK_DTYPE)
+
+
+def read_book(path):
+    """A recording (a <root>/book/<symbol> chunk folder or a single .npy file) as full BOOK_DTYPE snapshots."""
+    path = Path(path)
+    if path.is_dir():
+        chunks = sorted(p for p in path.glob('*.npy') if p.stem.isdigit())
+        rows = np.concatenate([np.load(p) for p in chunks]) if chunks else np.zeros(0, dtype=BOOK_DTYPE)
+    else:
+        rows = np.load(path)
+    return decode_book(rows)
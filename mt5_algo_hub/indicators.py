@@ -0,0 +1,66 @@
+"""
+Rolling indicators shared by the pair trading scripts.
+
+The parameter grids only use a handful of rolling windows, so the rolling mean, standard deviation
+and z-score of a spread are computed once per window and served from a memory-bounded cache.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.profiling import count, section
+
+
+class RollingStats:
+    """Rolling mean, std and z-score of one series, cached per window (least recently used first out)."""
+
+    def __init__(self, series, max_bytes=256 * 1024 ** 2):
+        self.series = series if isinstance(series, pd.Series) else pd.Series(np.asarray(series, dtype=float))
+        self.values = self.series.to_numpy(dtype=float)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._nbytes = 0
+
+    def get(self, window):
+        stats = self._cache.get(window)
+        if stats is not None:
+            self._cache.move_to_end(window)
+            self.hits += 1
+            return stats
+
+        self.misses += 1
+        count('rolling windows computed')
+        with section('rolling indicators', window=window):
+            mean = self.series.rolling(window=window).mean()
+            stdev = self.series.rolling(window=window).std()
+            z_score = (self.series - mean) / stdev
+        stats = (mean.to_numpy(), stdev.to_numpy(), z_score.to_numpy())
+        for array in stats:
+            array.flags.writeable = False
+
+        self._cache[window] = stats
+        self._nbytes += sum(array.nbytes for array in stats)
+        while self._nbytes > self.max_bytes and len(self._cache) > 1:
+            _, dropped = self._cache.popitem(last=False)
+            self._nbytes -= sum(array.nbytes for array in dropped)
+        return stats
+
+    def mean(self, window):
+        return self.get(window)[0]
+
+    def std(self, window):
+        return self.get(window)[1]
+
+    def zscore(self, window):
+        return self.get(window)[2]
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def clear(self):
+        self._cache.clear()
+        self._nbytes = 0
@@ -0,0 +1,227 @@
+"""
+Price level histograms for the Support/Resistance scanner.
+
+Prices are quantized once to integer ticks of 10**-digits, the same integers Series.round(digits) rounds to, and the
+highs, lows and closes are counted together in a single unique/bincount pass. The histogram is sparse (one column
+per level that occurred) and can be:
+- read at coarser resolutions (buckets of several ticks) by aggregating the counts, without going back to the bars,
+- updated as new bars arrive, the oldest bars dropping out of a fixed window,
+- ranked like Counter.most_common: by occurrences, ties in order of first appearance.
+The first appearance of a level in the window is the head of its queue of bar numbers (one queue per kind and level),
+so bars leaving the window never rescan the bars left. An update of b bars still costs O(levels + window) in array
+copies: the sorted level arrays are merged and the window's bars are kept to be uncounted when they leave it.
+
+scan_levels() builds the histograms of a whole watchlist over several timeframes in one run.
+"""
+
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.data import fetch_rates
+from mt5_algo_hub.sources import Constants
+
+
+KINDS = ('high', 'low', 'close')
+# First appearance of a level never seen, larger than any bar number
+_NEVER = np.iinfo(np.int64).max // 4
+
+TIMEFRAME_NAMES = {value: name[len('TIMEFRAME_'):] for name, value in vars(Constants).items() if name.startswith('TIMEFRAME_')}
+
+
+def quantize(prices, digits):
+    """Prices as integer ticks of 10**-digits, the integers behind np.round(prices, digits)."""
+    prices = np.asarray(prices, dtype=float)
+    if digits >= 0:
+        return np.rint(prices * 10.0 ** digits).astype(np.int64)
+    return np.rint(prices / 10.0 ** -digits).astype(np.int64)
+
+
+def tick_prices(ticks, digits):
+    ticks = np.asarray(ticks, dtype=float)
+    return ticks / 10.0 ** digits if digits >= 0 else ticks * 10.0 ** -digits
+
+
+class LevelHistogram:
+    """Occurrences of every price level among the highs, lows and closes of the last `window` bars (all bars by default)."""
+
+    def __init__(self, digits=2, window=None):
+        self.digits = digits
+        self.window = window
+        self.bars = np.empty((0, 3), dtype=np.int64)       # quantized high/low/close of the bars counted
+        self.positions = np.empty(0, dtype=np.int64)       # their bar numbers
+        self.levels = np.empty(0, dtype=np.int64)          # sorted tick levels
+        self.counts = np.zeros((3, 0), dtype=np.int64)     # occurrences per kind and level
+        self.first = np.full((3, 0), _NEVER, dtype=np.int64)
+        self.n_seen = 0
+        # Per kind, {level: bar numbers where it occurs, oldest first}
+        self._queues = [{} for _ in KINDS]
+
+    def __len__(self):
+        return len(self.bars)
+
+    def _block(self, bars, positions):
+        # One pass over the (bars x 3) block: unique levels, their counts and first appearance per kind
+        levels, inverse = np.unique(bars.T, return_inverse=True)
+        inverse = inverse.reshape(3, -1)
+        k = len(levels)
+        counts = np.bincount((inverse + np.arange(3)[:, None] * k).ravel(), minlength=3 * k).reshape(3, k)
+        first = np.full((3, k), _NEVER, dtype=np.int64)
+        for kind in range(3):
+            np.minimum.at(first[kind], inverse[kind], positions)
+        return levels, counts, first
+
+    def _merge(self, levels, counts, first, sign):
+        if sign > 0 and not len(self.levels):
+            self.levels, self.counts, self.first = levels, counts, first
+            return
+        merged = np.union1d(self.levels, levels)
+        total = np.zeros((3, len(merged)), dtype=np.int64)
+        first_all = np.full((3, len(merged)), _NEVER, dtype=np.int64)
+        old = np.searchsorted(merged, self.levels)
+        new = np.searchsorted(merged, levels)
+        total[:, old] = self.counts
+        first_all[:, old] = self.first
+        total[:, new] += sign * counts
+        if sign > 0:
+            first_all[:, new] = np.minimum(first_all[:, new], first)
+
+        # Levels whose count fell to zero are forgotten, they get a new first appearance if they come back
+        first_all[total == 0] = _NEVER
+        keep = total.any(axis=0)
+        self.levels, self.counts, self.first = merged[keep], total[:, keep], first_all[:, keep]
+
+    def add(self, highs, lows, closes):
+        bars = np.stack([quantize(highs, self.digits), quantize(lows, self.digits), quantize(closes, self.digits)], axis=1)
+        positions = np.arange(self.n_seen, self.n_seen + len(bars), dtype=np.int64)
+        self.n_seen += len(bars)
+        if len(bars):
+            self._merge(*self._block(bars, positions), 1)
+            for kind, queues in enumerate(self._queues):
+                for level, position in zip(bars[:, kind].tolist(), positions.tolist()):
+                    if level in queues:
+                        queues[level].append(position)
+                    else:
+                        queues[level] = deque([position])
+            self.bars = np.concatenate((self.bars, bars))
+            self.positions = np.concatenate((self.positions, positions))
+        if self.window is not None and len(self.bars) > self.window:
+            self._remove(slice(0, len(self.bars) - self.window))
+
+    def add_rates(self, rates):
+        self.add(rates['high'], rates['low'], rates['close'])
+
+    def pop(self, n=1):
+        """Uncount the n most recent bars (e.g. a bar that was still forming when it was added)."""
+        if n > 0:
+            self._remove(slice(len(self.bars) - n, len(self.bars)))
+
+    def _remove(self, part):
+        # part: the oldest bars (leaving the window) or the most recent ones (pop), at either end of every queue
+        removed = self.positions[part]
+        bars = self.bars[part]
+        levels, counts, _ = self._block(bars, removed)
+        self._merge(levels, counts, None, -1)
+        start, stop, _ = part.indices(len(self.bars))
+        if start == 0:
+            self.bars, self.positions = self.bars[stop:], self.positions[stop:]
+        else:
+            self.bars, self.positions = self.bars[:start], self.positions[:start]
+
+        # The levels of the removed bars that are still counted appear first at the new head of their queue
+        for kind, queues in enumerate(self._queues):
+            for level, position in zip(bars[:, kind].tolist(), removed.tolist()):
+                queue = queues[level]
+                if queue[0] == position:
+                    queue.popleft()
+                else:
+                    queue.pop()
+            touched = np.unique(bars[:, kind])
+            remaining = [level for level in touched.tolist() if queues[level]]
+            for level in touched.tolist():
+                if not queues[level]:
+                    del queues[level]
+            if remaining:
+                self.first[kind, np.searchsorted(self.levels, remaining)] = [queues[level][0] for level in remaining]
+
+    def histogram(self, resolution=1):
+        """(levels, counts, first) with levels grouped in buckets of `resolution` ticks, rounded to the nearest bucket."""
+        if resolution == 1 or not len(self.levels):
+            return self.levels, self.counts, self.first
+        buckets = (self.levels + resolution // 2) // resolution
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        return buckets[starts] * resolution, np.add.reduceat(self.counts, starts, axis=1), np.minimum.reduceat(self.first, starts, axis=1)
+
+    def most_common(self, n=10, kind='all', resolution=1):
+        """[(price, occurrences)] of the n most frequent levels among 'high', 'low', 'close' or 'all' of them."""
+        levels, counts, first = self.histogram(resolution)
+        if kind == 'all':
+            # Counter(highs) + Counter(lows) + Counter(closes) orders the levels of the highs first, then the lows, then the closes
+            count = counts.sum(axis=0)
+            order_key = np.where(first[0] < _NEVER, first[0], np.where(first[1] < _NEVER, _NEVER + first[1], 2 * _NEVER + first[2]))
+        else:
+            row = KINDS.index(kind)
+            count, order_key = counts[row], first[row]
+        # Only the levels at least as frequent as the n-th one can make the top n
+        threshold = max(np.partition(count, -n)[-n], 1) if n < len(count) else 1
+        candidates = np.flatnonzero(count >= threshold)
+        top = candidates[np.lexsort((order_key[candidates], -count[candidates]))][:n]
+        return list(zip(tick_prices(levels[top], self.digits).tolist(), count[top].tolist()))
+
+    def table(self, n=10, resolutions=(1,), kinds=('high', 'low', 'close', 'all')):
+        rows = []
+        for resolution in resolutions:
+            for kind in kinds:
+                for rank, (price, count) in enumerate(self.most_common(n, kind, resolution), 1):
+                    rows.append({'Resolution': resolution, 'Kind': kind, 'Rank': rank, 'Price': price, 'Occurrences': count})
+        return pd.DataFrame(rows, columns=['Resolution', 'Kind', 'Rank', 'Price', 'Occurrences'])
+
+
+class LevelScanner:
+    """Histogram of the last n_bars of (symbol, timeframe), refreshed incrementally from the bar store."""
+
+    def __init__(self, symbol, timeframe, n_bars=10000, digits=2, terminal=None, store=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.n_bars = n_bars
+        self.terminal = terminal
+        self.store = store
+        self.histogram = LevelHistogram(digits, window=n_bars)
+        self.last_time = None
+
+    def refresh(self):
+        """Count the bars that arrived since the last refresh, returns how many were (re)counted."""
+        rates = fetch_rates(self.symbol, self.timeframe, self.n_bars, self.store, self.terminal)
+        if rates is None or len(rates) == 0:
+            return 0
+        new = rates
+        if self.last_time is not None:
+            new = rates[np.searchsorted(rates['time'], self.last_time, side='left'):]
+            # The last bar counted may still have been forming, it is counted again with its final prices
+            if len(new) and new['time'][0] == self.last_time:
+                self.histogram.pop(1)
+        self.histogram.add_rates(new)
+        self.last_time = int(rates['time'][-1])
+        return len(new)
+
+
+def scan_levels(symbols, timeframes=None, n_bars=10000, digits=2, resolutions=(1,), top=10, terminal=None, store=None, scanners=None):
+    """
+    Most frequent levels of every (symbol, timeframe), M5/M15/H1 by default, as one table.
+    digits is an int or a {symbol: digits} dict. Passing the `scanners` dict of a previous call only counts the new bars.
+    """
+    timeframes = timeframes or (Constants.TIMEFRAME_M5, Constants.TIMEFRAME_M15, Constants.TIMEFRAME_H1)
+    scanners = {} if scanners is None else scanners
+    tables = []
+    for symbol in symbols:
+        for timeframe in timeframes:
+            key = (symbol, timeframe)
+            if key not in scanners:
+                symbol_digits = digits[symbol] if isinstance(digits, dict) else digits
+                scanners[key] = LevelScanner(symbol, timeframe, n_bars, symbol_digits, terminal, store)
+            scanners[key].refresh()
+            table = scanners[key].histogram.table(top, resolutions)
+            table.insert(0, 'Timeframe', TIMEFRAME_NAMES.get(timeframe, timeframe))
+            table.insert(0, 'Symbol', symbol)
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
@@ -0,0 +1,308 @@
+"""
+Live signal daemon of the pair strategies.
+
+The daemon runs chosen parameter sets (PairConfig: a pair, its z-score windows and entries, exit threshold and stop
+loss, e.g. the top rows of an optimization, see pairs_from_table) on many pairs at once:
+- a feed watches the bars of every symbol on an asyncio event loop and yields each completed bar once,
+- the return of the bar updates the spread of every pair trading the symbol. When both legs of a pair have the bar,
+  the spread is fed to the pair's SignalEngine (streaming.py): rolling z-scores updated in constant time and the
+  position state machine of the backtests, so the signals are the backtest's trades,
+- every entry ('long', 'short') and 'exit' goes to the on_signal callback,
+- a LatencyMonitor keeps, per symbol, the delay from the bar close to its reception by the feed and to the decision
+  of every pair it is a leg of.
+Before it goes live the daemon warms the engines up on the history of the bars, so the z-scores and the positions
+are those of the backtest at the start.
+
+Two feeds:
+- PollingFeed: the terminal (or any source). Each symbol is watched by its own task that sleeps until the next bar
+  boundary, then polls the last bars every `poll` seconds until the bar closed at the boundary shows up (for at most
+  `patience` seconds, e.g. when the market is closed, a late bar is picked up at the next boundary). The
+  MetaTrader5 calls run in threads, off the event loop. Bar times are in the broker's server time, `server_offset`
+  (server time - UTC, in seconds) converts them to compute the close of a bar.
+- ReplayFeed: the recorded (or synthetic) bars of a ReplaySource from `start` on, released at the pace of their close
+  times divided by `speed`, or as fast as they can be processed (speed=None). Latencies then measure the daemon alone.
+
+    mt5-algo-hub live --pairs pairs.json --timeframe M15
+    mt5-algo-hub live --pairs pairs.json --source synthetic --replay-from 2024-12-01 --speed 3600
+"""
+
+import asyncio
+import json
+import time
+from collections import defaultdict, deque, namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.sources import get_source, timeframe_seconds
+from mt5_algo_hub.streaming import SignalEngine
+
+
+PairConfig = namedtuple('PairConfig', ['name', 'symbols', 'windows', 'z_entries', 'threshold_exit', 'stop_loss'])
+# A completed bar: its open time (server time, like the rates' 'time'), its close price, the wall clock time of its
+# close and of its reception by the feed (epoch seconds)
+Bar = namedtuple('Bar', ['symbol', 'time', 'close', 'closed_at', 'received'])
+# pnl: the realized return (x1) of the trade an 'exit' closes, 1 on an entry (the trade it opens)
+PairSignal = namedtuple('PairSignal', ['pair', 'time', 'action', 'position', 'pnl', 'z_scores', 'latency'])
+
+# Parameter columns of the optimization tables, see cli.SPACE_COLUMNS
+_TABLE_PARAMETERS = {
+    'zscore': (['Entry - z'], None),
+    'dual_zscore': (['Entry - z Near', 'Entry - z Far'], ['Window - Near', 'Window - Far']),
+}
+
+
+# ----- Parameter sets -----
+
+def pairs_from_table(symbols, table, strategy, window=None, top=10):
+    """PairConfig of the `top` first rows of an optimization table of the pair `symbols` (zscore: its `window`)."""
+    if strategy not in _TABLE_PARAMETERS:
+        raise ValueError(f"[ERROR] The live daemon runs the pair strategies ({', '.join(_TABLE_PARAMETERS)}), not {strategy}")
+    z_columns, window_columns = _TABLE_PARAMETERS[strategy]
+    pairs = []
+    for rank, (_, row) in enumerate(table.head(top).iterrows(), 1):
+        windows = [int(row[column]) for column in window_columns] if window_columns else [int(window)]
+        pairs.append(PairConfig(f"{symbols[0]}-{symbols[1]} #{rank}", list(symbols), windows,
+                                [float(row[column]) for column in z_columns],
+                                float(row['Exit Threshold']), float(row['Stop Loss'])))
+    return pairs
+
+
+def save_pairs(path, pairs):
+    Path(path).write_text(json.dumps([pair._asdict() for pair in pairs], indent=2))
+
+
+def load_pairs(path):
+    """PairConfig list of a JSON file: [{"name", "symbols", "windows", "z_entries", "threshold_exit", "stop_loss"}, ...]"""
+    pairs = [PairConfig(**entry) for entry in json.loads(Path(path).read_text())]
+    for pair in pairs:
+        if len(pair.symbols) != 2 or len(pair.windows) != len(pair.z_entries):
+            raise ValueError(f"[ERROR] {pair.name}: a pair needs 2 symbols and one z entry per window")
+    return pairs
+
+
+# ----- Feeds -----
+
+def _utc(date):
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+class PollingFeed:
+    """Completed bars of the terminal, polled right after every bar boundary (see the module docstring)."""
+
+    def __init__(self, timeframe, terminal=None, server_offset=0.0, poll=0.05, patience=60.0):
+        self.terminal = terminal or get_source()
+        self.timeframe = timeframe
+        self.step = timeframe_seconds(timeframe)
+        self.server_offset = server_offset
+        self.poll = poll
+        self.patience = patience
+        self.last = {}
+
+    def history(self, symbol, n_bars):
+        # Position 1: the bar in progress is left out
+        rates = self.terminal.copy_rates_from_pos(symbol, self.timeframe, 1, n_bars)
+        if rates is None:
+            raise ValueError(f"[ERROR] No data returned for {symbol} - {self.terminal.last_error()}")
+        if len(rates):
+            self.last[symbol] = int(rates['time'][-1])
+        return rates
+
+    async def _watch(self, symbol, queue):
+        try:
+            while True:
+                # Sleep until the next boundary, then poll until a bar closed by then is served
+                server_now = time.time() + self.server_offset
+                boundary = (server_now // self.step + 1) * self.step
+                await asyncio.sleep(boundary - server_now)
+                while time.time() + self.server_offset < boundary + self.patience:
+                    rates = await asyncio.to_thread(self.terminal.copy_rates_from_pos, symbol, self.timeframe, 0, 3)
+                    received = time.time()
+                    if rates is None:
+                        raise ValueError(f"[ERROR] No data returned for {symbol} - {self.terminal.last_error()}")
+                    last = self.last.get(symbol, -1)
+                    closed = rates[(rates['time'] > last) & (rates['time'] + self.step <= received + self.server_offset)]
+                    if symbol not in self.last:
+                        closed = closed[-1:]        # no history: from the last closed bar on
+                    for bar_time, close in zip(closed['time'].tolist(), closed['close'].tolist()):
+                        queue.put_nowait(Bar(symbol, bar_time, close, bar_time + self.step - self.server_offset, received))
+                        self.last[symbol] = bar_time
+                    if len(closed):
+                        break
+                    await asyncio.sleep(self.poll)
+        except Exception as error:
+            queue.put_nowait(error)
+
+    async def stream(self, symbols):
+        queue = asyncio.Queue()
+        tasks = [asyncio.create_task(self._watch(symbol, queue)) for symbol in symbols]
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class ReplayFeed:
+    """Recorded bars from `start` to `end` replayed at `speed` times their pace, or as fast as possible (speed=None)."""
+
+    def __init__(self, timeframe, start, end=None, speed=None, terminal=None):
+        self.terminal = terminal or get_source()
+        self.timeframe = timeframe
+        self.step = timeframe_seconds(timeframe)
+        self.start = _utc(start)
+        self.end = _utc(end) if end is not None else datetime.now(timezone.utc)
+        self.speed = speed
+
+    def history(self, symbol, n_bars):
+        # Bars closed at `start`: open time up to start - one bar
+        rates = self.terminal.copy_rates_from(symbol, self.timeframe, self.start.timestamp() - self.step, n_bars)
+        if rates is None:
+            raise ValueError(f"[ERROR] No data returned for {symbol} - {self.terminal.last_error()}")
+        return rates
+
+    async def stream(self, symbols):
+        bars = []
+        for symbol in symbols:
+            rates = self.terminal.copy_rates_range(symbol, self.timeframe, self.start.timestamp() - self.step + 1, self.end.timestamp())
+            if rates is None:
+                raise ValueError(f"[ERROR] No data returned for {symbol} - {self.terminal.last_error()}")
+            bars += [(bar_time, symbol, close) for bar_time, close in zip(rates['time'].tolist(), rates['close'].tolist())]
+        bars.sort(key=lambda bar: bar[0])
+
+        origin, virtual_origin = time.time(), self.start.timestamp()
+        for bar_time, symbol, close in bars:
+            if self.speed:
+                closed_at = origin + (bar_time + self.step - virtual_origin) / self.speed
+                await asyncio.sleep(max(closed_at - time.time(), 0))
+            else:
+                await asyncio.sleep(0)
+                closed_at = time.time()
+            yield Bar(symbol, bar_time, close, closed_at, time.time())
+
+
+# ----- Latency -----
+
+class LatencyMonitor:
+    """Latency samples (seconds) per symbol and stage, the last `size` of each kept for the percentiles."""
+
+    def __init__(self, size=10000):
+        self.samples = defaultdict(lambda: deque(maxlen=size))
+        self.counts = defaultdict(int)
+
+    def record(self, symbol, stage, seconds):
+        self.samples[(symbol, stage)].append(seconds)
+        self.counts[(symbol, stage)] += 1
+
+    def table(self):
+        rows = []
+        for (symbol, stage), samples in sorted(self.samples.items()):
+            ms = np.asarray(samples) * 1000
+            rows.append({'Symbol': symbol, 'Stage': stage, 'Bars': self.counts[(symbol, stage)], 'Mean (ms)': ms.mean(),
+                         'p50 (ms)': np.percentile(ms, 50), 'p99 (ms)': np.percentile(ms, 99), 'Max (ms)': ms.max()})
+        return pd.DataFrame(rows, columns=['Symbol', 'Stage', 'Bars', 'Mean (ms)', 'p50 (ms)', 'p99 (ms)', 'Max (ms)'])
+
+
+# ----- Daemon -----
+
+def print_signal(signal):
+    when = datetime.fromtimestamp(signal.time, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+    z_scores = ' / '.join(f"{z:.2f}" for z in signal.z_scores)
+    pnl = 'trade pnl' if signal.action == 'exit' else 'open pnl'
+    print(f"{when} {signal.pair}: {signal.action} (z {z_scores}, {pnl} {(signal.pnl - 1) * 100:+.3f}%, {signal.latency * 1000:.2f} ms)")
+
+
+class _PairState:
+    def __init__(self, config):
+        self.config = config
+        self.engine = SignalEngine(config.windows, config.z_entries, config.threshold_exit, config.stop_loss)
+        self.pending = {}                           # bar time: [return of leg 0, return of leg 1, bar of leg 0, bar of leg 1]
+
+
+class SignalDaemon:
+    """
+    Runs the PairConfig `pairs` on the bars of `feed` (PollingFeed or ReplayFeed), see the module docstring.
+    on_signal(PairSignal) receives every entry and exit, print_signal by default.
+    """
+
+    def __init__(self, pairs, feed, on_signal=print_signal, latency=None):
+        self.pairs = [_PairState(config) for config in pairs]
+        self.feed = feed
+        self.on_signal = on_signal
+        self.latency = latency or LatencyMonitor()
+        self.by_symbol = defaultdict(list)
+        for state in self.pairs:
+            for leg, symbol in enumerate(state.config.symbols):
+                self.by_symbol[symbol].append((state, leg))
+        self.symbols = list(self.by_symbol)
+        self.closes = {}
+        self.signals = []
+
+    def warm_up(self, n_bars=None):
+        """Feed the history of the bars (2 x the longest window by default) without emitting its signals."""
+        n_bars = n_bars or 2 * max(max(state.config.windows) for state in self.pairs) + 1
+        bars = []
+        for symbol in self.symbols:
+            rates = self.feed.history(symbol, n_bars)
+            bars += [Bar(symbol, bar_time, close, None, None) for bar_time, close in zip(rates['time'].tolist(), rates['close'].tolist())]
+        for bar in sorted(bars, key=lambda bar: bar.time):
+            self.on_bar(bar, live=False)
+
+    def on_bar(self, bar, live=True):
+        """Update the pairs trading bar.symbol, returns their PairSignals."""
+        previous = self.closes.get(bar.symbol)
+        self.closes[bar.symbol] = bar.close
+        if live:
+            self.latency.record(bar.symbol, 'feed', bar.received - bar.closed_at)
+        if previous is None:
+            return []
+
+        ret = bar.close / previous - 1
+        signals = []
+        for state, leg in self.by_symbol[bar.symbol]:
+            entry = state.pending.setdefault(bar.time, [None, None, None, None])
+            entry[leg], entry[2 + leg] = ret, bar
+            if entry[1 - leg] is None:
+                continue
+            # Both legs have the bar: older bars one leg never got are dropped, like the inner join of the backtests
+            for bar_time in [t for t in state.pending if t <= bar.time]:
+                del state.pending[bar_time]
+            signal = state.engine.update(entry[0] - entry[1])
+            now = time.time()
+            if live:
+                for leg_bar in entry[2:]:
+                    self.latency.record(leg_bar.symbol, 'signal', now - leg_bar.closed_at)
+            if signal.action is not None and live:
+                signals.append(PairSignal(state.config.name, bar.time, signal.action, signal.position, signal.pnl,
+                                          signal.z_scores, now - max(entry[2].closed_at, entry[3].closed_at)))
+        for signal in signals:
+            self.signals.append(signal)
+            if self.on_signal is not None:
+                self.on_signal(signal)
+        return signals
+
+    async def run(self, duration=None):
+        """Process the feed until it ends (replay) or for `duration` seconds."""
+        async def consume():
+            async for bar in self.feed.stream(self.symbols):
+                self.on_bar(bar)
+        try:
+            await asyncio.wait_for(consume(), duration)
+        except asyncio.TimeoutError:
+            pass
+
+    def positions(self):
+        """State of every pair: position, pnl of the open trade (0 when flat) and the backtest metrics of its signals so far."""
+        rows = []
+        for state in self.pairs:
+            final_return, win_rate, return_per_trade, nb_trades = state.engine.results()
+            rows.append({'Pair': state.config.name, 'Position': state.engine.position, 'Open PnL': (state.engine.pnl - 1) * 100,
+                         'Final Return': final_return, 'Nb Trades': nb_trades, 'Win Rate': win_rate, 'Win per Trade': return_per_trade})
+        return pd.DataFrame(rows)
@@ -0,0 +1,139 @@
+"""
+Concurrent loader of many symbols and timeframes, aligned into one array per timeframe.
+
+load_bars() sends every (symbol, timeframe) request (symbol_select then fetch_rates, so the bar store is used) to a
+bounded thread pool. A RateLimiter spaces the requests when the terminal or broker needs it. The MetaTrader5 calls
+release the GIL while they wait on the terminal, so the pool keeps several requests in flight.
+
+Once the requests of a timeframe are back, align_rates() builds its time axis and preallocates one
+(bars x symbols) float array. It writes the requested field of every structured array straight into its column,
+at the positions of its bar times, without building a DataFrame per symbol. The join policy decides the axis:
+- 'inner': the bars every symbol has, like pd.DataFrame(closes).dropna() in the scripts' get_data
+- 'outer': every bar of any symbol, NaN where a symbol has no bar
+- 'ffill': the 'outer' axis, a missing bar repeats the symbol's previous value (NaN before its first bar)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.data import fetch_rates
+from mt5_algo_hub.profiling import count, section
+
+
+JOINS = ('inner', 'outer', 'ffill')
+
+
+class RateLimiter:
+    """At most `rate` requests per second on average, in bursts of up to `burst` requests. Thread safe."""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError(f"[ERROR] The request rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Each caller reserves its token, possibly in advance (negative balance), then sleeps outside the lock
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+def align_rates(rates, field='close', join='inner'):
+    """
+    One DataFrame indexed by bar time from {symbol: rates structured array}, for a field or a list of fields
+    (columns (field, symbol) then). The bar times of every array must be increasing.
+    """
+    if join not in JOINS:
+        raise ValueError(f"[ERROR] Unknown join '{join}', expected one of {', '.join(JOINS)}")
+    fields = [field] if isinstance(field, str) else list(field)
+    symbols = list(rates)
+    times = [np.asarray(rates[symbol]['time']) for symbol in symbols]
+    if not times:
+        axis = np.empty(0, dtype=np.int64)
+    elif join == 'inner':
+        axis = reduce(np.intersect1d, times)
+    else:
+        axis = np.unique(np.concatenate(times))
+
+    values = np.full((len(axis), len(fields) * len(symbols)), np.nan)
+    for column, (symbol, bar_times) in enumerate(zip(symbols, times)):
+        positions = np.searchsorted(axis, bar_times)
+        found = positions < len(axis)
+        found[found] = axis[positions[found]] == bar_times[found]
+        positions = positions[found]
+        for k, name in enumerate(fields):
+            values[positions, k * len(symbols) + column] = rates[symbol][name][found]
+        if join == 'ffill' and len(axis):
+            # Index of the last bar of the symbol at or before each row
+            last = np.zeros(len(axis), dtype=np.intp)
+            last[positions] = positions
+            last = np.maximum.accumulate(last)
+            filled = last >= positions[0] if len(positions) else np.zeros(len(axis), dtype=bool)
+            for k in range(len(fields)):
+                target = k * len(symbols) + column
+                values[:, target] = np.where(filled, values[last, target], np.nan)
+
+    index = pd.DatetimeIndex(pd.to_datetime(axis, unit='s'), name='time')
+    columns = symbols if isinstance(field, str) else pd.MultiIndex.from_product([fields, symbols])
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def _fetch(terminal, symbol, timeframe, n_bars, store, limiter):
+    if limiter is not None:
+        limiter.acquire()
+    with section(f'load {symbol}', symbol=symbol, timeframe=timeframe):
+        if not terminal.symbol_select(symbol, True):
+            return None, f"Cannot select {symbol} in MT5 - {terminal.last_error()}"
+        rates = fetch_rates(symbol, timeframe, n_bars, store=store, terminal=terminal)
+    if rates is None or len(rates) == 0:
+        return None, f"No data returned for {symbol}"
+    return rates, None
+
+
+def load_bars(symbols, timeframes, n_bars, field='close', join='inner', workers=8, rate=None, on_error='raise', store=None, terminal=None):
+    """
+    The last n_bars of every symbol at every timeframe, downloaded by `workers` threads (at most `rate` requests per
+    second if given) and aligned by align_rates(field, join). Returns the DataFrame of a single timeframe, or a
+    {timeframe: DataFrame} dict when `timeframes` is a list.
+    on_error='raise' raises a ValueError for a symbol that cannot be selected or has no data, 'skip' prints a warning
+    and leaves it out.
+    """
+    if on_error not in ('raise', 'skip'):
+        raise ValueError(f"[ERROR] Unknown on_error '{on_error}', expected 'raise' or 'skip'")
+    if terminal is None:
+        from mt5_algo_hub.sources import get_source
+        terminal = get_source()
+    single = np.ndim(timeframes) == 0
+    timeframes = [timeframes] if single else list(timeframes)
+    requests = [(symbol, timeframe) for timeframe in timeframes for symbol in symbols]
+    limiter = RateLimiter(rate, burst=workers) if rate else None
+
+    with section('load bars', requests=len(requests), workers=workers):
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(requests)))) as pool:
+            futures = [pool.submit(_fetch, terminal, symbol, timeframe, n_bars, store, limiter) for symbol, timeframe in requests]
+            downloads = [future.result() for future in futures]
+        count('load requests', len(requests))
+
+        rates = {timeframe: {} for timeframe in timeframes}
+        for (symbol, timeframe), (bars, error) in zip(requests, downloads):
+            if error is None:
+                rates[timeframe][symbol] = bars
+            elif on_error == 'raise':
+                raise ValueError(f"[ERROR] {error}")
+            else:
+                print(f"[WARNING] {error}")
+        frames = {timeframe: align_rates(rates[timeframe], field, join) for timeframe in timeframes}
+    return frames[timeframes[0]] if single else frames
@@ -0,0 +1,50 @@
+"""
+The optimization of a strategy's grid, shared by the scripts' optimization() and the CLI's optimize command.
+
+optimize() runs one of:
+- the exhaustive sweep (strategies.*_sweep), streamed through filters and a top-K (topk.py) so the memory stays flat,
+  with store=ResultStore() the stored combinations are reused and only the new ones are backtested (results.py),
+- with queue=WorkQueue(store), the same sweep shared with the workers of other processes/hosts (workqueue.py),
+- with search='halving' or 'adaptive', a search that only backtests part of the grid within `budget` full-length
+  backtests (search.py),
+- with folds=(train_bars, test_bars), a walk-forward: the grid is optimized on rolling train slices and the winners of
+  every fold are backtested on the test slice that follows it, out of sample (walkforward.py),
+prints its results and returns the table it printed.
+"""
+
+from mt5_algo_hub import strategies
+from mt5_algo_hub.search import adaptive_search
+from mt5_algo_hub.topk import TopK
+from mt5_algo_hub.walkforward import out_of_sample, walk_forward
+
+
+def optimize(strategy, data, space, fixed=None, k=10, sort_by='Final Return', where=(), min_trades=10, digits=3,
+             workers=None, search=None, budget=1000, folds=None, store=None, queue=None, spill=None):
+    """
+    The k best combinations of the grid `space` ({column: values}, in the order of the *_sweep arguments) passing the
+    `where` filters, sorted by `sort_by`; spill='dir' writes every result to disk (topk.ColumnSpill).
+    min_trades only applies to the search and the walk-forward, which rank their own candidates.
+    """
+    float_format = f"%.{digits}f"
+    if folds is not None:
+        results = walk_forward(strategy, data, space, *folds, fixed=fixed, sort_by=sort_by, min_trades=min_trades, workers=workers)
+        winners, compounded = out_of_sample(results)
+        print("\nWalk-Forward - best combination of every fold, scored on the next test slice:")
+        print(winners.to_string(index=False, float_format=float_format))
+        print(f"\nOut-of-sample compounded return: {compounded:.{digits}f}%")
+        return winners
+
+    top = TopK(k, sort_by, where=where, spill=spill)
+    if queue is not None:
+        top.add(queue.sweep(strategy, data, space, fixed))
+    elif search is not None:
+        top.add(adaptive_search(strategy, data, space, budget, search, fixed=fixed, sort_by=sort_by, min_trades=min_trades, workers=workers))
+    else:
+        sweep = getattr(strategies, f"{strategy}_sweep")
+        sweep(data, *space.values(), workers=workers, store=store, top=top, **(fixed or {}))
+    best = top.table()
+
+    print(f"\n{top.n_passed} of {top.n_seen} combinations pass the filters")
+    print(f"\nTop {k} Best Combinations:")
+    print(best.to_string(index=False, float_format=float_format))
+    return best
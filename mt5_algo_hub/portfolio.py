@@ -0,0 +1,169 @@
+"""
+Portfolio backtest of many pairs at once.
+
+Every pair has its own parameters (z-score entry, exit threshold, stop loss, window, and optionally a far window and
+entry level for the Dual Z-Score rules). Spreads, z-scores, entry signals, positions and pnl are (bars x pairs) arrays:
+- the spreads of all the pairs come from one column subtraction of the returns,
+- the rolling z-scores are computed once per window for every pair using it (one DataFrame.rolling per window),
+- a single loop over the bars advances the positions of every pair with the state machine of pairs_trading_algo.
+Each pair gets the same (final_return, win_rate, return_per_trade, nb_trades) as zscore_algo / dual_zscore_algo,
+plus its maximum drawdown. The portfolio splits its capital equally between the pairs: its return is the mean of the
+pairs' (closed trades) returns, its drawdown is measured on the mark-to-market equity.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def pair_table(pairs):
+    """
+    Normalize the pair definitions, dicts with 'pair' (first, second), 'entry', 'exit', 'stop_loss', 'window',
+    and optionally 'entry_far' and 'window_far' (Dual Z-Score), into one DataFrame row per pair.
+    """
+    columns = ['Pair', 'First', 'Second', 'Entry', 'Exit', 'Stop Loss', 'Window', 'Entry Far', 'Window Far']
+    rows = []
+    for spec in pairs:
+        missing = {'pair', 'entry', 'exit', 'stop_loss', 'window'} - set(spec)
+        if missing:
+            raise ValueError(f"[ERROR] Pair definition {spec} is missing {', '.join(sorted(missing))}")
+        first, second = spec['pair']
+        rows.append({
+            'Pair': spec.get('name', f"{first}-{second}"),
+            'First': first,
+            'Second': second,
+            'Entry': spec['entry'],
+            'Exit': spec['exit'],
+            'Stop Loss': spec['stop_loss'],
+            'Window': spec['window'],
+            'Entry Far': spec.get('entry_far', np.nan),
+            'Window Far': spec.get('window_far', 0),
+        })
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _rolling_zscores(spreads, windows):
+    # One rolling pass per distinct window, over all the pairs using it
+    z_scores = np.full(spreads.shape, np.nan)
+    for window in np.unique(windows[windows > 0]):
+        columns = np.flatnonzero(windows == window)
+        frame = pd.DataFrame(spreads[:, columns])
+        mean = frame.rolling(window=int(window)).mean()
+        stdev = frame.rolling(window=int(window)).std()
+        z_scores[:, columns] = ((frame - mean) / stdev).to_numpy()
+    return z_scores
+
+
+def portfolio_signals(returns, table):
+    """(spreads, long_entry, short_entry, start) arrays of the pairs of `table`, spread = first - second."""
+    first = returns[table['First']].to_numpy(dtype=float)
+    second = returns[table['Second']].to_numpy(dtype=float)
+    spreads = first - second
+
+    windows = table['Window'].to_numpy(dtype=int)
+    windows_far = table['Window Far'].to_numpy(dtype=int)
+    entry = table['Entry'].to_numpy(dtype=float)
+    entry_far = table['Entry Far'].to_numpy(dtype=float)
+    # near and far z-scores side by side, so a window shared by both is rolled once
+    z_scores = _rolling_zscores(np.hstack((spreads, spreads)), np.concatenate((windows, windows_far)))
+    z_near, z_far = z_scores[:, :len(windows)], z_scores[:, len(windows):]
+
+    dual = windows_far > 0
+    long_entry = z_near < -entry
+    short_entry = z_near > entry
+    long_entry[:, dual] &= z_far[:, dual] < -entry_far[dual]
+    short_entry[:, dual] &= z_far[:, dual] > entry_far[dual]
+    # Like the backtests, a pair starts trading once its (far) window is complete
+    start = np.where(dual, windows_far, windows)
+    return spreads, long_entry, short_entry, start
+
+
+def portfolio_kernel(spreads, long_entry, short_entry, threshold_exit, stop_loss, start):
+    """
+    The position state machine of all the pairs in one pass over the bars.
+    Returns (equity, final_return, winning_trades, nb_trades): equity is the (bars x pairs) mark-to-market value
+    of 1 invested in each pair, closed trades compounded times the pnl of the open one.
+    """
+    n_bars, n_pairs = spreads.shape
+    bars = np.arange(n_bars)[:, None]
+    side = np.zeros((n_bars, n_pairs), dtype=np.int8)
+    side[long_entry & (bars >= start)] = 1
+    side[short_entry & (bars >= start)] = -1
+    any_signal = side.any(axis=1).tolist()
+
+    position = np.zeros(n_pairs)
+    pnl = np.ones(n_pairs)
+    final_return = np.ones(n_pairs)
+    nb_trades = np.zeros(n_pairs, dtype=np.int64)
+    winning_trades = np.zeros(n_pairs, dtype=np.int64)
+    equity = np.ones((n_bars, n_pairs))
+    n_open = 0
+
+    # Whole-vector updates: a flat pair has position 0 and pnl 1, so compounding leaves it at exactly 1
+    for i in range(int(start.min()) if n_pairs else n_bars, n_bars):
+        is_open = None
+        if n_open:
+            is_open = position != 0
+            pnl *= 1 + position * spreads[i]
+            ret = pnl - 1
+            closed = is_open & ((ret >= threshold_exit) | (ret <= -stop_loss))
+            if closed.any():
+                final_return[closed] *= pnl[closed]
+                winning_trades += closed & (ret > 0)
+                position[closed] = 0
+                pnl[closed] = 1
+                n_open -= np.count_nonzero(closed)
+
+        # Only pairs that were flat at the start of the bar can enter
+        if any_signal[i]:
+            entered = side[i] != 0
+            if is_open is not None:
+                entered &= ~is_open
+            position[entered] = side[i, entered]
+            entered_count = np.count_nonzero(entered)
+            nb_trades += entered
+            n_open += entered_count
+        equity[i] = final_return * pnl if n_open else final_return
+
+    return equity, final_return, winning_trades, nb_trades
+
+
+def _max_drawdown(equity):
+    return (1 - equity / np.maximum.accumulate(equity, axis=0)).max(axis=0) * 100
+
+
+def portfolio_backtest(returns, pairs):
+    """
+    Backtest every pair of `pairs` (see pair_table) on the `returns` DataFrame (one column per symbol).
+    Returns (stats, equity): one row of metrics per pair plus a 'Portfolio' row, and the mark-to-market equity curves
+    (bars x pairs, plus the equally weighted 'Portfolio' column).
+    """
+    table = pair_table(pairs)
+    spreads, long_entry, short_entry, start = portfolio_signals(returns, table)
+    equity, final_return, winning_trades, nb_trades = portfolio_kernel(
+        spreads, long_entry, short_entry, table['Exit'].to_numpy(dtype=float), table['Stop Loss'].to_numpy(dtype=float), start)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(nb_trades > 0, (winning_trades / nb_trades) * 100, 0)
+        return_per_trade = np.where(nb_trades > 0, ((final_return - 1) / nb_trades) * 100, 0)
+    stats = pd.DataFrame({
+        'Pair': table['Pair'],
+        'Final Return': (final_return - 1) * 100,
+        'Nb Trades': nb_trades,
+        'Win Rate': win_rate,
+        'Win per Trade': return_per_trade,
+        'Max Drawdown': _max_drawdown(equity),
+    })
+
+    portfolio = equity.mean(axis=1) if len(table) else np.ones(len(returns))
+    total_trades = nb_trades.sum()
+    stats.loc[len(stats)] = {
+        'Pair': 'Portfolio',
+        'Final Return': (final_return.mean() - 1) * 100 if len(table) else 0.0,
+        'Nb Trades': total_trades,
+        'Win Rate': winning_trades.sum() / total_trades * 100 if total_trades else 0,
+        'Win per Trade': (final_return.mean() - 1) / total_trades * 100 if total_trades else 0,
+        'Max Drawdown': _max_drawdown(portfolio[:, None])[0] if len(portfolio) else 0.0,
+    }
+    equity = pd.DataFrame(equity, index=returns.index, columns=table['Pair'])
+    equity['Portfolio'] = portfolio
+    return stats, equity
@@ -0,0 +1,148 @@
+"""
+Profiling instrumentation of the hot paths: data download, rolling indicators, backtest kernels and aggregation.
+
+The instrumented code times its sections with `with section(name, **tags):` or the @timed(name) decorator and counts
+work with count(name, n). Profiling is off by default, a section then costs a single flag test. It is switched on by
+enable() or by setting the MT5_PROFILE environment variable to 1.
+The sections timed in run_sweep's worker processes are sent back with the task results, so a profile covers the
+whole sweep. Sections nest (a sweep contains its kernels) and the workers' sections overlap in time.
+
+summary() aggregates the sections into a table: calls, total, mean and max time, and share of the profiled wall time.
+write_trace(path) writes every section as a JSON trace of Chrome trace events (chrome://tracing or ui.perfetto.dev).
+report() does both at the end of a script: it prints the table and the counters, and writes the trace to
+MT5_PROFILE_TRACE when that variable is set.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import wraps
+import pandas as pd
+
+
+_enabled = os.environ.get('MT5_PROFILE', '') not in ('', '0')
+_events = []
+_counters = Counter()
+_lock = threading.Lock()
+_disabled = nullcontext()
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _events.clear()
+        _counters.clear()
+
+
+class _Section:
+    __slots__ = ('name', 'tags', 'start', 'wall')
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self.start
+        event = {'name': self.name, 'ph': 'X', 'ts': self.wall * 1e6, 'dur': duration * 1e6,
+                 'pid': os.getpid(), 'tid': threading.get_ident(), 'args': self.tags}
+        with _lock:
+            _events.append(event)
+
+
+def section(name, **tags):
+    """Context manager timing the code it wraps as `name`, the tags go to the trace."""
+    return _Section(name, tags) if _enabled else _disabled
+
+
+def timed(name):
+    """Decorator timing every call of the function as `name`."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Section(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    if _enabled:
+        with _lock:
+            _counters[name] += int(n)
+
+
+def collect():
+    """Take the sections and counters recorded so far out of this process (see merge)."""
+    with _lock:
+        events, counters = list(_events), dict(_counters)
+        _events.clear()
+        _counters.clear()
+    return events, counters
+
+
+def merge(events, counters):
+    """Add the sections and counters collected in another process."""
+    with _lock:
+        _events.extend(events)
+        _counters.update(counters)
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def summary():
+    """One row per section name: calls, total (s), mean and max (ms), share (%) of the profiled wall time."""
+    with _lock:
+        events = list(_events)
+    columns = ['Section', 'Calls', 'Total (s)', 'Mean (ms)', 'Max (ms)', 'Share (%)']
+    if not events:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame({'Section': [e['name'] for e in events], 'dur': [e['dur'] / 1e6 for e in events]})
+    wall = max(e['ts'] + e['dur'] for e in events) / 1e6 - min(e['ts'] for e in events) / 1e6
+    table = frame.groupby('Section', sort=False)['dur'].agg(['count', 'sum', 'mean', 'max']).reset_index()
+    table.columns = ['Section', 'Calls', 'Total (s)', 'Mean (ms)', 'Max (ms)']
+    table[['Mean (ms)', 'Max (ms)']] *= 1000
+    table['Share (%)'] = table['Total (s)'] / wall * 100 if wall > 0 else 0.0
+    return table.sort_values('Total (s)', ascending=False, ignore_index=True)
+
+
+def write_trace(path):
+    """Write the sections as a Chrome trace (JSON object format) with the counters as metadata."""
+    with _lock:
+        trace = {'traceEvents': list(_events), 'displayTimeUnit': 'ms', 'otherData': {'counters': dict(_counters)}}
+    with open(path, 'w') as f:
+        json.dump(trace, f)
+
+
+def report(path=None):
+    """Print the summary table and the counters, write the trace to `path` (default: MT5_PROFILE_TRACE). No-op when off."""
+    if not _enabled:
+        return
+    print("\nProfile:")
+    print(summary().to_string(index=False, float_format="%.3f"))
+    for name, value in sorted(counters().items()):
+        print(f"{name}: {value}")
+    path = path or os.environ.get('MT5_PROFILE_TRACE')
+    if path:
+        write_trace(path)
+        print(f"Trace written to {path}")
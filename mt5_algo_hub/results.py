@@ -0,0 +1,250 @@
+"""
+Persistent store of the sweep results.
+
+Every backtested combination is saved in a SQLite database, keyed by a hash of
+- the dataset: its values, index and columns (dataset_key),
+- the strategy name,
+- the parameters: the combination of the grid and the fixed ones (e.g. the window of the Baseline).
+ResultStore.sweep() looks up the combinations of a grid that are already stored, only backtests the missing ones and
+saves the results of every task as soon as it is done, so an interrupted sweep resumes where it stopped and a wider
+grid only computes its new points. The returned table is the one of the *_sweep functions (which take a store= too).
+Parameter values are rounded to 12 significant digits in the key, np.arange steps of the same value always match.
+
+query() and datasets() read past sweeps back without running anything.
+The database lives in ~/.mt5_algo_hub/results.sqlite unless the MT5_RESULT_STORE environment variable points elsewhere.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from functools import partial
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.backtest import parameter_grid
+from mt5_algo_hub.profiling import section
+from mt5_algo_hub.search import METRICS
+from mt5_algo_hub.strategies import STRATEGY_NAMES, evaluate_grid, grid_features
+from mt5_algo_hub.sweep import run_sweep
+
+
+# Axes of the grid that make one task: a z-score entry level, a window pair, an exit threshold (as the *_sweep functions)
+TASK_AXES = {'zscore': (0,), 'dual_zscore': (4, 5), 'triangular': (0,)}
+# Number of keys per SQL IN (...) lookup
+_LOOKUP_SIZE = 500
+
+# A grid of a strategy on a dataset: its flattened axes, and the canonical parameters and key of every combination
+SweepPlan = namedtuple('SweepPlan', ['strategy', 'dataset', 'columns', 'grid', 'params', 'keys', 'fixed'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    dataset TEXT PRIMARY KEY,
+    columns TEXT NOT NULL,
+    first_bar TEXT,
+    last_bar TEXT,
+    n_bars INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    params TEXT NOT NULL,
+    final_return REAL,
+    nb_trades INTEGER,
+    win_rate REAL,
+    win_per_trade REAL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_sweep ON results (dataset, strategy);
+"""
+
+
+def default_path():
+    return Path(os.environ.get('MT5_RESULT_STORE') or Path.home() / '.mt5_algo_hub' / 'results.sqlite')
+
+
+def dataset_key(data):
+    """sha1 of the values, index and columns of a DataFrame."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(data.to_numpy(dtype=float)).tobytes())
+    digest.update(json.dumps([str(column) for column in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data.index, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(f"{float(value):.12g}")
+    return str(value)
+
+
+def combination_key(dataset, strategy, params):
+    """sha1 of (dataset, strategy, params), params being a {name: value} dict of canonical values."""
+    return hashlib.sha1(json.dumps([dataset, strategy, params], sort_keys=True).encode()).hexdigest()
+
+
+def sweep_units(plan, positions, size=None):
+    """
+    The combinations at `positions` grouped like the tasks of the strategy's sweep (see TASK_AXES),
+    groups larger than `size` combinations are cut. Returns one array of positions per unit.
+    """
+    axes = TASK_AXES[plan.strategy]
+    groups = {}
+    for position in positions.tolist():
+        groups.setdefault(tuple(plan.grid[axis][position] for axis in axes), []).append(position)
+    units = [np.array(rows) for rows in groups.values()]
+    if size:
+        units = [unit[a:a + size] for unit in units for a in range(0, len(unit), size)]
+    return units
+
+
+def _evaluate_combinations(features, rows, strategy, grid, fixed):
+    return evaluate_grid(features, strategy, [axis[rows] for axis in grid], fixed=fixed)
+
+
+def sweep_table(plan, metrics):
+    """The sweep table of a plan from its (combinations x METRICS) array, in grid order."""
+    with section('aggregate'):
+        table = pd.DataFrame(dict(zip(plan.columns, plan.grid)))
+        for column, metric in zip(METRICS, metrics.T):
+            table[column] = metric
+        table['Nb Trades'] = table['Nb Trades'].astype(np.int64)
+    return table
+
+
+class ResultStore:
+    def __init__(self, path=None):
+        self.path = Path(path) if path is not None else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=60)
+        # WAL keeps the database readable while a sweep writes and survives a crash mid-transaction
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def register(self, data):
+        """Record the dataset's description and return its key."""
+        dataset = dataset_key(data)
+        first, last = (str(data.index[0]), str(data.index[-1])) if len(data) else (None, None)
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO datasets VALUES (?, ?, ?, ?, ?, ?)',
+                (dataset, json.dumps([str(column) for column in data.columns]), first, last, len(data), time.time()))
+        return dataset
+
+    def lookup(self, keys):
+        """{key: (final_return, nb_trades, win_rate, win_per_trade)} of the keys already stored."""
+        found = {}
+        for a in range(0, len(keys), _LOOKUP_SIZE):
+            chunk = keys[a:a + _LOOKUP_SIZE]
+            rows = self.connection.execute(
+                f"SELECT key, final_return, nb_trades, win_rate, win_per_trade FROM results "
+                f"WHERE key IN ({', '.join('?' * len(chunk))})", chunk)
+            found.update((key, metrics) for key, *metrics in rows)
+        return found
+
+    def save(self, dataset, strategy, keys, params, metrics):
+        """Store one result per key, metrics being the (final_return, win_rate, return_per_trade, nb_trades) arrays."""
+        final_return, win_rate, return_per_trade, nb_trades = metrics
+        now = time.time()
+        rows = [(key, dataset, strategy, json.dumps(p, sort_keys=True), float(f), int(n), float(w), float(r), now)
+                for key, p, f, w, r, n in zip(keys, params, final_return, win_rate, return_per_trade, nb_trades)]
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def plan(self, strategy, data, space, fixed=None):
+        """SweepPlan of the grid `space` ({column: values}, in the order of the strategy's parameters) on `data`."""
+        if strategy not in STRATEGY_NAMES:
+            raise ValueError(f"[ERROR] Unknown strategy '{strategy}', expected one of {', '.join(STRATEGY_NAMES)}")
+        columns = list(space)
+        grid = parameter_grid(*space.values())
+        constants = {name: _canonical(value) for name, value in (fixed or {}).items()}
+        dataset = self.register(data)
+        params = [dict(zip(columns, map(_canonical, combination)), **constants) for combination in zip(*grid)]
+        keys = [combination_key(dataset, strategy, p) for p in params]
+        return SweepPlan(strategy, dataset, columns, grid, params, keys, fixed)
+
+    def stored_metrics(self, plan):
+        """(combinations x METRICS) array of the plan's stored results (NaN rows for the others), and the missing positions."""
+        found = self.lookup(plan.keys)
+        metrics = np.array([found.get(key, (np.nan,) * 4) for key in plan.keys], dtype=float).reshape(len(plan.keys), 4)
+        missing = np.array([i for i, key in enumerate(plan.keys) if key not in found], dtype=np.int64)
+        return metrics, missing
+
+    def save_rows(self, plan, rows, result):
+        """Store the result (metric arrays) of the plan's combinations at positions `rows`."""
+        self.save(plan.dataset, plan.strategy, [plan.keys[r] for r in rows], [plan.params[r] for r in rows], result)
+
+    def sweep(self, strategy, data, space, fixed=None, workers=None):
+        """
+        Results table of the grid `space` ({column: values}, in the order of the strategy's parameters, as for
+        adaptive_search), in grid order, only backtesting the combinations that are not stored yet.
+        """
+        plan = self.plan(strategy, data, space, fixed)
+        metrics, missing = self.stored_metrics(plan)
+        if len(missing):
+            print(f"{len(plan.keys) - len(missing)} of {len(plan.keys)} combinations already stored, backtesting {len(missing)}")
+            tasks = sweep_units(plan, missing)
+
+            def store_task(i, result):
+                rows = tasks[i]
+                self.save_rows(plan, rows, result)
+                final_return, win_rate, return_per_trade, nb_trades = result
+                metrics[rows] = np.column_stack((final_return, nb_trades, win_rate, return_per_trade))
+
+            features = grid_features(strategy, data, space, fixed)
+            evaluate = partial(_evaluate_combinations, strategy=strategy, grid=plan.grid, fixed=fixed)
+            run_sweep(evaluate, features, tasks, workers, desc="Optimizing", on_result=store_task)
+        return sweep_table(plan, metrics)
+
+    def datasets(self):
+        """The stored datasets with their number of results per strategy."""
+        return pd.read_sql_query(
+            "SELECT d.dataset, d.columns, d.first_bar, d.last_bar, d.n_bars, r.strategy, COUNT(r.key) AS results "
+            "FROM datasets d LEFT JOIN results r ON r.dataset = d.dataset "
+            "GROUP BY d.dataset, r.strategy ORDER BY d.created", self.connection)
+
+    def query(self, strategy=None, data=None, dataset=None):
+        """
+        Stored results as a sweep table (one column per parameter, then the metrics), optionally only those of
+        `strategy` and of a dataset given as a DataFrame (`data`) or a key (`dataset`).
+        """
+        if data is not None:
+            dataset = dataset_key(data)
+        conditions, values = [], []
+        if strategy is not None:
+            conditions.append('strategy = ?')
+            values.append(strategy)
+        if dataset is not None:
+            conditions.append('dataset = ?')
+            values.append(dataset)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self.connection.execute(
+            f"SELECT dataset, strategy, params, final_return, nb_trades, win_rate, win_per_trade FROM results{where} "
+            f"ORDER BY rowid", values).fetchall()
+
+        params = pd.DataFrame([json.loads(row[2]) for row in rows])
+        metrics = pd.DataFrame([row[3:] for row in rows], columns=METRICS)
+        table = pd.concat([params, metrics], axis=1)
+        if strategy is None:
+            table.insert(0, 'Strategy', [row[1] for row in rows])
+        if dataset is None:
+            table.insert(0, 'Dataset', [row[0] for row in rows])
+        return table
@@ -0,0 +1,89 @@
+"""
+Cointegration screener over every pair of a symbol universe.
+
+The closes are prepared once per symbol (means, centered series, one Gram matrix), which gives the correlation of
+every pair and the Engle-Granger hedge ratio of every pair for the cost of a single matrix product. Only the pairs
+whose correlation passes the prefilter are tested, in parallel with run_sweep: Engle-Granger on the OLS residuals and
+ADF on the naive difference and ratio spreads, with the batched NumPy tests of unitroot (statsmodels' coint/adfuller
+results), one call per chunk of pairs.
+"""
+
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.sweep import default_workers, run_sweep
+from mt5_algo_hub.unitroot import adf_batch, engle_granger_batch
+
+
+COLUMNS = ['Symbol 1', 'Symbol 2', 'Correlation', 'Hedge Ratio', 'Intercept', 'EG Stat', 'EG p-value',
+           'Diff p-value', 'Ratio p-value', 'ADF 1 p-value', 'ADF 2 p-value']
+
+
+def pair_statistics(closes):
+    """Correlation matrix, hedge ratios beta[i, j] and intercepts alpha[i, j] of the OLS of symbol i on symbol j."""
+    values = closes.to_numpy(dtype=float)
+    means = values.mean(axis=0)
+    centered = values - means
+    gram = centered.T @ centered
+    variances = np.diag(gram)
+    correlation = gram / np.sqrt(np.outer(variances, variances))
+    beta = gram / variances[None, :]
+    alpha = means[:, None] - beta * means[None, :]
+    return correlation, beta, alpha
+
+
+def candidate_pairs(correlation, min_correlation=0.8):
+    """(i, j) with i < j whose absolute correlation is at least min_correlation."""
+    i, j = np.triu_indices(len(correlation), k=1)
+    keep = np.abs(correlation[i, j]) >= min_correlation
+    return list(zip(i[keep].tolist(), j[keep].tolist()))
+
+
+def _test_pairs(data, task):
+    # One chunk of pairs (i, j, beta, alpha, r_squared) tested together on the shared closes
+    pairs, maxlag, autolag, spreads = task
+    values = data.to_numpy().T
+    i, j, beta, alpha, r_squared = (np.array(column) for column in zip(*pairs))
+    Y0, Y1 = values[i.astype(int)], values[j.astype(int)]
+    columns = list(engle_granger_batch(Y0, Y1, beta, alpha, r_squared, maxlag, autolag))
+    if spreads:
+        columns += [adf_batch(Y0 - Y1, maxlag, 'c', autolag)[1], adf_batch(Y0 / Y1, maxlag, 'c', autolag)[1]]
+    return np.column_stack(columns)
+
+
+def screen_pairs(closes, min_correlation=0.8, maxlag=None, autolag='aic', spreads=True, workers=None, chunk_size=None):
+    """
+    Test every pair of columns of `closes` (aligned closes, one column per symbol) passing the correlation prefilter.
+    Returns one row per tested pair (the first symbol regressed on the second, in column order), most cointegrated first.
+    spreads=False skips the ADF of the difference and ratio spreads.
+    """
+    closes = closes.dropna().astype(float)
+    symbols = list(closes.columns)
+    correlation, beta, alpha = pair_statistics(closes)
+    pairs = candidate_pairs(correlation, min_correlation)
+    if not pairs:
+        return pd.DataFrame(columns=COLUMNS)
+
+    # Unit root of every symbol once, shared by all its pairs
+    symbol_p_values = adf_batch(closes, maxlag, 'c', autolag)[1]
+
+    workers = workers or default_workers()
+    chunk_size = chunk_size or max(1, min(50, -(-len(pairs) // (4 * workers))))
+    rows = [(i, j, beta[i, j], alpha[i, j], correlation[i, j] ** 2) for i, j in pairs]
+    tasks = [(rows[a:a + chunk_size], maxlag, autolag, spreads) for a in range(0, len(rows), chunk_size)]
+    results = np.concatenate(run_sweep(_test_pairs, closes, tasks, workers, desc="Screening pairs"))
+
+    table = pd.DataFrame({
+        'Symbol 1': [symbols[i] for i, _ in pairs],
+        'Symbol 2': [symbols[j] for _, j in pairs],
+        'Correlation': [correlation[i, j] for i, j in pairs],
+        'Hedge Ratio': [beta[i, j] for i, j in pairs],
+        'Intercept': [alpha[i, j] for i, j in pairs],
+        'EG Stat': results[:, 0],
+        'EG p-value': results[:, 1],
+        'Diff p-value': results[:, 2] if spreads else np.nan,
+        'Ratio p-value': results[:, 3] if spreads else np.nan,
+        'ADF 1 p-value': [symbol_p_values[i] for i, _ in pairs],
+        'ADF 2 p-value': [symbol_p_values[j] for _, j in pairs],
+    }, columns=COLUMNS)
+    return table.sort_values(['EG p-value', 'EG Stat'], kind='stable').reset_index(drop=True)
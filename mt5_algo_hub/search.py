@@ -0,0 +1,176 @@
+"""
+Adaptive parameter search, an alternative to the exhaustive grids of the optimization() functions.
+
+The search space is the same as a grid (one array of values per parameter) but only part of it is evaluated:
+- 'halving':  successive halving. Random candidates are backtested on the most recent bars, the best 1/eta
+              are kept and backtested again on eta times more bars, until the survivors run on the full history.
+- 'adaptive': candidates are evaluated on the full history in rounds, each round samples half of its candidates
+              next to the current leaders (one grid step away on one or more axes) and half at random.
+
+The budget is expressed in full-length backtests: a backtest on a third of the bars costs a third.
+Both return the results of the full-length backtests as the same table as the grid sweeps,
+so the scripts can filter, sort and print their top 10 unchanged.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from functools import partial
+
+from mt5_algo_hub.basket import BasketRanking
+from mt5_algo_hub.indicators import RollingStats
+from mt5_algo_hub.profiling import section
+from mt5_algo_hub.strategies import dual_zscore_algo, pair_spread, triangular_algo, zscore_algo
+from mt5_algo_hub.sweep import default_workers, run_sweep
+
+
+METRICS = ['Final Return', 'Nb Trades', 'Win Rate', 'Win per Trade']
+
+
+def _pair_stats(df):
+    return {'stats': RollingStats(pair_spread(df))}
+
+
+def _basket_ranking(df):
+    return {'ranking': BasketRanking(df.to_numpy(dtype=float))}
+
+
+# strategy -> (algo, shared state built once per data slice)
+STRATEGIES = {
+    'zscore': (zscore_algo, _pair_stats),
+    'dual_zscore': (dual_zscore_algo, _pair_stats),
+    'triangular': (triangular_algo, _basket_ranking),
+}
+
+
+def _evaluate_candidates(data, task, strategy, fixed):
+    candidates, n_bars = task
+    algo, prepare = STRATEGIES[strategy]
+    df = data.iloc[-n_bars:]
+    shared = prepare(df)
+    return [algo(df, *params, **fixed, **shared) for params in candidates]
+
+
+class Search:
+    """Evaluates candidates (tuples of grid indices) of a strategy and keeps the full-length results."""
+
+    def __init__(self, strategy, data, space, fixed=None, workers=1, seed=0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"[ERROR] Unknown strategy '{strategy}', expected one of {', '.join(STRATEGIES)}")
+        self.data = data
+        self.columns = list(space)
+        self.axes = [np.asarray(values) for values in space.values()]
+        self.shape = tuple(len(values) for values in self.axes)
+        self.size = math.prod(self.shape)
+        self.evaluate = partial(_evaluate_candidates, strategy=strategy, fixed=fixed or {})
+        self.workers = workers
+        self.rng = np.random.default_rng(seed)
+        self.seen = set()
+        self.rows = []
+        self.cost = 0.0
+
+    def sample(self, n):
+        """Up to n candidates never drawn before, the whole space once n covers it."""
+        n = min(n, self.size - len(self.seen))
+        if self.size <= 4 * n:
+            remaining = [index for index in np.ndindex(self.shape) if index not in self.seen]
+            picks = [remaining[i] for i in self.rng.choice(len(remaining), n, replace=False)]
+        else:
+            picks = []
+            while len(picks) < n:
+                index = tuple(int(self.rng.integers(size)) for size in self.shape)
+                if index not in self.seen and index not in picks:
+                    picks.append(index)
+        self.seen.update(picks)
+        return picks
+
+    def neighbours(self, index, n):
+        picks = []
+        for _ in range(4 * n):
+            step = self.rng.integers(-1, 2, len(self.shape))
+            candidate = tuple(int(min(max(i + s, 0), size - 1)) for i, s, size in zip(index, step, self.shape))
+            if candidate not in self.seen and candidate not in picks:
+                picks.append(candidate)
+                if len(picks) == n:
+                    break
+        self.seen.update(picks)
+        return picks
+
+    def run(self, indices, n_bars=None):
+        """Backtest the candidates on the last n_bars (all bars by default) and return their results table."""
+        n_bars = n_bars or len(self.data)
+        candidates = [tuple(axis[i].item() for axis, i in zip(self.axes, index)) for index in indices]
+        n_tasks = min(len(candidates), 4 * (self.workers or default_workers())) if self.workers != 1 else 1
+        bounds = np.linspace(0, len(candidates), n_tasks + 1).astype(int)
+        tasks = [(candidates[a:b], n_bars) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        metrics = [row for rows in run_sweep(self.evaluate, self.data, tasks, self.workers, desc="Searching") for row in rows]
+
+        self.cost += len(candidates) * n_bars / len(self.data)
+        with section('aggregate'):
+            results = pd.DataFrame(candidates, columns=self.columns)
+            final_return, win_rate, return_per_trade, nb_trades = zip(*metrics) if metrics else ([], [], [], [])
+            results['Final Return'] = final_return
+            results['Nb Trades'] = nb_trades
+            results['Win Rate'] = win_rate
+            results['Win per Trade'] = return_per_trade
+            results['_index'] = indices
+        if n_bars == len(self.data):
+            self.rows.append(results)
+        return results
+
+    def results(self):
+        if not self.rows:
+            return pd.DataFrame(columns=self.columns + METRICS)
+        return pd.concat(self.rows, ignore_index=True).drop(columns='_index')
+
+
+def rank(results, sort_by, min_trades):
+    # Candidates with too few trades for the slice go to the bottom, whatever their score
+    eligible = results['Nb Trades'] > min_trades
+    return results.assign(_eligible=eligible).sort_values(['_eligible', sort_by], ascending=False, kind='stable')
+
+
+def successive_halving(search, budget, sort_by='Final Return', min_trades=10, eta=3, min_bars=500):
+    n = len(search.data)
+    rungs = max(1, int(math.log(max(n / min_bars, 1), eta)) + 1)
+    # Every rung costs n0 * eta^-(rungs - 1) full backtests, so the budget buys that many first-rung candidates
+    n0 = max(1, int(budget * eta ** (rungs - 1) / rungs))
+    indices = search.sample(n0)
+
+    for rung in range(rungs):
+        n_bars = max(int(n / eta ** (rungs - 1 - rung)), 1)
+        results = search.run(indices, n_bars)
+        if rung < rungs - 1:
+            keep = max(1, math.ceil(len(indices) / eta))
+            ranked = rank(results, sort_by, min_trades * n_bars / n)
+            indices = list(ranked['_index'].iloc[:keep])
+    return search.results()
+
+
+def adaptive_sampling(search, budget, sort_by='Final Return', min_trades=10, rounds=5, leaders=5):
+    batch = max(1, int(budget) // rounds)
+    search.run(search.sample(batch))
+    while search.cost + 1 <= budget and len(search.seen) < search.size:
+        n = int(min(batch, budget - search.cost))
+        best = rank(pd.concat(search.rows, ignore_index=True), sort_by, min_trades)['_index'].iloc[:leaders]
+        indices = []
+        for index in best:
+            indices += search.neighbours(index, n // (2 * leaders))
+        indices += search.sample(n - len(indices))
+        if not indices:
+            break
+        search.run(indices)
+    return search.results()
+
+
+def adaptive_search(strategy, data, space, budget, method='halving', fixed=None, sort_by='Final Return', min_trades=10, workers=1, seed=0):
+    """
+    Search `space` ({column: values}, in the order of the strategy's parameters) under `budget` full-length backtests.
+    `fixed` holds keyword parameters that are not searched (e.g. {'window': 50} for the zscore strategy).
+    """
+    search = Search(strategy, data, space, fixed, workers, seed)
+    if method == 'halving':
+        return successive_halving(search, budget, sort_by, min_trades)
+    if method == 'adaptive':
+        return adaptive_sampling(search, budget, sort_by, min_trades)
+    raise ValueError(f"[ERROR] Unknown search method '{method}', expected 'halving' or 'adaptive'")
@@ -0,0 +1,324 @@
+"""
+Data sources standing in for the MetaTrader5 module.
+
+A source exposes the same calls the scripts use on the MetaTrader5 module (initialize, symbol_select,
+copy_rates_from/range, copy_ticks_from/range, market_book_add/get/release, the TIMEFRAME_* and BOOK_TYPE_* constants...)
+and returns the same structured arrays, so a script only has to replace `import MetaTrader5 as mt5` by `mt5 = get_source()`.
+
+- LiveSource:      the MetaTrader5 terminal itself (Windows only), imported on first use
+- ReplaySource:    recorded rates, ticks and book snapshots read from local .npy files
+- SyntheticSource: generated cointegrated series for any symbol, reproducible from a seed
+
+get_source() picks the backend from the MT5_SOURCE environment variable: 'mt5' (default), 'replay:<directory>'
+or 'synthetic[:seed]', which lets the optimization and stationarity scripts run headless on Linux.
+"""
+
+import os
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+from scipy.signal import lfilter
+
+from mt5_algo_hub.data import BarStore
+
+
+RATES_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+                        ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')])
+TICKS_DTYPE = np.dtype([('time', '<i8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('volume', '<u8'),
+                        ('time_msc', '<i8'), ('flags', '<u4'), ('volume_real', '<f8')])
+# One row per book level, the levels of a snapshot share the same time_msc
+BOOK_DTYPE = np.dtype([('time_msc', '<i8'), ('type', '<i4'), ('price', '<f8'), ('volume', '<u8'), ('volume_dbl', '<f8')])
+
+BookInfo = namedtuple('BookInfo', ['type', 'price', 'volume', 'volume_dbl'])
+
+
+class Constants:
+    TIMEFRAME_M1, TIMEFRAME_M2, TIMEFRAME_M3, TIMEFRAME_M4, TIMEFRAME_M5, TIMEFRAME_M6 = 1, 2, 3, 4, 5, 6
+    TIMEFRAME_M10, TIMEFRAME_M12, TIMEFRAME_M15, TIMEFRAME_M20, TIMEFRAME_M30 = 10, 12, 15, 20, 30
+    TIMEFRAME_H1, TIMEFRAME_H2, TIMEFRAME_H3, TIMEFRAME_H4 = 16385, 16386, 16387, 16388
+    TIMEFRAME_H6, TIMEFRAME_H8, TIMEFRAME_H12 = 16390, 16392, 16396
+    TIMEFRAME_D1, TIMEFRAME_W1, TIMEFRAME_MN1 = 16408, 32769, 49153
+
+    BOOK_TYPE_SELL, BOOK_TYPE_BUY, BOOK_TYPE_SELL_MARKET, BOOK_TYPE_BUY_MARKET = 1, 2, 3, 4
+
+    COPY_TICKS_ALL, COPY_TICKS_INFO, COPY_TICKS_TRADE = -1, 1, 2
+    TICK_FLAG_BID, TICK_FLAG_ASK = 2, 4
+
+
+def timeframe_seconds(timeframe):
+    if timeframe < 16384:
+        return timeframe * 60
+    if timeframe < 32768:
+        return (timeframe - 16384) * 3600
+    return 7 * 86400 if timeframe == Constants.TIMEFRAME_W1 else 30 * 86400
+
+
+def _seconds(date):
+    if isinstance(date, datetime):
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return date.timestamp()
+    return float(date)
+
+
+class LiveSource:
+    """Proxy to the MetaTrader5 module, only imported when a call or a constant is first needed."""
+    cacheable = True
+
+    def __getattr__(self, name):
+        import MetaTrader5
+        return getattr(MetaTrader5, name)
+
+
+class ReplaySource(Constants):
+    """
+    Serves recorded data from a directory laid out as:
+        <root>/bars/<symbol>_<timeframe>.npy    rates (same files as the BarStore, so a bar cache can be replayed directly)
+        <root>/ticks/<symbol>.npy               ticks
+        <root>/book/<symbol>.npy                book levels, grouped in snapshots by time_msc
+        <root>/book/<symbol>/                   or the chunks of a DepthRecorder recording
+    market_book_get walks through the recorded snapshots, one per call, and returns None once they are exhausted.
+    """
+    cacheable = False
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root is not None else None
+        self.bars = BarStore(self.root / 'bars') if self.root is not None else None
+        self._rates = {}
+        self._ticks = {}
+        self._books = {}
+        self._book_cursor = {}
+        self._error = (1, 'Success')
+
+    # ----- Loading -----
+    def _load(self, folder, name):
+        if self.root is None:
+            return None
+        path = self.root / folder / f"{name}.npy"
+        return np.load(path, mmap_mode='r') if path.exists() else None
+
+    def rates(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key not in self._rates:
+            self._rates[key] = self.bars.load(symbol, timeframe) if self.bars is not None else None
+        return self._rates[key]
+
+    def ticks(self, symbol):
+        if symbol not in self._ticks:
+            self._ticks[symbol] = self._load('ticks', symbol)
+        return self._ticks[symbol]
+
+    def book(self, symbol):
+        if symbol not in self._books:
+            folder = self.root / 'book' / symbol if self.root is not None else None
+            if folder is not None and folder.is_dir():
+                # chunks written by the DepthRecorder
+                from mt5_algo_hub.depth import read_book
+                self._books[symbol] = read_book(folder)
+            else:
+                self._books[symbol] = self._load('book', symbol)
+        return self._books[symbol]
+
+    def _fail(self, message):
+        self._error = (-1, message)
+        return None
+
+    # ----- MetaTrader5 API -----
+    def initialize(self, *args, **kwargs):
+        return True
+
+    def login(self, *args, **kwargs):
+        return True
+
+    def shutdown(self):
+        return None
+
+    def last_error(self):
+        return self._error
+
+    def symbol_select(self, symbol, enable=True):
+        known = self.root is not None and any((self.root / 'bars').glob(f"{symbol}_*.npy"))
+        if known or self.ticks(symbol) is not None or self.book(symbol) is not None:
+            return True
+        self._fail(f"Unknown symbol {symbol}")
+        return False
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        rates = self.rates(symbol, timeframe)
+        if rates is None:
+            return self._fail(f"No rates recorded for {symbol}")
+        end = np.searchsorted(rates['time'], _seconds(date_from), side='right')
+        return np.array(rates[max(end - count, 0):end])
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        rates = self.rates(symbol, timeframe)
+        if rates is None:
+            return self._fail(f"No rates recorded for {symbol}")
+        end = len(rates) - start_pos
+        return np.array(rates[max(end - count, 0):max(end, 0)])
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        rates = self.rates(symbol, timeframe)
+        if rates is None:
+            return self._fail(f"No rates recorded for {symbol}")
+        start = np.searchsorted(rates['time'], _seconds(date_from), side='left')
+        end = np.searchsorted(rates['time'], _seconds(date_to), side='right')
+        return np.array(rates[start:end])
+
+    def copy_ticks_from(self, symbol, date_from, count, flags=-1):
+        ticks = self.ticks(symbol)
+        if ticks is None:
+            return self._fail(f"No ticks recorded for {symbol}")
+        start = np.searchsorted(ticks['time_msc'], int(_seconds(date_from) * 1000), side='left')
+        return np.array(ticks[start:start + count])
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=-1):
+        ticks = self.ticks(symbol)
+        if ticks is None:
+            return self._fail(f"No ticks recorded for {symbol}")
+        start = np.searchsorted(ticks['time_msc'], int(_seconds(date_from) * 1000), side='left')
+        end = np.searchsorted(ticks['time_msc'], int(_seconds(date_to) * 1000), side='right')
+        return np.array(ticks[start:end])
+
+    def market_book_add(self, symbol):
+        if self.book(symbol) is None:
+            self._fail(f"No book recorded for {symbol}")
+            return False
+        self._book_cursor.setdefault(symbol, 0)
+        return True
+
+    def market_book_get(self, symbol):
+        book = self.book(symbol)
+        if book is None or symbol not in self._book_cursor:
+            return self._fail(f"Market book not subscribed for {symbol}")
+        start = self._book_cursor[symbol]
+        if start >= len(book):
+            return None
+        end = np.searchsorted(book['time_msc'], book['time_msc'][start], side='right')
+        self._book_cursor[symbol] = end
+        return tuple(BookInfo(int(row['type']), float(row['price']), int(row['volume']), float(row['volume_dbl'])) for row in book[start:end])
+
+    def market_book_release(self, symbol):
+        return self._book_cursor.pop(symbol, None) is not None
+
+
+# ----- Synthetic data -----
+
+def cointegrated_rates(symbols, timeframe, n_bars, seed=0, end=datetime(2025, 1, 3, tzinfo=timezone.utc), volatility=0.01):
+    """
+    Bars for every symbol, all driven by one common random walk so any pair is cointegrated:
+        log(price_i) = log(base_i) + beta_i * common + noise_i,    noise_i an AR(1) with coefficient 0.98
+    The common walk depends on (seed, timeframe), the symbol part on (seed, symbol), so a symbol always gets the same series.
+    """
+    step = timeframe_seconds(timeframe)
+    scale = volatility * np.sqrt(step / 86400)
+    last = int(end.timestamp()) // step * step
+    times = last - step * np.arange(n_bars - 1, -1, -1, dtype=np.int64)
+    common = np.cumsum(np.random.default_rng([seed, timeframe]).normal(0, scale, n_bars))
+
+    rates = {}
+    for symbol in symbols:
+        rng = np.random.default_rng([seed, timeframe, zlib.crc32(symbol.encode())])
+        base = 100 + zlib.crc32(symbol.encode()) % 40000
+        beta = rng.uniform(0.8, 1.2)
+        shocks = rng.normal(0, scale / 2, n_bars)
+        # noise[i] = 0.98 * noise[i - 1] + shocks[i], as one IIR filter pass instead of a loop over the bars
+        noise = lfilter([1.0], [1.0, -0.98], shocks)
+        close = base * np.exp(beta * common + noise)
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        wick = np.abs(rng.normal(0, scale / 2, (2, n_bars))) * close
+
+        bars = np.zeros(n_bars, dtype=RATES_DTYPE)
+        bars['time'] = times
+        bars['open'] = open_
+        bars['close'] = close
+        bars['high'] = np.maximum(open_, close) + wick[0]
+        bars['low'] = np.minimum(open_, close) - wick[1]
+        bars['tick_volume'] = rng.integers(50, 5000, n_bars)
+        bars['spread'] = rng.integers(1, 6, n_bars)
+        rates[symbol] = bars
+    return rates
+
+
+def ticks_from_rates(rates, point=0.01, ticks_per_bar=4):
+    """Ticks walking open -> high/low -> close inside every bar, the ask is bid + spread * point."""
+    step = int(rates['time'][1] - rates['time'][0]) if len(rates) > 1 else 60
+    up = rates['close'] >= rates['open']
+    path = np.stack([rates['open'], np.where(up, rates['low'], rates['high']), np.where(up, rates['high'], rates['low']), rates['close']], axis=1)
+    path = path[:, np.linspace(0, 3, ticks_per_bar).round().astype(int)]
+    offsets = (np.arange(ticks_per_bar) * step * 1000 // ticks_per_bar).astype(np.int64)
+
+    ticks = np.zeros(path.size, dtype=TICKS_DTYPE)
+    ticks['time_msc'] = (rates['time'][:, None] * 1000 + offsets).ravel()
+    ticks['time'] = ticks['time_msc'] // 1000
+    ticks['bid'] = path.ravel()
+    ticks['ask'] = ticks['bid'] + np.repeat(rates['spread'], ticks_per_bar) * point
+    ticks['volume'] = 1
+    ticks['flags'] = Constants.TICK_FLAG_BID | Constants.TICK_FLAG_ASK
+    return ticks
+
+
+def book_from_price(price, time_msc, levels=10, tick=0.01, seed=0):
+    rng = np.random.default_rng([seed, int(time_msc)])
+    book = np.zeros(2 * levels, dtype=BOOK_DTYPE)
+    book['time_msc'] = time_msc
+    book['type'][:levels] = Constants.BOOK_TYPE_SELL
+    book['type'][levels:] = Constants.BOOK_TYPE_BUY
+    distance = np.arange(1, levels + 1) * tick
+    book['price'][:levels] = (price + distance)[::-1]
+    book['price'][levels:] = price - distance
+    book['volume'] = rng.integers(1, 100, 2 * levels)
+    book['volume_dbl'] = book['volume']
+    return book
+
+
+class SyntheticSource(ReplaySource):
+    """Replay source generating cointegrated bars (and ticks/book derived from them) for whatever symbol is asked."""
+
+    def __init__(self, seed=0, n_bars=50000, end=datetime(2025, 1, 3, tzinfo=timezone.utc), volatility=0.01):
+        super().__init__()
+        self.seed = seed
+        self.n_bars = n_bars
+        self.end = end
+        self.volatility = volatility
+
+    def symbol_select(self, symbol, enable=True):
+        return bool(symbol)
+
+    def rates(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key not in self._rates:
+            self._rates[key] = cointegrated_rates([symbol], timeframe, self.n_bars, self.seed, self.end, self.volatility)[symbol]
+        return self._rates[key]
+
+    def ticks(self, symbol):
+        if symbol not in self._ticks:
+            self._ticks[symbol] = ticks_from_rates(self.rates(symbol, self.TIMEFRAME_M1))
+        return self._ticks[symbol]
+
+    def book(self, symbol):
+        if symbol not in self._books:
+            rates = self.rates(symbol, self.TIMEFRAME_M1)[-1000:]
+            self._books[symbol] = np.concatenate([book_from_price(bar['close'], bar['time'] * 1000, seed=self.seed) for bar in rates])
+        return self._books[symbol]
+
+
+_sources = {}
+
+
+def get_source(spec=None):
+    """The data source named by spec (or MT5_SOURCE): 'mt5', 'replay:<directory>' or 'synthetic[:seed]'. Sources are shared per spec."""
+    spec = spec or os.environ.get('MT5_SOURCE') or 'mt5'
+    if spec not in _sources:
+        kind, _, arg = spec.partition(':')
+        if kind == 'mt5':
+            _sources[spec] = LiveSource()
+        elif kind == 'replay':
+            _sources[spec] = ReplaySource(arg)
+        elif kind == 'synthetic':
+            _sources[spec] = SyntheticSource(seed=int(arg or 0))
+        else:
+            raise ValueError(f"[ERROR] Unknown data source '{spec}', expected mt5, replay:<directory> or synthetic[:seed]")
+    return _sources[spec]
@@ -0,0 +1,296 @@
+"""
+The strategies of the 'pair trading' scripts and their parameter sweeps.
+
+- zscore:      Baseline Script, one rolling z-score of the spread
+- dual_zscore: Dual Z-Score Entry, a near and a far z-score must both cross their threshold
+- triangular:  Triangular Divergence Approach, long the weakest / short the strongest of three assets (or N, see basket.py)
+
+The spread is always the first column of the returns DataFrame minus the second one.
+zscore_algo and dual_zscore_algo take an optional regime mask, entries are only taken where it is True: a bool Series
+is aligned on the index of the returns (e.g. rolling_cointegration() of the prices, one bar longer), an array must
+have one value per bar of the returns.
+The *_sweep functions return the full, unfiltered results table of the scripts' optimization(), with a ResultStore
+(results.py) as store= they only backtest the combinations it does not hold yet. With a TopK (topk.py) as top= the
+results of every task go through its filters and heap as they arrive and only its table is returned: the full table,
+and the flattened grid, are never built (unless the store builds them).
+The *_grid functions backtest flattened parameter combinations on a slice of bars from indicators of the whole history.
+grid_features/evaluate_grid do it for any strategy from one frame of indicators, for the walk-forward folds
+(walkforward.py) and the stored sweeps (results.py). zscore_sweep and dual_zscore_sweep also hand that frame to the
+workers, so the z-scores are computed once per sweep and not once per task.
+"""
+
+from functools import partial
+from itertools import product
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.backtest import backtest_kernel, batch_backtest, entry_signals, parameter_grid
+from mt5_algo_hub.basket import BasketRanking, basket_divergence_algo, basket_kernel
+from mt5_algo_hub.indicators import RollingStats
+from mt5_algo_hub.profiling import section
+from mt5_algo_hub.sweep import run_sweep, split_grid
+
+
+def pair_spread(df):
+    return df.iloc[:, 0] - df.iloc[:, 1]
+
+
+# ----- Baseline -----
+
+def apply_regime(long_entry, short_entry, regime, index=None):
+    """
+    Keep only the entries on bars where the regime filter (e.g. rolling_cointegration()['cointegrated']) is True.
+    A Series is aligned on `index`, the bars of the entries, the bars it does not cover get no entry.
+    """
+    if regime is None:
+        return long_entry, short_entry
+    if isinstance(regime, pd.Series) and index is not None:
+        regime = regime.reindex(index, fill_value=False)
+    regime = np.asarray(regime, dtype=bool)
+    if len(regime) != len(long_entry):
+        raise ValueError(f"[ERROR] The regime filter has {len(regime)} bars, the returns {len(long_entry)}: pass it as a Series indexed like them")
+    return long_entry & regime, short_entry & regime
+
+
+def zscore_algo(df, threshold_entry, threshold_exit, stop_loss, window, stats=None, regime=None):
+    if stats is None:
+        stats = RollingStats(pair_spread(df))
+    long_entry, short_entry = apply_regime(*entry_signals(stats.zscore(window), threshold_entry), regime, df.index)
+    return backtest_kernel(stats.values, long_entry, short_entry, threshold_exit, stop_loss, start=window)
+
+
+def zscore_grid(spread, z_score, window, z, exit, sl, bars=slice(None)):
+    """
+    Metrics of every (z, exit, sl) combination, backtested on the bars of `bars` only.
+    spread and z_score cover the whole history, a slice starting after the window is already warmed up.
+    """
+    start, stop, _ = bars.indices(len(spread))
+    z_levels, signal_index = np.unique(z, return_inverse=True)
+    long_entry, short_entry = entry_signals(z_score[start:stop], z_levels[:, None])
+    return batch_backtest(spread[start:stop], long_entry, short_entry, exit, sl, max(window - start, 0), signal_index)
+
+
+def _evaluate_zscore(features, task, window):
+    # features: the grid_features frame shared with the workers, the z-score is computed once for every task
+    z, exit, sl = task
+    return zscore_grid(features['spread'].to_numpy(), features[f'z:{window}'].to_numpy(), window, z, exit, sl)
+
+
+def zscore_sweep(data, z_entry, exit_rate, stoploss_rate, window=50, workers=None, store=None, top=None):
+    space = {'Entry - z': z_entry, 'Exit Threshold': exit_rate, 'Stop Loss': stoploss_rate}
+    if store is not None:
+        return _ranked(store.sweep('zscore', data, space, fixed={'window': window}, workers=workers), top)
+    features = grid_features('zscore', data, space, fixed={'window': window})
+    if top is not None:
+        # The tasks of split_grid below, one entry level each, built one at a time
+        tasks = [tuple(parameter_grid([z], exit_rate, stoploss_rate)) for z in z_entry]
+        size = len(exit_rate) * len(stoploss_rate)
+        batch = lambda i, result: (_zscore_table(*tasks[i], [result]), i * size + np.arange(size))
+        return _stream_sweep(partial(_evaluate_zscore, window=window), features, tasks, workers, top, batch)
+    # One task per entry level, each task evaluates its (exit, sl) combinations in a single pass over the bars
+    z, exit, sl = grid = parameter_grid(z_entry, exit_rate, stoploss_rate)
+    batches = run_sweep(partial(_evaluate_zscore, window=window), features, split_grid(grid, len(z_entry)), workers=workers)
+    with section('aggregate'):
+        return _zscore_table(z, exit, sl, batches)
+
+
+def _zscore_table(z, exit, sl, batches):
+    final_return, win_rate, return_per_trade, nb_trades = (np.concatenate(metric) for metric in zip(*batches))
+    return pd.DataFrame({
+        'Entry - z': z,
+        'Exit Threshold': exit,
+        'Stop Loss': sl,
+        'Final Return': final_return,
+        'Nb Trades': nb_trades,
+        'Win Rate': win_rate,
+        'Win per Trade': return_per_trade
+    })
+
+
+# ----- Dual Z-Score -----
+
+def dual_zscore_algo(df, z_entry_near, z_entry_far, threshold_exit, stop_loss, window_near, window_far, stats=None, regime=None):
+    # Rolling statistics are shared across the whole grid when a RollingStats cache is passed in
+    if stats is None:
+        stats = RollingStats(pair_spread(df))
+    z_score_near = stats.zscore(window_near)
+    z_score_far = stats.zscore(window_far)
+
+    short_entry = (z_score_near > z_entry_near) & (z_score_far > z_entry_far)
+    long_entry = (z_score_near < -z_entry_near) & (z_score_far < -z_entry_far)
+    long_entry, short_entry = apply_regime(long_entry, short_entry, regime, df.index)
+    return backtest_kernel(stats.values, long_entry, short_entry, threshold_exit, stop_loss, start=window_far)
+
+
+def dual_zscore_grid(spread, z_score_near, z_score_far, window_far, z_near, z_far, exit, sl, bars=slice(None)):
+    """Metrics of every (z_near, z_far, exit, sl) combination of one window pair, backtested on the bars of `bars` only."""
+    start, stop, _ = bars.indices(len(spread))
+    levels, signal_index = np.unique(np.column_stack((z_near, z_far)), axis=0, return_inverse=True)
+    near, far = z_score_near[start:stop], z_score_far[start:stop]
+    short_entry = (near > levels[:, :1]) & (far > levels[:, 1:])
+    long_entry = (near < -levels[:, :1]) & (far < -levels[:, 1:])
+    return batch_backtest(spread[start:stop], long_entry, short_entry, exit, sl, max(window_far - start, 0), signal_index.ravel())
+
+
+def _evaluate_windows(features, task, thresholds):
+    # For a window pair, every (z_near, z_far, exit, sl) combination is evaluated in a single pass over the bars,
+    # the z-scores of every window come precomputed in the shared grid_features frame
+    window_near, window_far = task
+    z_near, z_far, exit, sl = parameter_grid(*thresholds)
+    return dual_zscore_grid(features['spread'].to_numpy(), features[f'z:{window_near}'].to_numpy(), features[f'z:{window_far}'].to_numpy(),
+                            window_far, z_near, z_far, exit, sl)
+
+
+def dual_zscore_sweep(data, z_entry, z_entry_far, exit_rate, stoploss_rate, short_window, large_window, workers=None, store=None, top=None):
+    space = {'Entry - z Near': z_entry, 'Entry - z Far': z_entry_far, 'Exit Threshold': exit_rate,
+             'Stop Loss': stoploss_rate, 'Window - Near': short_window, 'Window - Far': large_window}
+    if store is not None:
+        return _ranked(store.sweep('dual_zscore', data, space, workers=workers), top)
+    features = grid_features('dual_zscore', data, space)
+    # One task per (near, far) window pair, results are stacked back in the order of the nested grid
+    evaluate = partial(_evaluate_windows, thresholds=(z_entry, z_entry_far, exit_rate, stoploss_rate))
+    if top is not None:
+        tasks = list(product(short_window, large_window))
+        size = len(z_entry) * len(z_entry_far) * len(exit_rate) * len(stoploss_rate)
+        batch = lambda i, result: (_dual_zscore_table([result], z_entry, z_entry_far, exit_rate, stoploss_rate, [tasks[i][0]], [tasks[i][1]]),
+                                   np.arange(size) * len(tasks) + i)
+        return _stream_sweep(evaluate, features, tasks, workers, top, batch)
+    batches = run_sweep(evaluate, features, product(short_window, large_window), workers=workers)
+    with section('aggregate'):
+        return _dual_zscore_table(batches, z_entry, z_entry_far, exit_rate, stoploss_rate, short_window, large_window)
+
+
+def _dual_zscore_table(batches, z_entry, z_entry_far, exit_rate, stoploss_rate, short_window, large_window):
+    final_return, win_rate, return_per_trade, nb_trades = (np.stack(metric, axis=1).ravel() for metric in zip(*batches))
+    z_near, z_far, exit, sl, short_count, large_count = parameter_grid(z_entry, z_entry_far, exit_rate, stoploss_rate, short_window, large_window)
+    return pd.DataFrame({
+        'Entry - z Near': z_near,
+        'Entry - z Far': z_far,
+        'Exit Threshold': exit,
+        'Stop Loss': sl,
+        'Window - Near': short_count,
+        'Window - Far': large_count,
+        'Final Return': final_return,
+        'Nb Trades': nb_trades,
+        'Win Rate': win_rate,
+        'Win per Trade': return_per_trade
+    })
+
+
+# ----- Triangular -----
+
+def triangular_algo(df, threshold_exit, stop_loss, ratio=3, ranking=None):
+    # The basket divergence engine on every column, like triangular_sweep and grid_features: with the three assets of
+    # the script the median asset is the neutral one, more columns make the N-asset basket
+    if ranking is None:
+        ranking = BasketRanking(df.to_numpy(dtype=float))
+    return basket_divergence_algo(df, threshold_exit, stop_loss, ratio, ranking)
+
+
+def triangular_grid(ranking, exit, sl, ratio, bars=slice(None)):
+    """Metrics of every (exit, sl, ratio) combination, backtested on the bars of `bars` only."""
+    start, stop, _ = bars.indices(len(ranking.values))
+    ranking = ranking.slice(start, stop)
+    entries = {}
+    results = []
+    for e, s, x in zip(exit, sl, ratio):
+        if x not in entries:
+            entries[x] = ranking.entries(x)
+        results.append(basket_kernel(ranking, entries[x], e / 100, s / 100))
+    return tuple(np.array(metric) for metric in zip(*results)) if results else tuple(np.empty(0) for _ in range(4))
+
+
+def _evaluate_exit(data, exit, stoploss_rate, ratio):
+    sl, x = parameter_grid(stoploss_rate, ratio)
+    metrics = triangular_grid(BasketRanking(data.to_numpy(dtype=float)), np.full(len(sl), exit), sl, x)
+    return [{
+        'Exit Threshold': exit,
+        'Stop Loss': s,
+        'Ratio': r,
+        'Final Return': final_return,
+        'Nb Trades': nb_trades,
+        'Win Rate': win_rate,
+        'Win per Trade': return_per_trade
+    } for s, r, final_return, win_rate, return_per_trade, nb_trades in zip(sl, x, *metrics)]
+
+
+def triangular_sweep(data, exit_rate, stoploss_rate, ratio, workers=None, store=None, top=None):
+    if store is not None:
+        space = {'Exit Threshold': exit_rate, 'Stop Loss': stoploss_rate, 'Ratio': ratio}
+        return _ranked(store.sweep('triangular', data, space, workers=workers), top)
+    # One task per exit threshold, works for baskets of any number of assets
+    evaluate = partial(_evaluate_exit, stoploss_rate=stoploss_rate, ratio=ratio)
+    if top is not None:
+        size = len(stoploss_rate) * len(ratio)
+        batch = lambda i, result: (pd.DataFrame(result), i * size + np.arange(size))
+        return _stream_sweep(evaluate, data, exit_rate, workers, top, batch)
+    batches = run_sweep(evaluate, data, exit_rate, workers=workers)
+    with section('aggregate'):
+        return pd.DataFrame([row for rows in batches for row in rows])
+
+
+# ----- Streamed results -----
+
+def _stream_sweep(evaluate, data, tasks, workers, top, batch):
+    # batch(i, result) -> (table of task i, grid position of its rows), merged into the TopK as each task finishes
+    def merge(i, result):
+        with section('aggregate'):
+            top.add(*batch(i, result))
+    run_sweep(evaluate, data, tasks, workers=workers, on_result=merge, keep=False)
+    return top.table()
+
+
+def _ranked(table, top):
+    if top is None:
+        return table
+    top.add(table)
+    return top.table()
+
+
+# ----- Grids from shared indicators -----
+
+STRATEGY_NAMES = ('zscore', 'dual_zscore', 'triangular')
+RANKING_ARRAYS = ['highest', 'lowest', 'range_high_low', 'range_high_neutral', 'range_neutral_low']
+
+
+def grid_features(strategy, data, space, fixed=None):
+    """The indicators of the whole history as one float frame: the spread and the z-scores of every window of the grid, or the basket ranking."""
+    fixed = fixed or {}
+    if strategy == 'triangular':
+        ranking = BasketRanking(data.to_numpy(dtype=float))
+        features = {f'value:{i}': ranking.values[:, i] for i in range(ranking.values.shape[1])}
+        features.update({name: getattr(ranking, name) for name in RANKING_ARRAYS})
+    elif strategy in ('zscore', 'dual_zscore'):
+        stats = RollingStats(pair_spread(data))
+        axes = list(space.values())
+        windows = {fixed.get('window', 50)} if strategy == 'zscore' else set(axes[4]) | set(axes[5])
+        features = {'spread': stats.values}
+        features.update({f'z:{window}': stats.zscore(window) for window in sorted(windows)})
+    else:
+        raise ValueError(f"[ERROR] Unknown strategy '{strategy}', expected one of {', '.join(STRATEGY_NAMES)}")
+    return pd.DataFrame(features, index=data.index)
+
+
+def evaluate_grid(features, strategy, params, bars=slice(None), fixed=None):
+    """(final_return, win_rate, return_per_trade, nb_trades) arrays of the parameter combinations (one array per axis) on `bars`."""
+    fixed = fixed or {}
+    if strategy == 'triangular':
+        values = features[[c for c in features.columns if c.startswith('value:')]].to_numpy()
+        ranking = BasketRanking.from_arrays(values, *(features[name].to_numpy() for name in RANKING_ARRAYS))
+        return triangular_grid(ranking, *params, bars=bars)
+
+    spread = features['spread'].to_numpy()
+    if strategy == 'zscore':
+        window = fixed.get('window', 50)
+        return zscore_grid(spread, features[f'z:{window}'].to_numpy(), window, *params, bars=bars)
+
+    # dual_zscore: one pass per window pair
+    z_near, z_far, exit, sl, window_near, window_far = (np.asarray(axis) for axis in params)
+    metrics = [np.zeros(len(exit)) for _ in range(3)] + [np.zeros(len(exit), dtype=np.int64)]
+    for near, far in set(zip(window_near.tolist(), window_far.tolist())):
+        rows = np.flatnonzero((window_near == near) & (window_far == far))
+        results = dual_zscore_grid(spread, features[f'z:{near}'].to_numpy(), features[f'z:{far}'].to_numpy(), far,
+                                   z_near[rows], z_far[rows], exit[rows], sl[rows], bars=bars)
+        for metric, result in zip(metrics, results):
+            metric[rows] = result
+    return tuple(metrics)
@@ -0,0 +1,144 @@
+"""
+Streaming z-scores and position state machine for live signal generation.
+
+RollingZScore updates a rolling mean and standard deviation in constant time per bar from a ring buffer: Welford
+updates as each value enters and leaves the window, recomputed exactly from the buffer every `window` bars so their
+rounding never accumulates. The z-scores match rolling().mean() / rolling().std() to rounding (about 1e-12 relative),
+not bit for bit. Like the backtests' returns, the values must not contain NaN.
+
+SignalEngine feeds one spread per bar to one or more RollingZScore and drives the same position state machine
+as pairs_trading_algo: with the same parameters, streaming a history through it gives the same trades and the
+same (final_return, win_rate, return_per_trade, nb_trades) as the backtest, unless a z-score lands within rounding
+of an entry threshold.
+"""
+
+import math
+from collections import namedtuple
+
+from mt5_algo_hub.backtest import summarize
+
+
+# pnl: the open trade's pnl, on an 'exit' the realized pnl of the trade just closed (1 when flat)
+Signal = namedtuple('Signal', ['action', 'position', 'pnl', 'z_scores'])
+
+
+class RollingZScore:
+    """Rolling mean and standard deviation (ddof=1) of the last `window` values, z-score of the newest one."""
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [0.0] * window
+        self.count = 0
+        self.mean = math.nan
+        self.std = math.nan
+
+        # Mean and sum of squared deviations of the values in the buffer (Welford)
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        # Length of the run of identical values ending with the newest one
+        self._run = 0
+        self._last = math.nan
+
+    def _add(self, value, nobs):
+        delta = value - self._mean
+        self._mean += delta / nobs
+        self._ssqdm += delta * (value - self._mean)
+
+    def _remove(self, value, nobs):
+        if nobs == 0:
+            self._mean = self._ssqdm = 0.0
+            return
+        delta = value - self._mean
+        self._mean -= delta / nobs
+        self._ssqdm -= delta * (value - self._mean)
+
+    def _resync(self):
+        self._mean = math.fsum(self.buffer) / self.window
+        self._ssqdm = math.fsum((value - self._mean) ** 2 for value in self.buffer)
+
+    def update(self, value):
+        """Add the new bar's value, return its z-score (nan until the window is full)."""
+        value = float(value)
+        if value != value:
+            raise ValueError("[ERROR] RollingZScore got a NaN value, drop the NaN bars as the backtests do")
+        slot = self.count % self.window
+        if self.count >= self.window:
+            self._remove(self.buffer[slot], self.window - 1)
+        self._add(value, min(self.count, self.window - 1) + 1)
+        self.buffer[slot] = value
+        self.count += 1
+        self._run = self._run + 1 if value == self._last else 1
+        self._last = value
+        if self.count % self.window == 0:
+            self._resync()
+
+        if self.count < self.window or self.window < 2:
+            self.mean = self.std = math.nan
+            return math.nan
+        if self._run >= self.window:
+            # A window of one repeated value: that value and a std of exactly 0, whatever the rounding of the running sums
+            self.mean, self.std = value, 0.0
+        else:
+            self.mean, self.std = self._mean, math.sqrt(max(self._ssqdm, 0.0) / (self.window - 1))
+        diff = value - self.mean
+        if self.std == 0:
+            # x / 0 as in the pandas division: +-inf, nan for 0 / 0
+            return math.nan if diff == 0 else math.copysign(math.inf, diff)
+        return diff / self.std
+
+
+class SignalEngine:
+    """
+    Position state machine of pairs_trading_algo on streamed spreads.
+    windows/z_entries: one z-score per window, the entry needs every z-score beyond its threshold
+    (Baseline: one window, Dual Z-Score: near and far). Signals start once max(windows) bars have been seen,
+    like the backtest loop starting at range(window, ...).
+    """
+
+    def __init__(self, windows, z_entries, threshold_exit, stop_loss):
+        self.z_scores = [RollingZScore(window) for window in windows]
+        self.z_entries = list(z_entries)
+        self.threshold_exit = threshold_exit
+        self.stop_loss = stop_loss
+        self.start = max(windows)
+        self.bar = 0
+
+        self.position = 0
+        self.pnl = 1
+        self.final_return = 1
+        self.nb_trades = 0
+        self.winning_trades = 0
+
+    def update(self, spread):
+        """Feed the spread of a new bar, returns a Signal whose action is 'short', 'long', 'exit' or None."""
+        z_scores = [engine.update(spread) for engine in self.z_scores]
+        i = self.bar
+        self.bar += 1
+        action = None
+        pnl = self.pnl
+
+        if i < self.start:
+            pass
+        elif self.position == 0:
+            if all(z > entry for z, entry in zip(z_scores, self.z_entries)):
+                self.position = -1
+                self.nb_trades += 1
+                action = 'short'
+            elif all(z < -entry for z, entry in zip(z_scores, self.z_entries)):
+                self.position = 1
+                self.nb_trades += 1
+                action = 'long'
+        else:
+            self.pnl *= 1 + self.position * spread
+            pnl = self.pnl
+            if pnl - 1 >= self.threshold_exit or pnl - 1 <= -self.stop_loss:
+                self.final_return *= pnl
+                if pnl - 1 > 0: self.winning_trades += 1
+                self.position = 0
+                self.pnl = 1
+                action = 'exit'
+
+        return Signal(action, self.position, pnl, z_scores)
+
+    def results(self):
+        return summarize(self.final_return, self.winning_trades, self.nb_trades)
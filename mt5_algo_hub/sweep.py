@@ -0,0 +1,120 @@
+"""
+Parallel parameter sweeps for the optimization() functions.
+
+The grid is cut into tasks that are fanned out to a process pool. The returns DataFrame is published once
+to a memory-mapped file that every worker attaches to at start-up, instead of being pickled with every task.
+Results come back in task order whatever the completion order, so a parallel sweep gives exactly
+the same table as the serial one (workers=1). When profiling is on, the workers send their sections back with
+each result.
+
+The scripts calling run_sweep must keep their MT5 connection and data download under
+if __name__ == "__main__": since worker processes re-import them on Windows.
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from mt5_algo_hub import profiling
+
+
+class SharedFrame:
+    """A float DataFrame written once to a memory-mapped .npy file, workers rebuild it without copying."""
+
+    def __init__(self, df, directory=None):
+        self.directory = tempfile.mkdtemp(prefix='mt5_sweep_', dir=directory)
+        path = os.path.join(self.directory, 'values.npy')
+        np.save(path, np.ascontiguousarray(df.to_numpy(dtype=float)))
+        self.handle = (path, list(df.columns), df.index)
+
+    @staticmethod
+    def attach(handle):
+        path, columns, index = handle
+        values = np.load(path, mmap_mode='r')
+        return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def split_grid(columns, n_chunks):
+    """Cut flattened grid columns (see parameter_grid) into n_chunks contiguous tasks."""
+    bounds = np.linspace(0, len(columns[0]), n_chunks + 1).astype(int)
+    return [tuple(column[a:b] for column in columns) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+_worker_data = None
+
+
+def _init_worker(handle, profile=False):
+    global _worker_data
+    _worker_data = SharedFrame.attach(handle)
+    # A forked worker starts with a copy of the parent's sections, they are the parent's to report
+    profiling.reset()
+    profiling.enable(profile)
+
+
+def _run_task(evaluate, task):
+    if not profiling.enabled():
+        return evaluate(_worker_data, task), None
+    with profiling.section('task'):
+        result = evaluate(_worker_data, task)
+    return result, profiling.collect()
+
+
+def run_sweep(evaluate, data, tasks, workers=None, desc="Optimizing", on_result=None, keep=True):
+    """
+    Call evaluate(data, task) for every task, on `workers` processes, and return the results in task order.
+    on_result(i, result) is called in this process as soon as task i is done, in completion order.
+    keep=False drops every result once on_result has seen it (the returned list holds None), the memory of the
+    sweep is then the one of the tasks in flight.
+    """
+    tasks = list(tasks)
+    workers = min(workers or default_workers(), len(tasks))
+    profiling.count('sweep tasks', len(tasks))
+    with profiling.section(f'sweep {desc}', tasks=len(tasks), workers=workers):
+        return _run_tasks(evaluate, data, tasks, workers, desc, on_result, keep)
+
+
+def _run_tasks(evaluate, data, tasks, workers, desc, on_result, keep):
+    results = [None] * len(tasks)
+
+    if workers <= 1:
+        for i, task in enumerate(tqdm(tasks, desc=desc)):
+            with profiling.section('task'):
+                result = evaluate(data, task)
+            if on_result is not None:
+                on_result(i, result)
+            if keep:
+                results[i] = result
+        return results
+
+    with SharedFrame(data) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.handle, profiling.enabled())) as pool:
+            futures = {pool.submit(_run_task, evaluate, task): i for i, task in enumerate(tasks)}
+            with tqdm(total=len(tasks), desc=f"{desc} ({workers} workers)") as progress:
+                for future in as_completed(futures):
+                    i = futures.pop(future)
+                    result, profile = future.result()
+                    if profile is not None:
+                        profiling.merge(*profile)
+                    if on_result is not None:
+                        on_result(i, result)
+                    if keep:
+                        results[i] = result
+                    progress.update()
+    return results
@@ -0,0 +1,253 @@
+"""
+Tick-level backtest of the pair strategies (Baseline and Dual Z-Score) with bid/ask fills.
+
+The ticks of both legs are requested with copy_ticks_range one chunk of time at a time (stream_ticks), so memory
+holds one chunk of ticks whatever the length of the backtest. In a chunk the two streams are merged in time order and
+the last bid/ask of each leg is carried forward (as-of merge), across chunks too.
+
+Signals come from bars built on the ticks: at the end of every `timeframe` bar the close of each leg is its last bid
+(MT5 bars are bid bars), the spread of the bar returns feeds one RollingZScore per window and a completed bar whose
+z-scores are all beyond their entry levels is a signal, with the rules of zscore_algo / dual_zscore_algo.
+
+Fills are modeled on the ticks:
+- a signal is taken at the first tick of the next bar if the position is flat: a long spread buys the first leg at
+  its ask and sells the second at its bid, a short spread the opposite. When that tick does not quote both legs yet
+  (a missing bid or ask), the entry waits for the first tick that does, a later signal in between replaces it; these
+  entries are counted in `deferred`,
+- an open trade is marked on every tick at the prices it would be closed at (bid of the leg bought, ask of the leg
+  sold), its return is the return of the leg bought minus the return of the leg sold since the entry. The bar
+  backtests compound the spread of the bar returns instead (pnl *= 1 + position * spread), as if both legs were
+  rebalanced to equal weights at every bar: the two returns differ by the drift of the legs' weights during the trade,
+  a second order term of the legs' returns,
+- the trade is closed on the first tick where that return reaches the exit threshold or the stop loss.
+Both fills pay the spread quoted at their tick. A trade still open at the end is counted but not closed, like the
+bar kernels.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.backtest import summarize
+from mt5_algo_hub.profiling import count, section
+from mt5_algo_hub.sources import timeframe_seconds
+from mt5_algo_hub.streaming import RollingZScore
+
+
+# Merged ticks of a chunk: time, leg (0 or 1) and quote of every tick, time ordered
+TickChunk = namedtuple('TickChunk', ['time_msc', 'leg', 'bid', 'ask'])
+
+TRADE_COLUMNS = ['Entry Time', 'Exit Time', 'Side', 'Return', 'Spread Cost']
+# Ticks marked at once while a trade is open, doubled until the exit is found
+_SCAN_ROWS = 1024
+
+
+def _utc(date):
+    if isinstance(date, datetime):
+        return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+    return datetime.fromtimestamp(float(date), tz=timezone.utc)
+
+
+def merge_ticks(first, second):
+    """TickChunk of the ticks of both legs (structured arrays with time_msc, bid and ask), in time order."""
+    time_msc = np.concatenate((first['time_msc'], second['time_msc'])).astype(np.int64)
+    order = np.argsort(time_msc, kind='stable')
+    leg = np.repeat(np.array([0, 1], dtype=np.int8), (len(first), len(second)))
+    bid = np.concatenate((first['bid'], second['bid'])).astype(float)
+    ask = np.concatenate((first['ask'], second['ask'])).astype(float)
+    return TickChunk(time_msc[order], leg[order], bid[order], ask[order])
+
+
+def stream_ticks(symbols, date_from, date_to, chunk=timedelta(days=1), terminal=None):
+    """Yield the merged TickChunk of the two symbols for every `chunk` of time between date_from and date_to."""
+    if terminal is None:
+        from mt5_algo_hub.sources import get_source
+        terminal = get_source()
+    start, end = _utc(date_from), _utc(date_to)
+    while start < end:
+        stop = min(start + chunk, end)
+        legs = []
+        for symbol in symbols:
+            with section(f'mt5 copy_ticks_range {symbol}', symbol=symbol):
+                ticks = terminal.copy_ticks_range(symbol, start, stop, terminal.COPY_TICKS_INFO)
+            if ticks is None:
+                raise ValueError(f"[ERROR] No ticks returned for {symbol} - {terminal.last_error()}")
+            # The range is inclusive at both ends, a tick on the boundary belongs to the next chunk
+            limit = int(stop.timestamp() * 1000)
+            legs.append(ticks[ticks['time_msc'] < limit] if stop < end else ticks)
+        count('ticks streamed', sum(len(leg) for leg in legs))
+        yield merge_ticks(*legs)
+        start = stop
+
+
+def _carry_forward(values, valid, carry):
+    # Last valid value at or before every row, `carry` before the first one
+    last = np.where(valid, np.arange(len(values)), -1)
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, values[np.maximum(last, 0)], carry)
+
+
+class TickBacktest:
+    """
+    Chunk by chunk tick backtest of one pair, see the module docstring. windows/z_entries: one z-score per window,
+    [window] and [z] for the Baseline, [near, far] for the Dual Z-Score (signals start once max(windows) bars are in).
+    """
+
+    def __init__(self, windows, z_entries, threshold_exit, stop_loss, timeframe):
+        self.z_scores = [RollingZScore(window) for window in windows]
+        self.z_entries = np.asarray(z_entries, dtype=float)
+        self.threshold_exit = threshold_exit
+        self.stop_loss = stop_loss
+        self.start = max(windows)
+        self.bar_msc = timeframe_seconds(timeframe) * 1000
+
+        # As-of quotes of both legs and the bar in progress, carried from chunk to chunk
+        self.quotes = np.full(4, np.nan)            # bid 0, ask 0, bid 1, ask 1
+        self.bar = None
+        self.closes = None
+        self.n_spreads = 0
+        self.pending = 0                            # side of a signal waiting for a tick quoting both legs
+
+        self.position = 0
+        self.fill = None                            # entry (time_msc, bid 0, ask 0, bid 1, ask 1)
+        self.final_return = 1
+        self.nb_trades = 0
+        self.winning_trades = 0
+        self.deferred = 0
+        self.trades = []
+
+    def _bar_signal(self, closes):
+        # A completed bar: its spread of returns updates the z-scores, returns the side of its signal
+        previous, self.closes = self.closes, closes
+        if previous is None:
+            return 0
+        returns = closes / previous - 1
+        z = np.array([engine.update(returns[0] - returns[1]) for engine in self.z_scores])
+        i = self.n_spreads
+        self.n_spreads += 1
+        if i < self.start:
+            return 0
+        if (z > self.z_entries).all():
+            return -1
+        if (z < -self.z_entries).all():
+            return 1
+        return 0
+
+    def _trade_returns(self, bid0, ask0, bid1, ask1):
+        # Return of closing the open trade at these quotes, and the same at mid prices
+        _, entry_bid0, entry_ask0, entry_bid1, entry_ask1 = self.fill
+        if self.position == 1:
+            ret = (bid0 / entry_ask0 - 1) - (ask1 / entry_bid1 - 1)
+        else:
+            ret = (bid1 / entry_ask1 - 1) - (ask0 / entry_bid0 - 1)
+        mid = self.position * ((bid0 + ask0) / (entry_bid0 + entry_ask0) - (bid1 + ask1) / (entry_bid1 + entry_ask1))
+        return ret, mid
+
+    def feed(self, ticks):
+        """Process the next TickChunk."""
+        with section('tick chunk', ticks=len(ticks.time_msc)):
+            self._feed(ticks)
+
+    def _feed(self, ticks):
+        n = len(ticks.time_msc)
+        if n == 0:
+            return
+        legs = ticks.leg
+        quotes = np.column_stack([
+            _carry_forward(ticks.bid, legs == 0, self.quotes[0]),
+            _carry_forward(ticks.ask, legs == 0, self.quotes[1]),
+            _carry_forward(ticks.bid, legs == 1, self.quotes[2]),
+            _carry_forward(ticks.ask, legs == 1, self.quotes[3]),
+        ])
+        quoted = ~np.isnan(quotes).any(axis=1)
+
+        # First tick of every bar, the bar before it is complete there; its close is the quote of the tick before
+        bars = ticks.time_msc // self.bar_msc
+        starts = np.flatnonzero(np.diff(bars)) + 1
+        if self.bar is not None and bars[0] != self.bar:
+            starts = np.concatenate(([0], starts))
+        sides = np.zeros(len(starts), dtype=np.int8)
+        for k, row in enumerate(starts.tolist()):
+            closes = quotes[row - 1, [0, 2]] if row > 0 else self.quotes[[0, 2]]
+            if not np.isnan(closes).any():
+                sides[k] = self._bar_signal(closes)
+        entries = starts[sides != 0]
+        entry_sides = sides[sides != 0]
+        carried, self.pending = self.pending, 0
+        if carried and (len(entries) == 0 or entries[0] != 0):
+            entries = np.concatenate(([0], entries))
+            entry_sides = np.concatenate(([carried], entry_sides))
+
+        row = 0
+        while row < n:
+            if self.position == 0:
+                k = np.searchsorted(entries, row)
+                if k == len(entries):
+                    break
+                row = int(entries[k])
+                if not quoted[row]:
+                    # The entry waits for the first tick quoting both legs, the last signal before it is taken
+                    waiting = np.flatnonzero(quoted[row:])
+                    if not (carried and row == 0):
+                        self.deferred += 1
+                    if len(waiting) == 0:
+                        self.pending = int(entry_sides[-1])
+                        break
+                    row += int(waiting[0])
+                    k = np.searchsorted(entries, row, side='right') - 1
+                self.position = int(entry_sides[k])
+                self.fill = (int(ticks.time_msc[row]), *quotes[row].tolist())
+                self.nb_trades += 1
+                row += 1
+                continue
+
+            # Mark the open trade on growing blocks of ticks until a tick reaches the exit or the stop loss
+            size = _SCAN_ROWS
+            while row < n:
+                block = slice(row, min(row + size, n))
+                ret, _ = self._trade_returns(*quotes[block].T)
+                hits = np.flatnonzero((ret >= self.threshold_exit) | (ret <= -self.stop_loss))
+                if len(hits):
+                    row = block.start + int(hits[0])
+                    self._close(int(ticks.time_msc[row]), quotes[row])
+                    row += 1
+                    break
+                row = block.stop
+                size *= 2
+
+        self.quotes = quotes[-1]
+        self.bar = bars[-1]
+
+    def _close(self, time_msc, quote):
+        ret, mid = self._trade_returns(*quote.tolist())
+        self.final_return *= 1 + ret
+        if ret > 0:
+            self.winning_trades += 1
+        self.trades.append((self.fill[0], time_msc, 'long' if self.position == 1 else 'short', ret * 100, (mid - ret) * 100))
+        self.position = 0
+        self.fill = None
+
+    def results(self):
+        """(final_return, win_rate, return_per_trade, nb_trades) like the bar backtests."""
+        return summarize(self.final_return, self.winning_trades, self.nb_trades)
+
+    def trade_table(self):
+        """One row per closed trade, returns and spread cost (mid return - filled return) in %."""
+        trades = pd.DataFrame(self.trades, columns=TRADE_COLUMNS)
+        for column in ('Entry Time', 'Exit Time'):
+            trades[column] = pd.to_datetime(trades[column], unit='ms')
+        return trades
+
+
+def tick_backtest(symbols, date_from, date_to, z_entries, threshold_exit, stop_loss, windows, timeframe=15, chunk=timedelta(days=1), terminal=None):
+    """
+    Tick-level backtest of the pair `symbols` (spread = first - second) between date_from and date_to.
+    Returns ((final_return, win_rate, return_per_trade, nb_trades), trades table).
+    """
+    engine = TickBacktest(windows, z_entries, threshold_exit, stop_loss, timeframe)
+    for ticks in stream_ticks(symbols, date_from, date_to, chunk, terminal):
+        engine.feed(ticks)
+    if engine.deferred:
+        print(f"[WARNING] {engine.deferred} entries waited for a tick quoting both {symbols[0]} and {symbols[1]}")
+    return engine.results(), engine.trade_table()
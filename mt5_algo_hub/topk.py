@@ -0,0 +1,142 @@
+"""
+Bounded-memory results of the sweeps: filters and top-K applied as the results arrive, full results spilled to disk.
+
+A TopK receives the results of a sweep one batch (a task's table) at a time:
+- the filters ('Nb Trades > 10', 'Final Return > 0'... or (column, operator, value) tuples) are applied to the batch,
+- the batch's best rows by `sort_by` are merged into a heap of the K best rows seen so far,
+- with spill=<directory>, every row of the batch (filtered or not) is written to columnar files (ColumnSpill).
+Nothing else of the batch is kept, so the memory of a sweep is the heap and the batches in flight whatever the size
+of the grid. table() gives the rows of
+    results[filters].sort_values(sort_by, ascending=..., kind='stable').head(k)
+ties kept in grid order, rows whose sort value is NaN are never ranked. The *_sweep functions take a TopK as top=.
+
+The spill directory holds part-000000.npz, part-000001.npz... one array per column plus '_position' (the row in
+the grid), written every `spill_rows` rows. iter_spill reads them back one part at a time, read_spill as one table in
+grid order, only loading the requested columns.
+"""
+
+import heapq
+import operator
+import re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+FILTER_OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq, '!=': operator.ne}
+_FILTER = re.compile(r'^\s*(.+?)\s*(>=|<=|==|!=|>|<)\s*(\S+)\s*$')
+
+
+def parse_filter(text):
+    """('Nb Trades', '>', 10.0) from 'Nb Trades > 10'."""
+    match = _FILTER.match(text)
+    if match is None:
+        raise ValueError(f"[ERROR] Cannot read the filter '{text}', expected '<column> <operator> <value>'")
+    column, op, value = match.groups()
+    return column, op, float(value)
+
+
+def filter_mask(table, filters):
+    """Rows of `table` passing every (column, operator, value) filter."""
+    mask = np.ones(len(table), dtype=bool)
+    for column, op, value in filters:
+        mask &= FILTER_OPERATORS[op](table[column].to_numpy(), value)
+    return mask
+
+
+class ColumnSpill:
+    """Results written to <directory>/part-NNNNNN.npz every `rows` rows, one array per column (see the module docstring)."""
+
+    def __init__(self, directory, rows=100_000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.rows = rows
+        self.part = max((int(path.stem[5:]) + 1 for path in self.directory.glob('part-*.npz') if path.stem[5:].isdigit()), default=0)
+        self.buffer = []
+        self.buffered = 0
+        self.rows_written = 0
+
+    def write(self, table, positions):
+        self.buffer.append((table, positions))
+        self.buffered += len(table)
+        if self.buffered >= self.rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        columns = {column: np.concatenate([table[column].to_numpy() for table, _ in self.buffer]) for column in self.buffer[0][0].columns}
+        columns['_position'] = np.concatenate([positions for _, positions in self.buffer]).astype(np.int64)
+        np.savez(self.directory / f"part-{self.part:06d}.npz", **columns)
+        self.part += 1
+        self.rows_written += self.buffered
+        self.buffer = []
+        self.buffered = 0
+
+
+def iter_spill(directory, columns=None):
+    """Yield the spilled parts as DataFrames (only `columns`, and '_position'), in the order they were written."""
+    for path in sorted(Path(directory).glob('part-*.npz')):
+        with np.load(path) as part:
+            names = part.files if columns is None else list(columns) + ['_position']
+            yield pd.DataFrame({name: part[name] for name in names})
+
+
+def read_spill(directory, columns=None):
+    """All the spilled results as one table in grid order."""
+    parts = list(iter_spill(directory, columns))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    table = pd.concat(parts, ignore_index=True).sort_values('_position', kind='stable')
+    return table.drop(columns='_position').reset_index(drop=True)
+
+
+class TopK:
+    """The k best rows by `sort_by` of the batches passing the filters, see the module docstring."""
+
+    def __init__(self, k=10, sort_by='Final Return', ascending=False, where=(), spill=None, spill_rows=100_000):
+        self.k = k
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self.where = [parse_filter(f) if isinstance(f, str) else tuple(f) for f in where]
+        self.spill = ColumnSpill(spill, spill_rows) if spill is not None else None
+        self.columns = None
+        self.dtypes = None
+        # (score, -position, row): the root is the worst row kept, the lowest score and the latest in the grid
+        self.heap = []
+        self.n_seen = 0
+        self.n_passed = 0
+
+    def add(self, table, positions=None):
+        """Merge a batch of results; positions: the grid row of each of its rows (default: following the previous batches)."""
+        positions = np.arange(self.n_seen, self.n_seen + len(table)) if positions is None else np.asarray(positions)
+        self.n_seen += len(table)
+        if self.columns is None:
+            self.columns, self.dtypes = list(table.columns), table.dtypes
+        if self.spill is not None:
+            self.spill.write(table, positions)
+
+        keys = table[self.sort_by].to_numpy(dtype=float)
+        rows = np.flatnonzero(filter_mask(table, self.where) & ~np.isnan(keys))
+        self.n_passed += len(rows)
+        score = -keys[rows] if self.ascending else keys[rows]
+        # Only the batch's k best rows can enter the heap, best score first then grid order
+        best = np.lexsort((positions[rows], -score))[:self.k]
+        selected = table.iloc[rows[best]].itertuples(index=False, name=None)
+        for row, s, position in zip(selected, score[best].tolist(), positions[rows[best]].tolist()):
+            item = (s, -position, row)
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, item)
+            elif item[:2] > self.heap[0][:2]:
+                heapq.heapreplace(self.heap, item)
+            else:
+                break
+
+    def table(self):
+        """The k best rows, best first. Flushes the spill."""
+        if self.spill is not None:
+            self.spill.flush()
+        if self.columns is None:
+            return pd.DataFrame()
+        rows = [row for *_, row in sorted(self.heap, key=lambda item: item[:2], reverse=True)]
+        return pd.DataFrame(rows, columns=self.columns).astype(self.dtypes.to_dict())
@@ -0,0 +1,221 @@
+"""
+Augmented Dickey-Fuller and Engle-Granger tests in plain NumPy, batched over many series.
+
+adf_batch() follows statsmodels.tsa.stattools.adfuller step by step (same default maxlag, same design matrix, AIC/BIC
+lag search on the common sample, final regression on the sample of the selected lag, MacKinnon p-value), for a whole
+(series x observations) array at once:
+- the lagged designs of a block of series are built together and reduced to their cross-product matrices with one
+  batched matrix product,
+- one batched Cholesky factor per design gives the residual sum of squares of every candidate lag (the last row of
+  the factor of [X | y] holds the components of y along each column) and the t-statistic of the level,
+- the p-values are MacKinnon's approximations evaluated on the whole array.
+The trend columns are replaced by an orthonormal basis of the same span and the level is demeaned when there is a
+constant, which leaves the statistic unchanged and keeps the cross products well conditioned.
+
+adf() and engle_granger() are the one series versions of adfuller and coint.
+The lag search supports autolag='aic', 'bic' or None (fixed maxlag), adfuller's 't-stat' is not implemented.
+MacKinnon's tables are read from statsmodels.tsa.adfvalues, which is only imported when the first p-value is computed.
+They are module internals, hence the pinned statsmodels range of pyproject.toml; tests/test_unitroot.py checks the
+p-values against its public mackinnonp.
+"""
+
+from functools import lru_cache
+import numpy as np
+
+
+# Same collinearity threshold as statsmodels' coint
+_SQRTEPS = np.sqrt(np.finfo(float).eps)
+# Size of the design block built at once
+_BLOCK_BYTES = 64 * 2 ** 20
+# Information criteria of the lag search (autolag=None keeps maxlag)
+AUTOLAGS = ('aic', 'bic')
+
+
+def default_maxlag(nobs, regression='c'):
+    """adfuller's default: 12 * (nobs / 100) ** (1 / 4), capped to leave enough observations."""
+    maxlag = min(nobs // 2 - _ntrend(regression) - 1, int(np.ceil(12.0 * np.power(nobs / 100.0, 1 / 4.0))))
+    if maxlag < 0:
+        raise ValueError("[ERROR] Sample size is too short to use the selected regression component")
+    return maxlag
+
+
+def _ntrend(regression):
+    return len(regression) if regression != 'n' else 0
+
+
+@lru_cache(maxsize=None)
+def _mackinnon_tables():
+    from scipy.special import ndtr
+    from statsmodels.tsa import adfvalues
+    return ndtr, adfvalues
+
+
+def mackinnon_p_values(statistics, regression='c', N=1):
+    """mackinnonp(statistic, regression, N) of every statistic of an array."""
+    ndtr, tables = _mackinnon_tables()
+    statistics = np.asarray(statistics, dtype=float)
+    small = np.polyval(np.asarray(tables._tau_smallps[regression][N - 1])[::-1], statistics)
+    large = np.polyval(np.asarray(tables._tau_largeps[regression][N - 1])[::-1], statistics)
+    p_values = ndtr(np.where(statistics <= tables._tau_stars[regression][N - 1], small, large))
+    p_values = np.where(statistics > tables._tau_maxs[regression][N - 1], 1.0, p_values)
+    return np.where(statistics < tables._tau_mins[regression][N - 1], 0.0, p_values)
+
+
+def _trend_basis(nobs, regression):
+    # Orthonormal columns spanning 1, t, t^2... like the trend columns of adfuller
+    ntrend = _ntrend(regression)
+    if not ntrend:
+        return np.empty((nobs, 0))
+    t = np.linspace(-1, 1, nobs)
+    return np.linalg.qr(np.column_stack([t ** power for power in range(ntrend)]))[0]
+
+
+def _factor(X, lags, regression, level_last=False):
+    """
+    Cholesky factors L (series x m x m) of the cross products of the designs [trend, level, diff lags, y]
+    ([trend, diff lags, level, y] if level_last) with `lags` lagged differences, and their number of observations.
+    """
+    dx = np.diff(X, axis=1)
+    nobs = dx.shape[1] - lags
+    trend = _trend_basis(nobs, regression)
+    ntrend = trend.shape[1]
+    level = X[:, lags:lags + nobs]
+    if ntrend:
+        level = level - level.mean(axis=1, keepdims=True)
+
+    design = np.empty((len(X), nobs, ntrend + lags + 2))
+    design[:, :, :ntrend] = trend
+    level_column = ntrend + lags if level_last else ntrend
+    design[:, :, level_column] = level
+    first_lag = ntrend if level_last else ntrend + 1
+    for k in range(1, lags + 1):
+        design[:, :, first_lag + k - 1] = dx[:, lags - k:lags - k + nobs]
+    design[:, :, -1] = dx[:, lags:]
+    return np.linalg.cholesky(np.matmul(design.transpose(0, 2, 1), design)), nobs
+
+
+def _autolag(autolag):
+    autolag = autolag.lower() if autolag else None
+    if autolag is not None and autolag not in AUTOLAGS:
+        raise ValueError(f"[ERROR] Unsupported autolag '{autolag}', expected 'aic', 'bic' or None")
+    return autolag
+
+
+def _information(ssr, nobs, k, autolag):
+    llf = -nobs / 2 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1)
+    return -2 * llf + (2 * k if autolag == 'aic' else np.log(nobs) * k)
+
+
+def select_lags(X, maxlag, regression='c', autolag='aic'):
+    """Lag minimizing the information criterion of every series, all candidates fitted on the sample of maxlag like _autolag."""
+    autolag = _autolag(autolag)
+    factor, nobs = _factor(X, maxlag, regression)
+    # Residual sum of squares of the first k columns: the squared components of y along the columns left out
+    components = factor[:, -1, :] ** 2
+    tail = np.cumsum(components[:, ::-1], axis=1)[:, ::-1]
+    k = np.arange(_ntrend(regression) + 1, components.shape[1])
+    ic = _information(tail[:, k], nobs, k, autolag)
+    return np.argmin(ic, axis=1)
+
+
+def adf_statistics(X, lags, regression='c'):
+    """ADF t-statistics of the level coefficient for `lags` lagged differences, and the number of observations."""
+    factor, nobs = _factor(X, lags, regression, level_last=True)
+    k = factor.shape[1] - 1
+    sigma = factor[:, -1, -1] / np.sqrt(nobs - k)
+    return factor[:, -1, -2] / sigma, nobs
+
+
+def _blocks(n_series, n_columns, maxlag):
+    size = max(1, _BLOCK_BYTES // (8 * n_columns * (maxlag + 3)))
+    return [slice(a, a + size) for a in range(0, n_series, size)]
+
+
+def adf_batch(X, maxlag=None, regression='c', autolag='aic'):
+    """
+    (statistics, p-values, used lags, nobs) arrays, like adfuller(x, maxlag, regression, autolag)[:4] for every series.
+    X: 2-D array with one series per row, or a DataFrame with one series per column, all of the same length.
+    Constant series get a NaN statistic and p-value (adfuller raises for them).
+    """
+    if hasattr(X, 'columns'):
+        X = X.to_numpy(dtype=float).T
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    autolag = _autolag(autolag)
+    if maxlag is None:
+        maxlag = default_maxlag(X.shape[1], regression)
+
+    n_series = len(X)
+    statistics = np.full(n_series, np.nan)
+    lags = np.full(n_series, maxlag)
+    nobs = np.full(n_series, X.shape[1] - 1 - maxlag)
+    valid = np.flatnonzero(X.max(axis=1) > X.min(axis=1))
+
+    for block in _blocks(len(valid), X.shape[1], maxlag):
+        rows = valid[block]
+        if autolag:
+            lags[rows] = select_lags(X[rows], maxlag, regression, autolag)
+        # Each series is refitted on the sample of its own lag, series sharing a lag are fitted together
+        for lag in np.unique(lags[rows]):
+            same = rows[lags[rows] == lag]
+            statistics[same], nobs[same] = adf_statistics(X[same], int(lag), regression)
+    return statistics, mackinnon_p_values(statistics, regression, N=1), lags, nobs
+
+
+def adf(x, maxlag=None, regression='c', autolag='aic'):
+    """(statistic, p-value, used lag, nobs) like adfuller(x, maxlag, regression, autolag)[:4]."""
+    x = np.asarray(x, dtype=float).ravel()
+    if x.max() == x.min():
+        raise ValueError("[ERROR] Invalid input, x is constant")
+    statistics, p_values, lags, nobs = adf_batch(x[None, :], maxlag, regression, autolag)
+    return float(statistics[0]), float(p_values[0]), int(lags[0]), int(nobs[0])
+
+
+def hedge_ratio(y0, y1):
+    """(beta, alpha, r_squared) of the OLS of y0 on y1 and a constant."""
+    y0 = np.asarray(y0, dtype=float)
+    y1 = np.asarray(y1, dtype=float)
+    c0, c1 = y0 - y0.mean(), y1 - y1.mean()
+    sxx, sxy, syy = c1 @ c1, c1 @ c0, c0 @ c0
+    beta = sxy / sxx
+    return beta, y0.mean() - beta * y1.mean(), sxy * sxy / (sxx * syy)
+
+
+def engle_granger_batch(Y0, Y1, beta, alpha, r_squared, maxlag=None, autolag='aic'):
+    """
+    (statistics, p-values) like coint(y0, y1, maxlag=maxlag, autolag=autolag)[:2] for every row of Y0 and Y1,
+    given the OLS of each y0 on its y1 and a constant (beta, alpha, r_squared arrays).
+    """
+    Y0 = np.atleast_2d(np.asarray(Y0, dtype=float))
+    Y1 = np.atleast_2d(np.asarray(Y1, dtype=float))
+    beta, alpha, r_squared = (np.atleast_1d(np.asarray(a, dtype=float)) for a in (beta, alpha, r_squared))
+    statistics = np.full(len(Y0), -np.inf)
+    # (almost) perfectly colinear pairs keep -inf, like coint
+    tested = np.flatnonzero(r_squared < 1 - 100 * _SQRTEPS)
+    if len(tested):
+        residuals = Y0[tested] - beta[tested, None] * Y1[tested] - alpha[tested, None]
+        statistics[tested] = adf_batch(residuals, maxlag, 'n', autolag)[0]
+    return statistics, mackinnon_p_values(statistics, 'c', N=2)
+
+
+def _trend_residuals(y0, y1, trend):
+    """Residuals and R-squared of the OLS of y0 on y1 and the trend terms of `trend` (uncentered R-squared for 'n')."""
+    design = np.column_stack((y1, _trend_basis(len(y0), trend)))
+    residuals = y0 - design @ np.linalg.lstsq(design, y0, rcond=None)[0]
+    total = y0 - y0.mean() if trend != 'n' else y0
+    return residuals, 1 - (residuals @ residuals) / (total @ total)
+
+
+def engle_granger(y0, y1, maxlag=None, autolag='aic', beta=None, alpha=None, r_squared=None, trend='c'):
+    """
+    (statistic, p-value) like coint(y0, y1, trend, maxlag=maxlag, autolag=autolag)[:2]; with trend='c' the OLS can be
+    passed in when known.
+    """
+    if trend == 'c':
+        if beta is None:
+            beta, alpha, r_squared = hedge_ratio(y0, y1)
+        statistics, p_values = engle_granger_batch(y0, y1, beta, alpha, r_squared, maxlag, autolag)
+        return float(statistics[0]), float(p_values[0])
+
+    residuals, r_squared = _trend_residuals(np.asarray(y0, dtype=float), np.asarray(y1, dtype=float), trend)
+    statistic = adf_batch(residuals[None, :], maxlag, 'n', autolag)[0][0] if r_squared < 1 - 100 * _SQRTEPS else -np.inf
+    return float(statistic), float(mackinnon_p_values(statistic, trend, N=2))
@@ -0,0 +1,84 @@
+"""
+Walk-forward optimization of the pair trading strategies.
+
+The history is cut into train/test folds (rolling by default, anchored at the first bar if asked). On every fold the
+whole parameter grid is backtested on the train slice, the `top` best combinations are kept and backtested again on
+the test slice that follows it, so every test metric is out of sample.
+
+The spread and its rolling z-scores (or the basket ranking) are computed once on the whole history and published with
+the rest of the data to the worker processes through run_sweep's memory-mapped frame. A fold only slices them: an
+indicator at bar i only depends on the bars up to i, so the slice is the indicator of the fold, already warmed up by
+the bars before it. The folds run concurrently, one task per fold.
+"""
+
+from functools import partial
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.backtest import parameter_grid
+from mt5_algo_hub.search import METRICS, rank
+from mt5_algo_hub.strategies import evaluate_grid, grid_features
+from mt5_algo_hub.sweep import run_sweep
+
+
+def walk_forward_folds(n_bars, train, test, step=None, anchored=False):
+    """[(train_start, test_start, test_stop)] bar bounds of every complete fold, moving forward by `step` (test) bars."""
+    step = step or test
+    folds = []
+    split = train
+    while split + test <= n_bars:
+        folds.append((0 if anchored else split - train, split, split + test))
+        split += step
+    return folds
+
+
+def _metrics_table(params, columns, metrics, prefix=''):
+    final_return, win_rate, return_per_trade, nb_trades = metrics
+    table = pd.DataFrame(dict(zip(columns, params)))
+    table[prefix + 'Final Return'] = final_return
+    table[prefix + 'Nb Trades'] = nb_trades
+    table[prefix + 'Win Rate'] = win_rate
+    table[prefix + 'Win per Trade'] = return_per_trade
+    return table
+
+
+def _run_fold(features, task, strategy, space, fixed, sort_by, min_trades, top):
+    fold, (train_start, test_start, test_stop) = task
+    columns = list(space)
+    grid = parameter_grid(*space.values())
+    train = _metrics_table(grid, columns, evaluate_grid(features, strategy, grid, slice(train_start, test_start), fixed))
+    winners = rank(train, sort_by, min_trades).head(top).drop(columns='_eligible')
+
+    params = [winners[column].to_numpy() for column in columns]
+    test = _metrics_table(params, columns, evaluate_grid(features, strategy, params, slice(test_start, test_stop), fixed))
+    table = winners.rename(columns={metric: 'Train ' + metric for metric in METRICS}).reset_index(drop=True)
+    table[METRICS] = test[METRICS]
+    table.insert(0, 'Rank', np.arange(1, len(table) + 1))
+    table.insert(0, 'Test End', features.index[test_stop - 1])
+    table.insert(0, 'Test Start', features.index[test_start])
+    table.insert(0, 'Train Start', features.index[train_start])
+    table.insert(0, 'Fold', fold)
+    return table
+
+
+def walk_forward(strategy, data, space, train, test, step=None, anchored=False, fixed=None, sort_by='Final Return', min_trades=10, top=10, workers=None):
+    """
+    Walk-forward optimization of `strategy` ('zscore', 'dual_zscore' or 'triangular') over the grid `space`
+    ({column: values}, in the order of the strategy's parameters, as for adaptive_search).
+    train/test/step are numbers of bars, min_trades applies to the train slices.
+    Returns one row per fold and winner: its parameters, its train metrics ('Train ...') and its test metrics.
+    """
+    folds = walk_forward_folds(len(data), train, test, step, anchored)
+    if not folds:
+        raise ValueError(f"[ERROR] {len(data)} bars are not enough for a {train} bars train and {test} bars test fold")
+    features = grid_features(strategy, data, space, fixed)
+    evaluate = partial(_run_fold, strategy=strategy, space=space, fixed=fixed, sort_by=sort_by, min_trades=min_trades, top=top)
+    tables = run_sweep(evaluate, features, list(enumerate(folds, 1)), workers, desc="Walk-forward")
+    return pd.concat(tables, ignore_index=True)
+
+
+def out_of_sample(results, rank=1):
+    """The rank-th winner of every fold with its train and test metrics, and the compounded test return (%) of the folds."""
+    winners = results[results['Rank'] == rank].reset_index(drop=True)
+    compounded = (np.prod(1 + winners['Final Return'] / 100) - 1) * 100
+    return winners, compounded
@@ -0,0 +1,319 @@
+"""
+Sweeps split into work units and run by workers on several hosts.
+
+The queue lives in the ResultStore's SQLite database, next to the results:
+- the coordinator (submit) registers a job: the dataset, the strategy and the grid. It cuts the combinations that are
+  not stored yet into units (see sweep_units) and queues them,
+- a worker (work) leases a unit for `lease` seconds, backtests its combinations and saves their results in the store.
+  Results are keyed by the combination (see results.py), so saving a unit twice only rewrites the same rows.
+  The worker then marks the unit done,
+- a unit whose lease expired (the worker died or hung) can be leased by any worker again. A unit is tried
+  `max_attempts` times at most: a unit that keeps failing (or keeps killing its worker) is marked 'failed' with its
+  last error, and the job finishes without it. collect() then reports the failed units instead of a table, until
+  retry() (or submitting the same sweep again) puts them back in the queue with fresh attempts,
+- a worker only finishes (done, failed or back to pending) the lease it holds: once its lease expired and another
+  worker leased the unit, its late update changes nothing and the unit is the other worker's,
+- once every unit is done, collect() reads the job's table back from the store, in grid order, like the *_sweep
+  functions.
+The job is keyed by a hash of its dataset, strategy and grid: submitting the same sweep again joins the running job
+(and retries its failed units).
+The dataset is stored as plain arrays (values, index, column names in an .npz, see _encode_frame) and loaded back
+with allow_pickle=False, so writing to the database does not let anyone run code on the workers.
+
+SQLite is the local stand-in for a queue service: every worker process opens the same database file, the leases are
+taken in BEGIN IMMEDIATE transactions. It is safe for any number of workers on one host. Across hosts the file must
+sit on a shared file system whose locks SQLite supports, and the store's WAL journal needs all its processes on one
+host, so a cluster should run the same protocol (submit / lease / save / done) on a server database.
+
+    python -m mt5_algo_hub.workqueue work --db results.sqlite --wait     # one per core
+    python -m mt5_algo_hub.workqueue status --db results.sqlite
+    python -m mt5_algo_hub.workqueue retry --db results.sqlite --job <job>
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import socket
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+
+from mt5_algo_hub.results import ResultStore, _canonical, sweep_table, sweep_units
+from mt5_algo_hub.strategies import evaluate_grid, grid_features
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job TEXT PRIMARY KEY,
+    strategy TEXT NOT NULL,
+    space TEXT NOT NULL,
+    fixed TEXT NOT NULL,
+    data BLOB NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    job TEXT NOT NULL,
+    unit INTEGER NOT NULL,
+    rows TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    PRIMARY KEY (job, unit)
+);
+CREATE INDEX IF NOT EXISTS units_state ON units (state, lease_expires);
+"""
+
+
+def _json_space(space):
+    # Exact values (JSON keeps every float digit), the grid rebuilt by the workers is the coordinator's
+    return {column: np.asarray(values).tolist() for column, values in space.items()}
+
+
+def _encode_frame(data):
+    """The values, index and column names of a returns DataFrame as .npz bytes, read back by _decode_frame without pickle."""
+    index, tz = data.index, ''
+    if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+        index, tz = index.tz_convert('UTC').tz_localize(None), str(index.tz)
+    index = index.to_numpy()
+    if index.dtype == object:
+        raise ValueError("[ERROR] The work queue only ships DataFrames with a datetime or numeric index")
+    buffer = io.BytesIO()
+    np.savez(buffer, values=data.to_numpy(dtype=float), index=index, columns=np.array([str(column) for column in data.columns]), tz=np.array(tz))
+    return buffer.getvalue()
+
+
+def _decode_frame(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as frame:
+        index, tz = pd.Index(frame['index']), str(frame['tz'])
+        if tz:
+            index = index.tz_localize('UTC').tz_convert(tz)
+        return pd.DataFrame(frame['values'], index=index, columns=frame['columns'].tolist())
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    def __init__(self, store=None, lease=600.0, max_attempts=3):
+        self.store = store if store is not None else ResultStore()
+        self.lease = lease
+        self.max_attempts = max_attempts
+        # Autocommit: every transaction below is opened explicitly, leases with BEGIN IMMEDIATE
+        self.connection = sqlite3.connect(self.store.path, timeout=60, isolation_level=None)
+        self.connection.executescript(_SCHEMA)
+        self._jobs = {}
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- Coordinator -----
+    def submit(self, strategy, data, space, fixed=None, unit_size=None):
+        """Queue the combinations of the grid that are not stored yet, return the job key."""
+        space, fixed = _json_space(space), {name: _canonical(value) for name, value in (fixed or {}).items()}
+        plan = self.store.plan(strategy, data, space, fixed)
+        job = hashlib.sha1(json.dumps([plan.dataset, strategy, space, fixed], sort_keys=True).encode()).hexdigest()
+        _, missing = self.store.stored_metrics(plan)
+        units = sweep_units(plan, missing, unit_size)
+
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            known = self.connection.execute('SELECT 1 FROM jobs WHERE job = ?', (job,)).fetchone()
+            if known is None:
+                self.connection.execute('INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?)', (
+                    job, strategy, json.dumps(space), json.dumps(fixed), _encode_frame(data), time.time()))
+                self.connection.executemany('INSERT INTO units (job, unit, rows) VALUES (?, ?, ?)', [
+                    (job, i, json.dumps(rows.tolist())) for i, rows in enumerate(units)])
+            else:
+                self._retry(job)
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return job
+
+    def _retry(self, job):
+        return self.connection.execute(
+            "UPDATE units SET state = 'pending', worker = NULL, lease_expires = NULL, attempts = 0, error = NULL "
+            "WHERE job = ? AND state = 'failed'", (job,)).rowcount
+
+    def retry(self, job):
+        """Put the failed units of a job back in the queue with max_attempts fresh attempts, return their number."""
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            n_units = self._retry(job)
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return n_units
+
+    def status(self, job=None):
+        """{state: number of units} of a job, or of every job."""
+        where, values = ('WHERE job = ?', (job,)) if job is not None else ('', ())
+        rows = self.connection.execute(f'SELECT state, COUNT(*) FROM units {where} GROUP BY state', values)
+        return dict(rows.fetchall())
+
+    def done(self, job):
+        return set(self.status(job)) <= {'done'}
+
+    def finished(self, job=None):
+        """No unit of the job (or of any job) is pending or leased any more: every unit is done or failed."""
+        return set(self.status(job)) <= {'done', 'failed'}
+
+    def failures(self, job):
+        """[(unit, attempts, last error)] of the job's failed units."""
+        return self.connection.execute("SELECT unit, attempts, error FROM units WHERE job = ? AND state = 'failed' ORDER BY unit", (job,)).fetchall()
+
+    def collect(self, job):
+        """The results table of a finished job, in grid order."""
+        failed = self.failures(job)
+        if failed:
+            unit, attempts, error = failed[0]
+            raise ValueError(f"[ERROR] Job {job[:12]}: {len(failed)} units failed, unit {unit} after {attempts} attempts: {error}")
+        plan = self._job(job)[0]
+        metrics, missing = self.store.stored_metrics(plan)
+        if len(missing):
+            raise ValueError(f"[ERROR] Job {job[:12]} is not finished, {len(missing)} combinations are missing")
+        return sweep_table(plan, metrics)
+
+    # ----- Workers -----
+    def _job(self, job):
+        if job not in self._jobs:
+            strategy, space, fixed, data = self.connection.execute(
+                'SELECT strategy, space, fixed, data FROM jobs WHERE job = ?', (job,)).fetchone()
+            space, fixed, data = json.loads(space), json.loads(fixed) or None, _decode_frame(data)
+            plan = self.store.plan(strategy, data, space, fixed)
+            self._jobs = {job: (plan, grid_features(strategy, data, space, fixed))}
+        return self._jobs[job]
+
+    def lease_unit(self, worker, job=None):
+        """
+        (job, unit, rows, lease) leased to `worker` for self.lease seconds, a pending or expired unit, None if there is
+        none. lease, (worker, expiry), is what run_unit finishes.
+        """
+        now = time.time()
+        condition = "(state = 'pending' OR (state = 'leased' AND lease_expires < ?))"
+        values = [now]
+        if job is not None:
+            condition += ' AND job = ?'
+            values.append(job)
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            # An expired lease that used the last attempt: its worker died on it every time
+            self.connection.execute(
+                "UPDATE units SET state = 'failed', lease_expires = NULL, error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, self.max_attempts))
+            row = self.connection.execute(f'SELECT job, unit, rows FROM units WHERE {condition} ORDER BY job, unit LIMIT 1', values).fetchone()
+            lease = (worker, now + self.lease)
+            if row is not None:
+                self.connection.execute(
+                    "UPDATE units SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE job = ? AND unit = ?",
+                    (*lease, row[0], row[1]))
+            self.connection.execute('COMMIT')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        return None if row is None else (row[0], row[1], np.array(json.loads(row[2]), dtype=np.int64), lease)
+
+    def _finish(self, job, unit, lease, state, error=None):
+        # Only while `lease` still holds the unit: False once it expired and another worker leased it
+        worker, expires = lease
+        cursor = self.connection.execute(
+            "UPDATE units SET state = ?, lease_expires = NULL, error = ? "
+            "WHERE job = ? AND unit = ? AND state = 'leased' AND worker = ? AND lease_expires = ?",
+            (state, error, job, unit, worker, expires))
+        return cursor.rowcount == 1
+
+    def run_unit(self, job, unit, rows, lease):
+        """
+        Backtest a leased unit, save its results and mark it done, returns False if the lease was lost meanwhile (the
+        results are saved all the same). A failing unit goes back to the queue, or is marked 'failed' once it used its
+        max_attempts, and the error is raised.
+        """
+        try:
+            plan, features = self._job(job)
+            result = evaluate_grid(features, plan.strategy, [axis[rows] for axis in plan.grid], fixed=plan.fixed)
+            self.store.save_rows(plan, rows, result)
+        except Exception as error:
+            attempts = self.connection.execute('SELECT attempts FROM units WHERE job = ? AND unit = ?', (job, unit)).fetchone()[0]
+            self._finish(job, unit, lease, 'failed' if attempts >= self.max_attempts else 'pending', repr(error))
+            raise
+        return self._finish(job, unit, lease, 'done')
+
+    def work(self, job=None, worker=None, wait=False, poll=5.0):
+        """
+        Run units until the queue (or `job`) has none left to lease, or, with wait=True, until it is finished
+        (units leased by other workers may still expire and come back). A failing unit is reported and skipped.
+        Returns the number of units done.
+        """
+        worker = worker or default_worker_id()
+        n_units = 0
+        while True:
+            leased = self.lease_unit(worker, job)
+            if leased is None:
+                if not wait or self.finished(job):
+                    return n_units
+                time.sleep(poll)
+                continue
+            try:
+                finished = self.run_unit(*leased)
+            except Exception as error:
+                print(f"[WARNING] Unit {leased[1]} of job {leased[0][:12]} failed: {error!r}")
+                continue
+            if not finished:
+                print(f"[WARNING] Unit {leased[1]} of job {leased[0][:12]}: the lease expired, another worker has it")
+                continue
+            n_units += 1
+
+    def sweep(self, strategy, data, space, fixed=None, unit_size=None, work=True, poll=5.0):
+        """
+        Submit the grid, take part in it (work=True) and wait until every unit is done, then return its table, like
+        ResultStore.sweep but shared with the workers of other hosts.
+        """
+        job = self.submit(strategy, data, space, fixed, unit_size)
+        print(f"Job {job[:12]}: {self.status(job)}")
+        if work:
+            self.work(job, wait=True, poll=poll)
+        while not self.finished(job):
+            time.sleep(poll)
+        return self.collect(job)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Work queue of the distributed sweeps")
+    parser.add_argument('command', choices=['work', 'status', 'retry'])
+    parser.add_argument('--db', default=None, help="result store shared by the hosts (default: MT5_RESULT_STORE or ~/.mt5_algo_hub/results.sqlite)")
+    parser.add_argument('--job', default=None, help="only this job")
+    parser.add_argument('--lease', type=float, default=600.0, help="seconds before the unit of a silent worker is leased again")
+    parser.add_argument('--max-attempts', type=int, default=3, help="tries of a unit before it is marked failed")
+    parser.add_argument('--wait', action='store_true', help="keep polling for new or expired units instead of exiting when the queue is empty")
+    parser.add_argument('--poll', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'retry' and args.job is None:
+        parser.error("retry needs --job")
+
+    with ResultStore(args.db) as store, WorkQueue(store, lease=args.lease, max_attempts=args.max_attempts) as queue:
+        if args.command == 'status':
+            print(queue.status(args.job))
+        elif args.command == 'retry':
+            print(f"{queue.retry(args.job)} failed units queued again")
+        else:
+            n_units = queue.work(args.job, wait=args.wait, poll=args.poll)
+            print(f"{n_units} units done")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,113 +23,54 @@ Author: Anthony Gocmen
 """
 
 
-from itertools import count
-import MetaTrader5 as mt5
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from plotly.express.trendline_functions import rolling
-from tqdm import tqdm
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.data import fetch_rates
+from mt5_algo_hub.optimization import optimize
+from mt5_algo_hub.profiling import report
+from mt5_algo_hub.strategies import zscore_algo
+from mt5_algo_hub.sources import get_source
 
+mt5 = get_source()
 
-mt5.initialize(login=, server="", password="")
 
 def get_data(symbols, interval, n_bars=5000):
     list_data = {}
     for sym in symbols:
-        rates = mt5.copy_rates_from(sym, interval, datetime.now(), n_bars)
+        rates = fetch_rates(sym, interval, n_bars)
         df = pd.DataFrame(rates)
         df['time'] = pd.to_datetime(df['time'], unit='s')
         df.set_index('time', inplace=True)
         list_data[sym] = df['close'].pct_change().dropna()
     return pd.DataFrame(list_data)
 
-symbols = ['USTEC', 'US500']
-interval = mt5.TIMEFRAME_M15
-data = get_data(symbols=symbols, interval=interval)
-
 
 def pairs_trading_algo(df, threshold_entry, threshold_exit, stop_loss, window):
-    spread = df['USTEC'] - df['US500']
-    mean = spread.rolling(window=window).mean()
-    stdev = spread.rolling(window=window).std()
-    z_score = (spread - mean) / stdev
-
-    position = None
-    final_return = 1
-    pnl = 1
-    nb_trades = 0
-    winning_trades = 0
-
-    for i in range(window, len(z_score)):
-        current_z = z_score.iloc[i]
-        current_spread = spread.iloc[i]
-
-        if position is None:
-            if current_z > threshold_entry:
-                position = 'short'
-                nb_trades += 1
-            elif current_z < -threshold_entry:
-                position = 'long'
-                nb_trades += 1
-
-        elif position == 'long':
-            pnl *= 1 + current_spread
-            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
-                final_return *= pnl
-                if pnl - 1 > 0: winning_trades += 1
-                position = None
-                pnl = 1
-
-        elif position == 'short':
-            pnl *= 1 - current_spread
-            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
-                final_return *= pnl
-                if pnl - 1 > 0: winning_trades += 1
-                position = None
-                pnl = 1
-
-
-    win_rate = (winning_trades / nb_trades) * 100 if nb_trades > 0 else 0
-    return_per_trade = ((final_return-1) / nb_trades) * 100
-    final_return = (final_return - 1) * 100
-
-    return final_return, win_rate, return_per_trade, nb_trades
-
-
-def optimization (data):
+    return zscore_algo(df[['USTEC', 'US500']], threshold_entry, threshold_exit, stop_loss, window)
+
+
+def optimization (data, **options):
+    # options: workers, search, budget, folds, store, queue, spill, see mt5_algo_hub.optimization
     z_entry = np.arange(0.25,2,0.25)
     exit_rate = np.arange(0.001, 0.008, 0.001)
     stoploss_rate = np.arange(0.001, 0.008, 0.001)
+    space = {'Entry - z': z_entry, 'Exit Threshold': exit_rate, 'Stop Loss': stoploss_rate}
+    return optimize('zscore', data[['USTEC', 'US500']], space, fixed={'window': 50}, where=['Nb Trades > 10', 'Final Return > 0'], **options)
 
-    results = []
-
-    for z in tqdm(z_entry, desc="Optimizing"):
-        for exit in exit_rate:
-            for sl in stoploss_rate:
-                final_return, win_rate, return_per_trade, nb_trades = pairs_trading_algo(data,z, exit, sl,50)
-                results.append({
-                    'Entry - z': z,
-                    'Exit Threshold': exit,
-                    'Stop Loss': sl,
-                    'Final Return': final_return,
-                    'Nb Trades': nb_trades,
-                    'Win Rate': win_rate,
-                    'Win per Trade': return_per_trade
-                })
-    df_results = pd.DataFrame(results)
-
-    df_results = df_results[df_results['Nb Trades'] > 10]  # Require minimum trades
-    df_results = df_results[df_results['Final Return'] > 0]  # Only positive returns
-
-    df_results.sort_values(by='Final Return', ascending=False, inplace=True)
-    top_10 = df_results.head(10)
-
-    print("\nTop 10 Best Combinations:")
-    print(top_10.to_string(index=False, float_format="%.3f"))
 
+if __name__ == "__main__":
+    mt5.initialize(login=, server="", password="")
 
-optimization(data)
+    symbols = ['USTEC', 'US500']
+    interval = mt5.TIMEFRAME_M15
+    data = get_data(symbols=symbols, interval=interval)
+    # Streamed sweep: the memory stays flat whatever the grid, pass store=ResultStore() to reuse past results instead
+    optimization(data)
+    # MT5_PROFILE=1 prints where the time went, MT5_PROFILE_TRACE=trace.json also writes the JSON trace
+    report()
 
 
 # Reminder: Live as if u were to die tomorrow. Learn as if u were to live forever!
@@ -15,17 +15,18 @@ Author: Anthony Gocmen
 """
 
 
-import time
-from itertools import count
-import MetaTrader5 as mt5
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from plotly.express.trendline_functions import rolling
-from tqdm import tqdm
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.data import fetch_rates
+from mt5_algo_hub.optimization import optimize
+from mt5_algo_hub.profiling import report
+from mt5_algo_hub.strategies import dual_zscore_algo
+from mt5_algo_hub.sources import get_source
 
-if not mt5.initialize(login=, server="", password=""):
-    raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+mt5 = get_source()
 
 
 def get_data(symbols, interval, n_bars=5000):
@@ -33,7 +34,7 @@ def get_data(symbols, interval, n_bars=5000):
     for sym in symbols:
         if not mt5.symbol_select(sym, True):
             raise ValueError(f'[Error] - Selection of the Ticker {sym} - {mt5.last_error()}')
-        rates = mt5.copy_rates_from(sym, interval, datetime.now(), n_bars)
+        rates = fetch_rates(sym, interval, n_bars)
         if rates is None or len(rates) == 0:
             raise ValueError(f'[Error] - Get data from {sym}')
         df = pd.DataFrame(rates)
@@ -43,107 +44,38 @@ def get_data(symbols, interval, n_bars=5000):
 
     return pd.DataFrame(list_data)
 
-symbols = ['US30', 'US500']
-interval = mt5.TIMEFRAME_M15
-data = get_data(symbols=symbols, interval=interval, n_bars=5000)
 
+def pairs_trading_algo(df, z_entry_near, z_entry_far, threshold_exit, stop_loss, window_near, window_far, stats=None):
+    return dual_zscore_algo(df[['US30', 'US500']], z_entry_near, z_entry_far, threshold_exit, stop_loss, window_near, window_far, stats)
 
-def pairs_trading_algo(df, z_entry_near, z_entry_far, threshold_exit, stop_loss, window_near, window_far):
-    spread = df['US30'] - df['US500']
-    mean_near = spread.rolling(window=window_near).mean()
-    stdev_near = spread.rolling(window=window_near).std()
-    mean_far = spread.rolling(window=window_far).mean()
-    stdev_far = spread.rolling(window=window_far).std()
-    z_score_near = (spread - mean_near) / stdev_near
-    z_score_far = (spread - mean_far) / stdev_far
 
-    position = None
-    final_return = 1
-    pnl = 1
-    nb_trades = 0
-    winning_trades = 0
-
-    for i in range(window_far, len(z_score_far)):
-        current_z_near = z_score_near.iloc[i]
-        current_z_far = z_score_far.iloc[i]
-        current_spread = spread.iloc[i]
-
-        if position is None:
-            if current_z_near > z_entry_near and current_z_far > z_entry_far:
-                position = 'short'
-                nb_trades += 1
-            elif current_z_near < -z_entry_near and current_z_far < -z_entry_far:
-                position = 'long'
-                nb_trades += 1
-
-        elif position == 'long':
-            pnl *= 1 + current_spread
-            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
-                final_return *= pnl
-                if pnl - 1 > 0: winning_trades += 1
-                position = None
-                pnl = 1
-
-        elif position == 'short':
-            pnl *= 1 - current_spread
-            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
-                final_return *= pnl
-                if pnl - 1 > 0: winning_trades += 1
-                position = None
-                pnl = 1
-
-
-    win_rate = (winning_trades / nb_trades) * 100 if nb_trades > 0 else 0
-    return_per_trade = ((final_return-1) / nb_trades) * 100
-    final_return = (final_return - 1) * 100
-
-    return final_return, win_rate, return_per_trade, nb_trades
-
-
-def optimization (data):
+def optimization (data, **options):
+    # options: workers, search, budget, folds, store, queue, spill, see mt5_algo_hub.optimization
     z_entry = np.arange(0.2,1.3,0.2)
     z_entry_far = np.arange(0.2,1.3,0.2)
     exit_rate = np.arange(0.001, 0.008, 0.002)
     stoploss_rate = np.arange(0.001, 0.008, 0.002)
     short_window = range(10, 50, 5)
     large_window = range(150, 400, 50)
-
-    results = []
-    z_done = 0
-
-    for z_near in z_entry:
-        z_done += 1
-        print(f"====== Computing {z_done}/{len(z_entry)} ======")
-        time.sleep(0.2)
-        for z_far in tqdm(z_entry_far, desc="Optimizing"):
-            for exit in exit_rate:
-                for sl in stoploss_rate:
-                    for short_count in short_window:
-                        for large_count in large_window:
-                            final_return, win_rate, return_per_trade, nb_trades = pairs_trading_algo(data, z_near, z_far, exit, sl, short_count, large_count)
-                            results.append({
-                                'Entry - z Near': z_near,
-                                'Entry - z Far': z_far,
-                                'Exit Threshold': exit,
-                                'Stop Loss': sl,
-                                'Window - Near': short_count,
-                                'Window - Far': large_count,
-                                'Final Return': final_return,
-                                'Nb Trades': nb_trades,
-                                'Win Rate': win_rate,
-                                'Win per Trade': return_per_trade
-                            })
-    df_results = pd.DataFrame(results)
-
-    df_results = df_results[df_results['Nb Trades'] > 10]
-    df_results = df_results[df_results['Win per Trade'] > 0.1]
-    df_results = df_results[df_results['Final Return'] > 0]
-
-    df_results.sort_values(by='Final Return', ascending=False, inplace=True)
-    top_10 = df_results.head(10)
-
-    print("\nTop 10 Best Combinations:")
-    print(top_10.to_string(index=False, float_format="%.3f"))
-
-
-optimization(data)
+    space = {
+        'Entry - z Near': z_entry,
+        'Entry - z Far': z_entry_far,
+        'Exit Threshold': exit_rate,
+        'Stop Loss': stoploss_rate,
+        'Window - Near': short_window,
+        'Window - Far': large_window
+    }
+    return optimize('dual_zscore', data[['US30', 'US500']], space, where=['Nb Trades > 10', 'Win per Trade > 0.1', 'Final Return > 0'], **options)
+
+
+if __name__ == "__main__":
+    if not mt5.initialize(login=, server="", password=""):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+
+    symbols = ['US30', 'US500']
+    interval = mt5.TIMEFRAME_M15
+    data = get_data(symbols=symbols, interval=interval, n_bars=5000)
+    # Streamed sweep: the memory stays flat whatever the grid, pass store=ResultStore() to reuse past results instead
+    optimization(data)
+    # MT5_PROFILE=1 prints where the time went, MT5_PROFILE_TRACE=trace.json also writes the JSON trace
+    report()
@@ -0,0 +1,64 @@
+"""
+This script backtests a whole portfolio of pairs at once instead of one hard-coded pair per script.
+Every pair has its own parameters: the Baseline rules (one z-score) or, when a far window is given, the Dual Z-Score rules.
+All the pairs are advanced together bar by bar, the results of every pair are the ones its own script would give.
+The capital is split equally between the pairs.
+
+⚠️ Disclaimer:
+This project is NOT financial advice and is NOT intended for live trading. It is provided purely
+for educational and research purposes. Use it at your own risk. Always consult with a financial professional
+before making investment decisions.
+
+Author: Anthony Gocmen
+"""
+
+
+import pandas as pd
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.data import fetch_rates
+from mt5_algo_hub.portfolio import portfolio_backtest
+from mt5_algo_hub.sources import get_source
+
+mt5 = get_source()
+
+
+def get_data(symbols, interval, n_bars=5000):
+    list_data = {}
+    for sym in symbols:
+        if not mt5.symbol_select(sym, True):
+            raise ValueError(f'[Error] - Selection of the Ticker {sym} - {mt5.last_error()}')
+        rates = fetch_rates(sym, interval, n_bars)
+        if rates is None or len(rates) == 0:
+            raise ValueError(f'[Error] - Get data from {sym}')
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        df.set_index('time', inplace=True)
+        list_data[sym] = df['close'].pct_change()
+    return pd.DataFrame(list_data).dropna()
+
+
+# ------------ Parameters ------------
+# spread = first - second, 'entry_far' and 'window_far' switch a pair to the Dual Z-Score rules
+PAIRS = [
+    {'pair': ('USTEC', 'US500'), 'entry': 1.5, 'exit': 0.003, 'stop_loss': 0.005, 'window': 50},
+    {'pair': ('US30', 'US500'), 'entry': 1.0, 'exit': 0.003, 'stop_loss': 0.005, 'window': 25, 'entry_far': 0.6, 'window_far': 200},
+    {'pair': ('GER40', 'FRA40'), 'entry': 1.5, 'exit': 0.002, 'stop_loss': 0.004, 'window': 100},
+]
+interval = mt5.TIMEFRAME_M15
+count = 5000
+
+
+# ------------ Execution ------------
+if __name__ == "__main__":
+    if not mt5.initialize(login=, server="", password=""):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+
+    symbols = sorted({symbol for spec in PAIRS for symbol in spec['pair']})
+    data = get_data(symbols=symbols, interval=interval, n_bars=count)
+    mt5.shutdown()
+
+    stats, equity = portfolio_backtest(data, PAIRS)
+    print("\nPortfolio Backtest:")
+    print(stats.to_string(index=False, float_format="%.3f"))
@@ -0,0 +1,55 @@
+"""
+This script backtests the Baseline / Dual Z-Score pair strategy on ticks instead of M15 closes.
+The signals are the usual z-scores of the spread on bars built from the ticks, but every trade is filled on the
+tick after its signal at the real bid/ask of both legs, and its exit threshold and stop loss are checked on every tick.
+The spread paid on the fills is reported per trade. The ticks are streamed one day at a time, so months of history fit in memory.
+
+⚠️ Disclaimer:
+This project is NOT financial advice and is NOT intended for live trading. It is provided purely
+for educational and research purposes. Use it at your own risk. Always consult with a financial professional
+before making investment decisions.
+
+Author: Anthony Gocmen
+"""
+
+
+from datetime import datetime, timedelta, timezone
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.profiling import report
+from mt5_algo_hub.sources import get_source
+from mt5_algo_hub.ticks import tick_backtest
+
+mt5 = get_source()
+
+
+# ------------ Parameters ------------
+symbols = ['USTEC', 'US500']                # spread = first - second
+z_entries = [1.5]                           # [z] for the Baseline, [z near, z far] for the Dual Z-Score
+windows = [50]                              # [window] or [window near, window far], in bars of `interval`
+threshold_exit = 0.003
+stop_loss = 0.005
+interval = mt5.TIMEFRAME_M15
+date_to = datetime.now(timezone.utc)
+date_from = date_to - timedelta(days=90)
+chunk = timedelta(days=1)                   # ticks requested at once
+
+
+# ------------ Execution ------------
+if __name__ == "__main__":
+    if not mt5.initialize(login=, server="", password=""):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+    for sym in symbols:
+        if not mt5.symbol_select(sym, True):
+            raise ValueError(f'[Error] - Selection of the Ticker {sym} - {mt5.last_error()}')
+
+    (final_return, win_rate, return_per_trade, nb_trades), trades = tick_backtest(
+        symbols, date_from, date_to, z_entries, threshold_exit, stop_loss, windows, interval, chunk, terminal=mt5)
+    mt5.shutdown()
+
+    print("\nTick Backtest:")
+    print(f"Final Return: {final_return:.3f}% - Nb Trades: {nb_trades} - Win Rate: {win_rate:.3f}% - Win per Trade: {return_per_trade:.3f}%")
+    print(f"Spread paid: {trades['Spread Cost'].sum():.3f}% over {len(trades)} closed trades")
+    print(trades.tail(10).to_string(index=False, float_format="%.4f"))
+    report()
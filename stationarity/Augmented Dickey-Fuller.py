@@ -13,34 +13,27 @@ before making investment decisions.
 Author: Anthony Gocmen
 """
 
-import MetaTrader5 as mt5
-import pandas as pd
-from statsmodels.tsa.stattools import adfuller
-from datetime import datetime
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.loader import load_bars
+from mt5_algo_hub.unitroot import adf_batch
+from mt5_algo_hub.sources import get_source
 
-
-if not mt5.initialize(login=, server="", password=""):
-    raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+mt5 = get_source()
 
 
 def get_data(tickers, timeframe, nb_bars):
-    list_data = {}
-    for ticker in tickers:
-        if not mt5.symbol_select(ticker,True):
-            raise ValueError(f"[ERROR] Cannot select {ticker} in MT5 - {mt5.last_error()}")
-        raw = mt5.copy_rates_from(ticker, timeframe, datetime.now(), nb_bars)
-        if raw is None or len(raw) == 0:
-            raise ValueError(f"[ERROR] No data returned for {ticker}")
-        raw = pd.DataFrame(raw)
-        raw['time'] = pd.to_datetime(raw['time'],unit='s')
-        raw.set_index('time', inplace=True)
-        list_data[ticker] = raw['close']
-    return pd.DataFrame(list_data)
+    return load_bars(tickers, timeframe, nb_bars, join='outer', terminal=mt5)
 
 def find_adf(data):
-    adf = adfuller(data)
-    print(f"[ADF] Statistic: {adf[0]:.3f}")
-    print(f"[ADF] p-value: {adf[1]:.3f}")
+    # One test per ticker, all the series are tested together
+    statistics, p_values, _, _ = adf_batch(data.dropna())
+    for ticker, statistic, p_value in zip(data.columns, statistics, p_values):
+        if len(data.columns) > 1:
+            print(f"--------- {ticker} ---------")
+        print(f"[ADF] Statistic: {statistic:.3f}")
+        print(f"[ADF] p-value: {p_value:.3f}")
 
 
 # ------------ Parameters ------------
@@ -49,5 +42,9 @@ timeframe = mt5.TIMEFRAME_H1
 count = 1000
 
 # ------------ Execution ------------
-data = get_data(tickers=tickers, timeframe=timeframe, nb_bars=count)
-find_adf(data)
+if __name__ == "__main__":
+    if not mt5.initialize(login=, server="", password=""):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+
+    data = get_data(tickers=tickers, timeframe=timeframe, nb_bars=count)
+    find_adf(data)
@@ -0,0 +1,57 @@
+"""
+This script screens a whole universe of symbols for pairs trading candidates, instead of testing the pairs one by one
+with the "Statistical Cointegration Tests" script of the same directory.
+
+This code:
+1. Downloads the closes of every symbol and aligns them on common timestamps
+2. Computes the correlation matrix of the universe and keeps only the pairs above MIN_CORRELATION
+3. Runs, in parallel on the surviving pairs, the same tests as the single pair script:
+  * Engle-Granger cointegration test (hedge ratio estimated by OLS)
+  * ADF tests on the simple price difference and on the price ratio
+4. Prints the pairs ranked from the most to the least cointegrated
+
+⚠️ Disclaimer:
+This project is NOT financial advice and is NOT intended for live trading. It is provided purely
+for educational and research purposes. Use it at your own risk. Always consult with a financial professional
+before making investment decisions.
+
+Author: Anthony Gocmen
+"""
+
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.loader import load_bars
+from mt5_algo_hub.screener import screen_pairs
+from mt5_algo_hub.sources import get_source
+
+mt5 = get_source()
+
+
+def get_data(tickers, timeframe, nb_bars):
+    # Symbols that cannot be loaded are skipped, the bars all the others have are kept
+    return load_bars(tickers, timeframe, nb_bars, on_error='skip', terminal=mt5)
+
+
+# ------------ Parameters ------------
+tickers = ['US30', 'US500', 'USTEC', 'GER40', 'UK100', 'FRA40', 'JP225', 'AUS200']
+timeframe = mt5.TIMEFRAME_M15
+count = 20000
+MIN_CORRELATION = 0.8       # pairs less correlated than this (in absolute value) are not tested
+MAX_P_VALUE = 0.05          # Engle-Granger p-value of the pairs printed
+workers = None              # processes testing the pairs, None for one per CPU
+
+
+# ------------ Execution ------------
+if __name__ == "__main__":
+    if not mt5.initialize(login=, server="", password=""):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+
+    data = get_data(tickers=tickers, timeframe=timeframe, nb_bars=count)
+    mt5.shutdown()
+    print(f"{len(data.columns)} symbols, {len(data)} common bars")
+
+    results = screen_pairs(data, min_correlation=MIN_CORRELATION, workers=workers)
+    print(f"\n{len(results)} pairs tested, {(results['EG p-value'] < MAX_P_VALUE).sum()} cointegrated at {MAX_P_VALUE:.0%}:")
+    print(results[results['EG p-value'] < MAX_P_VALUE].to_string(index=False, float_format="%.4f"))
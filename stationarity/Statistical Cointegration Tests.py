@@ -7,6 +7,7 @@ This code:
   * Simple price difference (Asset1 - Asset2)           => NAIVE, assumes the assets are perfectly 1:1 related
   * Price ratio (Asset1 / Asset2)                       => NAIVE, also assumes a fixed relationship, but multiplicative
 2. Conducts formal cointegration test (Engle-Granger)   => ROBUST, testing whether the residuals ε are stationary
+3. Tracks the Engle-Granger test over a rolling window   => shows when the relationship holds and when it breaks down
 
 ⚠️ Disclaimer:
 This project is NOT financial advice and is NOT intended for live trading. It is provided purely
@@ -17,30 +18,21 @@ Author: Anthony Gocmen
 """
 
 
-import MetaTrader5 as mt5
-import pandas as pd
-import statsmodels.api as sm
-from datetime import datetime
-from statsmodels.tsa.stattools import adfuller, coint
+import numpy as np
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mt5_algo_hub.cointegration import rolling_cointegration
+from mt5_algo_hub.loader import load_bars
+from mt5_algo_hub.sources import get_source
+from mt5_algo_hub.unitroot import adf_batch, engle_granger
 
-
-if not mt5.initialize(login=, server="", password=""):
-    raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+mt5 = get_source()
 
 
 def get_data(tickers, timeframe, nb_bars):
-    list_data = {}
-    for ticker in tickers:
-        if not mt5.symbol_select(ticker,True):
-            raise ValueError(f"[ERROR] Cannot select {ticker} in MT5 - {mt5.last_error()}")
-        raw = mt5.copy_rates_from(ticker, timeframe, datetime.now(), nb_bars)
-        if raw is None or len(raw) == 0:
-            raise ValueError(f"[ERROR] No data returned for {ticker}")
-        raw = pd.DataFrame(raw)
-        raw['time'] = pd.to_datetime(raw['time'],unit='s')
-        raw.set_index('time', inplace=True)
-        list_data[ticker] = raw['close']
-    return pd.DataFrame(list_data).dropna()
+    # Bars both tickers have
+    return load_bars(tickers, timeframe, nb_bars, terminal=mt5)
 
 
 def find_adf(data):
@@ -49,28 +41,51 @@ def find_adf(data):
 
     print("Testing Cointegration according to:")
 
-    print("--------- Spread Difference ---------")
+    # Both spreads are tested in one batch
     spread_diff = asset1 - asset2
-    adf_spread_diff = adfuller(spread_diff)
-    print(f"ADF p-value: {adf_spread_diff[1]:.4f} \n")
+    spread_ratio = asset1 / asset2
+    adf_p_values = adf_batch(np.vstack([spread_diff, spread_ratio]))[1]
+
+    print("--------- Spread Difference ---------")
+    print(f"ADF p-value: {adf_p_values[0]:.4f} \n")
 
     print("--------- Spread Ratio ---------")
-    spread_ratio = asset1 / asset2
-    adf_spread_ratio = adfuller(spread_ratio)
-    print(f"ADF p-value on spread: {adf_spread_ratio[1]:.4f} \n")
+    print(f"ADF p-value on spread: {adf_p_values[1]:.4f} \n")
 
     print("--------- Engle-Granger ---------")
-    coint_result = coint(asset1, asset2)
+    coint_result = engle_granger(asset1, asset2)
     print(f"Cointégration p-value : {coint_result[1]:.4f}")
 
 
+def find_rolling_coint(data, window):
+    asset1 = data.iloc[:, 0]
+    asset2 = data.iloc[:, 1]
+
+    print(f"\n--------- Rolling Engle-Granger ({window} bars) ---------")
+    rolling = rolling_cointegration(asset1, asset2, window=window).iloc[window - 1:]
+    print(f"Cointegrated on {rolling['cointegrated'].mean():.1%} of the windows")
+    print(f"Hedge ratio: min {rolling['beta'].min():.4f} / max {rolling['beta'].max():.4f} / last {rolling['beta'].iloc[-1]:.4f}")
+
+    # Start of every cointegrated / not cointegrated regime
+    changes = rolling['cointegrated'] != rolling['cointegrated'].shift()
+    regimes = rolling.loc[changes, ['cointegrated', 'beta', 'p_value']]
+    print(f"Regime changes: {len(regimes) - 1}, last ones:")
+    print(regimes.tail(10).to_string(float_format="%.4f"))
+
+
 # ------------ Parameters ------------
 tickers = ['US30','US500']
 timeframe = mt5.TIMEFRAME_M15
 count = 20000
+window = 2000
 
 
 # ------------ Execution ------------
-data = get_data(tickers=tickers, timeframe=timeframe, nb_bars=count)
-find_adf(data)
+if __name__ == "__main__":
+    if not mt5.initialize(login=, server="", password=""):
+        raise ConnectionError(f"[ERROR] Cannot connect to MT5 - {mt5.last_error()}")
+
+    data = get_data(tickers=tickers, timeframe=timeframe, nb_bars=count)
+    find_adf(data)
+    find_rolling_coint(data, window)
 
@@ -0,0 +1,114 @@
+"""
+Equivalence of backtest_kernel, zscore_algo and the one-pass zscore_grid with the original pairs_trading_algo of the Baseline script.
+
+reference_algo is the original .iloc loop, only the column names are taken from the DataFrame and the division by
+nb_trades is guarded: the original raises ZeroDivisionError on a parameter set without trades, summarize returns 0.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.backtest import backtest_kernel, entry_signals
+from mt5_algo_hub.indicators import RollingStats
+from mt5_algo_hub.strategies import pair_spread, zscore_algo, zscore_grid
+
+
+def reference_algo(df, threshold_entry, threshold_exit, stop_loss, window):
+    spread = df.iloc[:, 0] - df.iloc[:, 1]
+    mean = spread.rolling(window=window).mean()
+    stdev = spread.rolling(window=window).std()
+    z_score = (spread - mean) / stdev
+
+    position = None
+    final_return = 1
+    pnl = 1
+    nb_trades = 0
+    winning_trades = 0
+
+    for i in range(window, len(z_score)):
+        current_z = z_score.iloc[i]
+        current_spread = spread.iloc[i]
+
+        if position is None:
+            if current_z > threshold_entry:
+                position = 'short'
+                nb_trades += 1
+            elif current_z < -threshold_entry:
+                position = 'long'
+                nb_trades += 1
+
+        elif position == 'long':
+            pnl *= 1 + current_spread
+            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
+                final_return *= pnl
+                if pnl - 1 > 0: winning_trades += 1
+                position = None
+                pnl = 1
+
+        elif position == 'short':
+            pnl *= 1 - current_spread
+            if pnl - 1 >= threshold_exit or pnl - 1 <= -stop_loss:
+                final_return *= pnl
+                if pnl - 1 > 0: winning_trades += 1
+                position = None
+                pnl = 1
+
+    win_rate = (winning_trades / nb_trades) * 100 if nb_trades > 0 else 0
+    return_per_trade = ((final_return - 1) / nb_trades) * 100 if nb_trades > 0 else 0
+    final_return = (final_return - 1) * 100
+
+    return final_return, win_rate, return_per_trade, nb_trades
+
+
+# (threshold_entry, threshold_exit, stop_loss, window), the last one never trades
+CASES = [
+    (0.25, 0.001, 0.001, 50),
+    (1.0, 0.003, 0.005, 50),
+    (1.75, 0.007, 0.002, 50),
+    (1.5, 0.002, 0.007, 20),
+    (0.75, 0.005, 0.003, 120),
+    (100.0, 0.003, 0.003, 50),
+]
+
+
+@pytest.fixture(scope='module')
+def returns():
+    rng = np.random.default_rng(42)
+    common = rng.normal(0, 0.001, 3000)
+    values = np.column_stack((common + rng.normal(0, 0.0004, 3000), common + rng.normal(0, 0.0004, 3000)))
+    index = pd.date_range('2024-01-01', periods=3000, freq='15min')
+    return pd.DataFrame(values, index=index, columns=['USTEC', 'US500'])
+
+
+def kernel_algo(df, threshold_entry, threshold_exit, stop_loss, window):
+    spread = df.iloc[:, 0] - df.iloc[:, 1]
+    z_score = (spread - spread.rolling(window=window).mean()) / spread.rolling(window=window).std()
+    long_entry, short_entry = entry_signals(z_score, threshold_entry)
+    return backtest_kernel(spread.to_numpy(), long_entry, short_entry, threshold_exit, stop_loss, start=window)
+
+
+@pytest.mark.parametrize('params', CASES)
+def test_kernel_matches_reference(returns, params):
+    assert kernel_algo(returns, *params) == reference_algo(returns, *params)
+
+
+def test_no_trade_case(returns):
+    # The original loop divides by nb_trades and raises here, the kernel reports zeros
+    assert kernel_algo(returns, *CASES[-1]) == (0, 0, 0, 0)
+
+
+@pytest.mark.parametrize('params', CASES)
+def test_zscore_algo_matches_reference(returns, params):
+    assert zscore_algo(returns, *params) == reference_algo(returns, *params)
+
+
+def test_zscore_grid_matches_reference(returns):
+    # Every window's combinations in one pass over the bars, each one as the original loop
+    stats = RollingStats(pair_spread(returns))
+    for window in sorted({params[3] for params in CASES}):
+        cases = [params for params in CASES if params[3] == window]
+        z, exit, sl = (np.array(axis) for axis in zip(*[params[:3] for params in cases]))
+        metrics = zscore_grid(stats.values, stats.zscore(window), window, z, exit, sl)
+        for k, params in enumerate(cases):
+            assert tuple(metric[k] for metric in metrics) == reference_algo(returns, *params)
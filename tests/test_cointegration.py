@@ -0,0 +1,59 @@
+"""
+RollingCointegration against engle_granger refitted on every window, and its regime filter on the pair strategies.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.cointegration import RollingCointegration, rolling_cointegration
+from mt5_algo_hub.sources import cointegrated_rates
+from mt5_algo_hub.strategies import dual_zscore_algo, zscore_algo
+from mt5_algo_hub.unitroot import engle_granger, hedge_ratio
+
+
+@pytest.fixture(scope='module')
+def prices():
+    rates = cointegrated_rates(['USTEC', 'US500'], 15, 1201, seed=15)
+    index = pd.to_datetime(rates['USTEC']['time'], unit='s')
+    return pd.DataFrame({symbol: np.log(bars['close']) for symbol, bars in rates.items()}, index=index)
+
+
+@pytest.mark.parametrize('lags', [0, 1, 3])
+def test_rolling_matches_refit(prices, lags):
+    window = 300
+    y0, y1 = prices['USTEC'].to_numpy(), prices['US500'].to_numpy()
+    rolling = rolling_cointegration(prices['USTEC'], prices['US500'], window=window, lags=lags, resync=250)
+    assert rolling.index.equals(prices.index)
+    assert rolling['statistic'].iloc[:window - 1].isna().all() and not rolling['cointegrated'].iloc[:window - 1].any()
+    for i in range(window - 1, len(y0), 97):
+        a, b = y0[i - window + 1:i + 1], y1[i - window + 1:i + 1]
+        beta, alpha, _ = hedge_ratio(a, b)
+        statistic, p_value = engle_granger(a, b, maxlag=lags, autolag=None)
+        row = rolling.iloc[i]
+        np.testing.assert_allclose([row['beta'], row['alpha']], [beta, alpha], rtol=1e-7)
+        np.testing.assert_allclose([row['statistic'], row['p_value']], [statistic, p_value], rtol=1e-6, atol=1e-9)
+
+
+def test_window_too_short():
+    with pytest.raises(ValueError):
+        RollingCointegration(4, lags=1)
+
+
+def test_regime_series_is_aligned_on_the_returns(prices):
+    returns = prices.diff().dropna()
+    regime = rolling_cointegration(prices['USTEC'], prices['US500'], window=300, level=0.5)['cointegrated']
+    assert len(regime) == len(returns) + 1 and regime.any() and not regime.all()
+    # The prices' regime, one bar longer, is read on the bars of the returns
+    mask = regime.iloc[1:].to_numpy()
+    assert zscore_algo(returns, 0.5, 0.003, 0.003, 50, regime=regime) == zscore_algo(returns, 0.5, 0.003, 0.003, 50, regime=mask)
+    assert (dual_zscore_algo(returns, 0.5, 0.5, 0.003, 0.003, 20, 100, regime=regime)
+            == dual_zscore_algo(returns, 0.5, 0.5, 0.003, 0.003, 20, 100, regime=mask))
+    # No entry on bars the Series does not cover
+    assert zscore_algo(returns, 0.5, 0.003, 0.003, 50, regime=regime.iloc[:0])[3] == 0
+
+
+def test_regime_array_of_another_length(prices):
+    returns = prices.diff().dropna()
+    with pytest.raises(ValueError, match='regime'):
+        zscore_algo(returns, 0.5, 0.003, 0.003, 50, regime=np.ones(len(prices), dtype=bool))
@@ -0,0 +1,65 @@
+"""
+fetch_rates through the BarStore: a fetch -> extend -> fetch cycle returns the terminal's bars, as in-memory arrays.
+"""
+
+import numpy as np
+import pytest
+
+from mt5_algo_hub.data import BarStore, fetch_rates
+from mt5_algo_hub.sources import SyntheticSource
+
+
+class GrowingTerminal(SyntheticSource):
+    """A terminal whose history ends after `available` bars, new bars arrive when it grows."""
+    cacheable = True
+
+    def __init__(self, available):
+        super().__init__(seed=3, n_bars=3000)
+        self.available = available
+        self.requests = []
+
+    def rates(self, symbol, timeframe):
+        return super().rates(symbol, timeframe)[:self.available]
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        self.requests.append(('from', count))
+        return super().copy_rates_from(symbol, timeframe, date_from, count)
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        self.requests.append(('range',))
+        return super().copy_rates_range(symbol, timeframe, date_from, date_to)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(tmp_path)
+
+
+def fetch(terminal, store, n_bars):
+    rates = fetch_rates('US500', terminal.TIMEFRAME_M15, n_bars, store=store, terminal=terminal)
+    expected = terminal.rates('US500', terminal.TIMEFRAME_M15)[-n_bars:]
+    assert not isinstance(rates, np.memmap)
+    assert np.array_equal(rates, expected)
+    return rates
+
+
+def test_fetch_extend_fetch(store):
+    terminal = GrowingTerminal(available=1000)
+    first = fetch(terminal, store, 500)
+    # Nothing new: served from the store, the terminal is only asked for the bars after the last cached one
+    terminal.requests.clear()
+    cached = fetch(terminal, store, 500)
+    assert terminal.requests == [('range',)]
+
+    # New bars: the store file is rewritten while the previous results are still held
+    terminal.available = 1010
+    fetch(terminal, store, 500)
+    assert len(store.load('US500', terminal.TIMEFRAME_M15)) == 510
+    assert np.array_equal(cached, first)
+
+    # A longer history: the older bars are requested once and stored too
+    fetch(terminal, store, 800)
+    assert len(store.load('US500', terminal.TIMEFRAME_M15)) == 800
+    terminal.requests.clear()
+    fetch(terminal, store, 800)
+    assert terminal.requests == [('range',)]
@@ -0,0 +1,61 @@
+"""
+DepthRecorder -> read_book round trip, raw and delta encoded, across chunks.
+"""
+
+import numpy as np
+import pytest
+
+from mt5_algo_hub.depth import DepthRecorder, read_book
+from mt5_algo_hub.sources import BOOK_DTYPE, BookInfo, SyntheticSource, book_from_price
+
+
+def snapshots(n=300, seed=0):
+    """Books whose prices all shift (a jump wider than the book), whose volumes change in place, and repeated books."""
+    rng = np.random.default_rng(seed)
+    price = 100.0
+    books = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            price = round(price + rng.choice([-0.1, 0.1]), 2)
+            book = book_from_price(price, i, levels=5, seed=seed)
+        elif kind == 1:
+            book = books[-1].copy()
+            level = rng.integers(len(book))
+            book['volume'][level] += 1
+            book['volume_dbl'][level] += 1
+        else:
+            book = books[-1].copy()
+        books.append(book)
+    for i, book in enumerate(books):
+        book['time_msc'] = 1_000 + i
+    return books
+
+
+def record(books, root, delta, capacity=500):
+    with DepthRecorder(['US500'], root, terminal=SyntheticSource(), capacity=capacity, delta=delta, keyframe_every=50) as recorder:
+        for book in books:
+            levels = [BookInfo(t, p, v, d) for _, t, p, v, d in book.tolist()]
+            recorder.record('US500', levels, time_msc=book['time_msc'][0])
+    return recorder
+
+
+@pytest.mark.parametrize('delta', [False, True])
+def test_round_trip(tmp_path, delta):
+    books = snapshots()
+    recorder = record(books, tmp_path, delta)
+    assert recorder.chunks['US500'] > 1
+    decoded = read_book(tmp_path / 'book' / 'US500')
+    assert decoded.dtype == BOOK_DTYPE
+    assert np.array_equal(decoded, np.concatenate(books))
+
+
+def test_delta_never_larger_than_raw(tmp_path):
+    books = snapshots()
+    raw = record(books, tmp_path / 'raw', delta=False, capacity=100_000)
+    delta = record(books, tmp_path / 'delta', delta=True, capacity=100_000)
+    # A shifted book is a keyframe (its 10 levels and the marker), not 10 new and 10 removed levels; a book with one
+    # changed volume is that level, a repeated book its UNCHANGED row
+    shifted = len(books) // 3
+    assert delta.rows_written['US500'] == shifted * 11 + (len(books) - shifted)
+    assert raw.rows_written['US500'] == len(books) * 10
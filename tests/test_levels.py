@@ -0,0 +1,54 @@
+"""
+LevelHistogram ranks like Counter.most_common on the rounded prices of its window, updated bar by bar.
+"""
+
+from collections import Counter
+import numpy as np
+import pytest
+
+from mt5_algo_hub.levels import LevelHistogram
+
+
+def random_bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.02, n))
+    high = close + np.abs(rng.normal(0, 0.02, n))
+    low = close - np.abs(rng.normal(0, 0.02, n))
+    return high, low, close
+
+
+def counter_most_common(high, low, close, n, kind, digits=2):
+    counters = {name: Counter(np.round(values, digits).tolist()) for name, values in zip(('high', 'low', 'close'), (high, low, close))}
+    counter = counters['high'] + counters['low'] + counters['close'] if kind == 'all' else counters[kind]
+    return counter.most_common(n)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_window_matches_counter(seed):
+    high, low, close = random_bars(600, seed)
+    window = 150
+    histogram = LevelHistogram(digits=2, window=window)
+    step = 1 + seed % 4
+    for start in range(0, len(close), step):
+        stop = start + step
+        histogram.add(high[start:stop], low[start:stop], close[start:stop])
+        a = max(stop - window, 0)
+        for kind in ('high', 'low', 'close', 'all'):
+            assert histogram.most_common(5, kind) == counter_most_common(high[a:stop], low[a:stop], close[a:stop], 5, kind)
+
+
+def test_pop_and_resolution():
+    high, low, close = random_bars(400, 11)
+    histogram = LevelHistogram(digits=2, window=200)
+    histogram.add(high[:300], low[:300], close[:300])
+    histogram.pop(20)
+    # The bars 100..280 of the window, as a fresh histogram sees them
+    fresh = LevelHistogram(digits=2)
+    fresh.add(high[100:280], low[100:280], close[100:280])
+    for resolution in (1, 5):
+        for kind in ('high', 'low', 'close', 'all'):
+            assert histogram.most_common(10, kind, resolution) == fresh.most_common(10, kind, resolution)
+    levels, counts, first = histogram.histogram()
+    assert np.array_equal(levels, fresh.levels) and np.array_equal(counts, fresh.counts)
+    seen = counts > 0
+    assert np.array_equal(first[seen] - 100, fresh.first[seen])
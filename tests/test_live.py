@@ -0,0 +1,66 @@
+"""
+The signal daemon on a ReplayFeed trades like zscore_algo on the same bars: its entries, and the realized pnl of its
+exits, are the backtest's.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.live import PairConfig, ReplayFeed, SignalDaemon, print_signal
+from mt5_algo_hub.sources import SyntheticSource
+from mt5_algo_hub.strategies import zscore_algo
+
+SYMBOLS = ['EURUSD', 'GBPUSD']
+TIMEFRAME = 15
+WARM_UP = 500
+Z, EXIT, SL, WINDOW = 1.0, 0.002, 0.002, 40
+
+
+@pytest.fixture(scope='module')
+def replay():
+    terminal = SyntheticSource(seed=7, n_bars=3000)
+    times = terminal.rates(SYMBOLS[0], TIMEFRAME)['time']
+    start = datetime.fromtimestamp(int(times[1000]), tz=timezone.utc)
+    feed = ReplayFeed(TIMEFRAME, start, end=datetime.fromtimestamp(int(times[-1]) + 900, tz=timezone.utc), terminal=terminal)
+    daemon = SignalDaemon([PairConfig('pair', SYMBOLS, [WINDOW], [Z], EXIT, SL)], feed, on_signal=None)
+    daemon.warm_up(WARM_UP)
+    warm_up_results = daemon.pairs[0].engine.results()
+    asyncio.run(daemon.run())
+
+    closes = pd.DataFrame({symbol: terminal.rates(symbol, TIMEFRAME)['close'][1000 - WARM_UP:] for symbol in SYMBOLS})
+    return daemon, warm_up_results, closes.pct_change().dropna()
+
+
+def test_warm_up_is_the_backtest_of_the_history(replay):
+    _, warm_up_results, returns = replay
+    assert warm_up_results == pytest.approx(zscore_algo(returns.iloc[:WARM_UP - 1], Z, EXIT, SL, WINDOW))
+
+
+def test_replay_matches_algo(replay):
+    daemon, warm_up_results, returns = replay
+    expected = zscore_algo(returns, Z, EXIT, SL, WINDOW)
+    assert daemon.pairs[0].engine.results() == pytest.approx(expected)
+
+    # The live signals are the backtest's trades after the warm-up, and the exits carry their realized pnl
+    entries = [signal for signal in daemon.signals if signal.action in ('long', 'short')]
+    exits = [signal for signal in daemon.signals if signal.action == 'exit']
+    assert len(entries) == expected[3] - warm_up_results[3] > 0
+    assert all(signal.pnl == 1 for signal in entries)
+    compounded = (1 + warm_up_results[0] / 100) * np.prod([signal.pnl for signal in exits])
+    assert (compounded - 1) * 100 == pytest.approx(expected[0])
+    assert all(signal.pnl - 1 >= EXIT or signal.pnl - 1 <= -SL for signal in exits)
+
+
+def test_positions_and_log(replay, capsys):
+    daemon, _, _ = replay
+    positions = daemon.positions()
+    engine = daemon.pairs[0].engine
+    assert positions['Open PnL'].iloc[0] == pytest.approx((engine.pnl - 1) * 100)
+    assert engine.position != 0 or engine.pnl == 1
+
+    exit = next(signal for signal in daemon.signals if signal.action == 'exit')
+    print_signal(exit)
+    assert f"trade pnl {(exit.pnl - 1) * 100:+.3f}%" in capsys.readouterr().out
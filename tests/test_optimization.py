@@ -0,0 +1,46 @@
+"""
+optimize() returns the rows of results[filters].sort_values(sort_by, kind='stable').head(k) whatever the backend.
+"""
+
+import pytest
+
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.optimization import optimize
+from mt5_algo_hub.results import ResultStore
+from mt5_algo_hub.strategies import triangular_sweep, zscore_sweep
+
+SPACE = dict(zip(['Entry - z', 'Exit Threshold', 'Stop Loss'], GRIDS['zscore']['small']))
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(1500, 2, seed=5)
+
+
+def expected(table, sort_by, k, where=None):
+    table = table[where(table)] if where is not None else table
+    return table.sort_values(sort_by, ascending=False, kind='stable').head(k).reset_index(drop=True)
+
+
+def test_sweep(pair):
+    best = optimize('zscore', pair, SPACE, fixed={'window': 30}, k=5, where=['Nb Trades > 10', 'Final Return > 0'])
+    full = zscore_sweep(pair, *SPACE.values(), window=30, workers=1)
+    assert best.equals(expected(full, 'Final Return', 5, lambda t: (t['Nb Trades'] > 10) & (t['Final Return'] > 0)))
+
+
+def test_store(pair, tmp_path):
+    with ResultStore(tmp_path / 'results.sqlite') as store:
+        stored = optimize('zscore', pair, SPACE, fixed={'window': 30}, k=5, store=store, workers=1)
+    assert stored.equals(optimize('zscore', pair, SPACE, fixed={'window': 30}, k=5, workers=1))
+
+
+def test_triangular_options():
+    basket = synthetic_returns(1500, 3, seed=5)
+    space = dict(zip(['Exit Threshold', 'Stop Loss', 'Ratio'], GRIDS['triangular']['small']))
+    best = optimize('triangular', basket, space, k=4, sort_by='Win per Trade', min_trades=0, digits=2, workers=1)
+    assert best.equals(expected(triangular_sweep(basket, *space.values(), workers=1), 'Win per Trade', 4))
+
+
+def test_walk_forward(pair):
+    winners = optimize('zscore', pair, SPACE, fixed={'window': 30}, folds=(800, 300), min_trades=0, workers=1)
+    assert list(winners['Fold']) == [1, 2]
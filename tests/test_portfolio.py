@@ -0,0 +1,79 @@
+"""
+Every pair of a portfolio backtest gets the metrics of zscore_algo / dual_zscore_algo run alone on its two columns.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.bench import synthetic_returns
+from mt5_algo_hub.portfolio import pair_table, portfolio_backtest
+from mt5_algo_hub.strategies import dual_zscore_algo, zscore_algo
+
+# In the order of the algos' (final_return, win_rate, return_per_trade, nb_trades)
+METRICS = ['Final Return', 'Win Rate', 'Win per Trade', 'Nb Trades']
+
+PAIRS = [
+    {'pair': ('A0', 'A1'), 'entry': 1.5, 'exit': 0.002, 'stop_loss': 0.003, 'window': 40},
+    {'pair': ('A2', 'A3'), 'entry': 1.0, 'exit': 0.001, 'stop_loss': 0.002, 'window': 40},
+    {'pair': ('A1', 'A3'), 'entry': 2.0, 'exit': 0.003, 'stop_loss': 0.001, 'window': 25},
+    {'pair': ('A0', 'A2'), 'entry': 1.0, 'exit': 0.002, 'stop_loss': 0.002, 'window': 25, 'entry_far': 1.5, 'window_far': 60},
+    {'pair': ('A3', 'A0'), 'entry': 1.5, 'exit': 0.001, 'stop_loss': 0.003, 'window': 40, 'entry_far': 1.0, 'window_far': 40},
+    # No z-score reaches this entry: zeros, and a flat equity curve
+    {'pair': ('A1', 'A2'), 'entry': 50.0, 'exit': 0.002, 'stop_loss': 0.002, 'window': 40, 'name': 'never'},
+]
+
+
+@pytest.fixture(scope='module')
+def returns():
+    return synthetic_returns(2000, 4, seed=3).set_axis(['A0', 'A1', 'A2', 'A3'], axis=1)
+
+
+@pytest.fixture(scope='module')
+def backtest(returns):
+    return portfolio_backtest(returns, PAIRS)
+
+
+def algo(returns, spec):
+    df = returns[list(spec['pair'])]
+    if 'window_far' in spec:
+        return dual_zscore_algo(df, spec['entry'], spec['entry_far'], spec['exit'], spec['stop_loss'], spec['window'], spec['window_far'])
+    return zscore_algo(df, spec['entry'], spec['exit'], spec['stop_loss'], spec['window'])
+
+
+def test_pairs_match_algos(returns, backtest):
+    stats, _ = backtest
+    for spec, (_, row) in zip(PAIRS, stats.iloc[:-1].iterrows()):
+        final_return, win_rate, return_per_trade, nb_trades = algo(returns, spec)
+        assert row['Nb Trades'] == nb_trades
+        assert tuple(row[METRICS[:3]]) == (final_return, win_rate, return_per_trade)
+    assert stats['Nb Trades'].iloc[:-1].gt(0).sum() == len(PAIRS) - 1
+
+
+def test_equity_and_drawdown(backtest):
+    stats, equity = backtest
+    assert list(equity.columns) == list(pair_table(PAIRS)['Pair']) + ['Portfolio']
+    pairs = equity.drop(columns='Portfolio')
+    assert np.allclose(equity['Portfolio'], pairs.mean(axis=1))
+    assert (equity['never'] == 1).all()
+    drawdown = ((1 - pairs / pairs.cummax()).max() * 100).to_numpy()
+    assert np.allclose(stats['Max Drawdown'].iloc[:-1], drawdown)
+
+def test_portfolio_row(backtest):
+    stats, _ = backtest
+    pairs, portfolio = stats.iloc[:-1], stats.iloc[-1]
+    assert portfolio['Pair'] == 'Portfolio'
+    assert portfolio['Nb Trades'] == pairs['Nb Trades'].sum()
+    assert portfolio['Final Return'] == pytest.approx(pairs['Final Return'].mean())
+
+
+def test_missing_keys():
+    with pytest.raises(ValueError, match='window'):
+        pair_table([{'pair': ('A0', 'A1'), 'entry': 1.0, 'exit': 0.002, 'stop_loss': 0.002}])
+
+
+def test_no_pairs(returns):
+    stats, equity = portfolio_backtest(returns, [])
+    assert list(stats['Pair']) == ['Portfolio']
+    assert (equity['Portfolio'] == 1).all()
+    assert isinstance(equity, pd.DataFrame)
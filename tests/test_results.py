@@ -0,0 +1,111 @@
+"""
+A sweep through the ResultStore gives the table of the *_sweep functions, and a wider grid only backtests its new points.
+"""
+
+import numpy as np
+import pytest
+
+from mt5_algo_hub import results
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.results import ResultStore, dataset_key
+from mt5_algo_hub.strategies import dual_zscore_sweep, triangular_sweep, zscore_sweep
+
+SWEEPS = {'zscore': zscore_sweep, 'dual_zscore': dual_zscore_sweep, 'triangular': triangular_sweep}
+COLUMNS = {
+    'zscore': ['Entry - z', 'Exit Threshold', 'Stop Loss'],
+    'dual_zscore': ['Entry - z Near', 'Entry - z Far', 'Exit Threshold', 'Stop Loss', 'Window - Near', 'Window - Far'],
+    'triangular': ['Exit Threshold', 'Stop Loss', 'Ratio'],
+}
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(1500, 2, seed=5)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(tmp_path / 'results.sqlite') as store:
+        yield store
+
+
+@pytest.fixture
+def backtested(monkeypatch):
+    # Number of combinations the store hands to run_sweep
+    counts = []
+
+    def counting(evaluate, features, tasks, *args, **kwargs):
+        counts.append(sum(len(task) for task in tasks))
+        return run_sweep(evaluate, features, tasks, *args, **kwargs)
+
+    run_sweep = results.run_sweep
+    monkeypatch.setattr(results, 'run_sweep', counting)
+    return counts
+
+
+@pytest.mark.parametrize('strategy, n_assets', [('zscore', 2), ('dual_zscore', 2), ('triangular', 3)])
+def test_store_sweep_matches_sweep(store, strategy, n_assets):
+    data = synthetic_returns(1500, n_assets, seed=5)
+    axes = GRIDS[strategy]['small']
+    expected = SWEEPS[strategy](data, *axes, workers=1)
+    first = store.sweep(strategy, data, dict(zip(COLUMNS[strategy], axes)), workers=1)
+    again = store.sweep(strategy, data, dict(zip(COLUMNS[strategy], axes)), workers=1)
+    assert first.equals(expected)
+    assert again.equals(expected)
+    assert SWEEPS[strategy](data, *axes, workers=1, store=store).equals(expected)
+
+
+def test_wider_grid_only_backtests_new_points(store, pair, backtested):
+    z, exit, sl = GRIDS['zscore']['small']
+    narrow = {'Entry - z': z[:2], 'Exit Threshold': exit, 'Stop Loss': sl[:2]}
+    wide = {'Entry - z': z, 'Exit Threshold': exit, 'Stop Loss': sl}
+    store.sweep('zscore', pair, narrow, fixed={'window': 30}, workers=1)
+    table = store.sweep('zscore', pair, wide, fixed={'window': 30}, workers=1)
+    store.sweep('zscore', pair, wide, fixed={'window': 30}, workers=2)
+
+    n_narrow = 2 * len(exit) * 2
+    assert backtested == [n_narrow, len(z) * len(exit) * len(sl) - n_narrow]
+    assert table.equals(zscore_sweep(pair, z, exit, sl, window=30, workers=1))
+
+
+def test_interrupted_sweep_resumes(store, pair, backtested, monkeypatch):
+    axes = GRIDS['zscore']['small']
+    space = dict(zip(COLUMNS['zscore'], axes))
+    save_rows = ResultStore.save_rows
+
+    def crash(self, *args):
+        # The first task is saved, the sweep stops on the second one
+        if len(backtested) == 1 and self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]:
+            raise KeyboardInterrupt
+        save_rows(self, *args)
+
+    monkeypatch.setattr(ResultStore, 'save_rows', crash)
+    with pytest.raises(KeyboardInterrupt):
+        store.sweep('zscore', pair, space, workers=1)
+    monkeypatch.setattr(ResultStore, 'save_rows', save_rows)
+    table = store.sweep('zscore', pair, space, workers=1)
+
+    per_task = len(axes[1]) * len(axes[2])
+    assert backtested == [len(axes[0]) * per_task, (len(axes[0]) - 1) * per_task]
+    assert table.equals(zscore_sweep(pair, *axes, workers=1))
+
+
+def test_keys_separate_datasets_and_fixed(store, pair, backtested):
+    space = dict(zip(COLUMNS['zscore'], GRIDS['zscore']['small']))
+    store.sweep('zscore', pair, space, fixed={'window': 30}, workers=1)
+    store.sweep('zscore', pair, space, fixed={'window': 40}, workers=1)
+    store.sweep('zscore', pair.iloc[1:], space, fixed={'window': 30}, workers=1)
+    assert len(set(backtested)) == 1 and len(backtested) == 3
+
+
+def test_query(store, pair):
+    space = dict(zip(COLUMNS['zscore'], GRIDS['zscore']['small']))
+    table = store.sweep('zscore', pair, space, fixed={'window': 30}, workers=1)
+    stored = store.query('zscore', data=pair)
+    assert list(stored.columns) == COLUMNS['zscore'] + ['window'] + list(table.columns[3:])
+    assert np.allclose(stored[COLUMNS['zscore']], table[COLUMNS['zscore']])
+    assert stored[table.columns[3:]].equals(table[table.columns[3:]])
+    assert store.query('triangular', data=pair).empty
+    datasets = store.datasets()
+    assert list(datasets['dataset']) == [dataset_key(pair)]
+    assert datasets['results'].iloc[0] == len(table)
@@ -0,0 +1,54 @@
+"""
+The one-pass grid sweeps give, row for row, the parameters and metrics of the scalar algos run on every combination.
+"""
+
+import pytest
+
+from mt5_algo_hub.backtest import parameter_grid
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.strategies import (dual_zscore_algo, dual_zscore_sweep, triangular_algo, triangular_sweep, zscore_algo,
+                                     zscore_sweep)
+
+# In the order of the algos' (final_return, win_rate, return_per_trade, nb_trades)
+METRICS = ['Final Return', 'Win Rate', 'Win per Trade', 'Nb Trades']
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(1500, 2, seed=1)
+
+
+def assert_matches_algo(table, columns, axes, algo):
+    params = list(zip(*parameter_grid(*axes)))
+    assert list(table[columns].itertuples(index=False, name=None)) == params
+    for combination, metrics in zip(params, table[METRICS].itertuples(index=False, name=None)):
+        assert metrics == algo(*combination)
+
+
+def test_zscore_sweep_matches_algo(pair):
+    axes = GRIDS['zscore']['small']
+    table = zscore_sweep(pair, *axes, window=40, workers=1)
+    assert_matches_algo(table, ['Entry - z', 'Exit Threshold', 'Stop Loss'], axes,
+                        lambda z, exit, sl: zscore_algo(pair, z, exit, sl, 40))
+
+
+def test_dual_zscore_sweep_matches_algo(pair):
+    axes = GRIDS['dual_zscore']['small']
+    table = dual_zscore_sweep(pair, *axes, workers=1)
+    columns = ['Entry - z Near', 'Entry - z Far', 'Exit Threshold', 'Stop Loss', 'Window - Near', 'Window - Far']
+    assert_matches_algo(table, columns, axes, lambda *combination: dual_zscore_algo(pair, *combination))
+
+
+@pytest.mark.parametrize('n_assets', [3, 4])
+def test_triangular_sweep_matches_algo(n_assets):
+    basket = synthetic_returns(1500, n_assets, seed=1)
+    axes = GRIDS['triangular']['small']
+    table = triangular_sweep(basket, *axes, workers=1)
+    assert_matches_algo(table, ['Exit Threshold', 'Stop Loss', 'Ratio'], axes,
+                        lambda exit, sl, ratio: triangular_algo(basket, exit, sl, ratio))
+
+
+def test_zscore_sweep_without_trades(pair):
+    # Entry levels no z-score reaches: every row reports zeros instead of dividing by nb_trades
+    table = zscore_sweep(pair, [50.0, 100.0], [0.002], [0.002], window=40, workers=1)
+    assert (table[METRICS] == 0).all().all()
@@ -0,0 +1,87 @@
+"""
+RollingZScore against Series.rolling, and SignalEngine replaying a history against the backtests.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.bench import synthetic_returns
+from mt5_algo_hub.strategies import dual_zscore_algo, pair_spread, zscore_algo
+from mt5_algo_hub.streaming import RollingZScore, SignalEngine
+
+
+def rolling_zscore(values, window):
+    series = pd.Series(values)
+    return ((series - series.rolling(window).mean()) / series.rolling(window).std()).to_numpy()
+
+
+def streamed_zscore(values, window):
+    engine = RollingZScore(window)
+    return np.array([engine.update(value) for value in values])
+
+
+def series(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0, 0.001, 3000)
+    # Repeated values: rounded ticks, a constant stretch longer than the windows and a level shift
+    values[500:1000] = np.round(values[500:1000], 4)
+    values[1500:1700] = 0.0005
+    values[2000:] += 5.0
+    return values
+
+
+@pytest.mark.parametrize('window', [2, 20, 50, 120])
+def test_rolling_zscore_matches_pandas(window):
+    values = series(window)
+    expected = rolling_zscore(values, window)
+    streamed = streamed_zscore(values, window)
+    # Windows of one repeated value: 0 / 0 here, 0 or nan in pandas depending on its version, no entry either way
+    constant = pd.Series(values).rolling(window).apply(lambda x: x.min() == x.max(), raw=True).to_numpy() == 1
+    assert np.isnan(streamed[constant]).all()
+    np.testing.assert_allclose(streamed[~constant], expected[~constant], rtol=1e-6, atol=1e-6)
+
+
+def test_rolling_zscore_constant_window():
+    z = streamed_zscore([1.0, 2.0, 3.0, 3.0, 3.0, 3.0, 4.0], 3)
+    assert np.isnan(z[:2]).all() and z[2] == 1.0
+    # 3, 3, 3: 0 / 0; then 3, 3, 4: a z-score again
+    assert math.isnan(z[4]) and math.isnan(z[5]) and np.isfinite(z[6])
+
+
+def test_rolling_zscore_rejects_nan():
+    with pytest.raises(ValueError):
+        RollingZScore(3).update(math.nan)
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(3000, 2, seed=7)
+
+
+def replay(spreads, engine):
+    return [engine.update(spread) for spread in spreads]
+
+
+@pytest.mark.parametrize('params', [(1.0, 0.003, 0.005, 50), (0.5, 0.001, 0.002, 20), (1.75, 0.007, 0.001, 100)])
+def test_signal_engine_matches_zscore_algo(pair, params):
+    entry, exit, sl, window = params
+    engine = SignalEngine([window], [entry], exit, sl)
+    signals = replay(pair_spread(pair).to_numpy(), engine)
+    expected = zscore_algo(pair, *params)
+    np.testing.assert_allclose(engine.results(), expected, rtol=1e-12)
+    assert engine.results()[3] == expected[3]
+
+    # Exits carry the realized pnl of their trade, which compound into the final return
+    exits = [signal.pnl for signal in signals if signal.action == 'exit']
+    assert len(exits) in (expected[3], expected[3] - 1)
+    assert all(pnl - 1 >= exit or pnl - 1 <= -sl for pnl in exits)
+    assert math.prod(exits) == engine.final_return
+
+
+def test_signal_engine_matches_dual_zscore_algo(pair):
+    engine = SignalEngine([20, 150], [0.6, 1.0], 0.003, 0.005)
+    replay(pair_spread(pair).to_numpy(), engine)
+    np.testing.assert_allclose(engine.results(), dual_zscore_algo(pair, 0.6, 1.0, 0.003, 0.005, 20, 150), rtol=1e-12)
+
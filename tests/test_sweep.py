@@ -0,0 +1,67 @@
+"""
+A sweep on a process pool gives exactly the table of the serial sweep, the tasks' results come back in task order.
+"""
+
+import numpy as np
+import pytest
+
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.strategies import dual_zscore_sweep, triangular_sweep, zscore_sweep
+from mt5_algo_hub.sweep import SharedFrame, run_sweep, split_grid
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(1500, 2, seed=2)
+
+
+def column_sum(data, task):
+    # The workers see the shared frame, the task is a (column, scale) tuple
+    column, scale = task
+    return float(data.iloc[:, column].sum()) * scale
+
+
+def test_shared_frame_round_trip(pair):
+    with SharedFrame(pair) as shared:
+        attached = SharedFrame.attach(shared.handle)
+        assert attached.equals(pair)
+
+
+def test_split_grid_keeps_every_row():
+    grid = tuple(np.arange(10) * k for k in (1, 2, 3))
+    tasks = split_grid(grid, 4)
+    assert len(tasks) == 4
+    for column, chunks in zip(grid, zip(*tasks)):
+        assert np.array_equal(np.concatenate(chunks), column)
+
+
+def test_run_sweep_keeps_task_order(pair):
+    tasks = [(i % 2, i) for i in range(7)]
+    seen = []
+    serial = run_sweep(column_sum, pair, tasks, workers=1)
+    pooled = run_sweep(column_sum, pair, tasks, workers=2, on_result=lambda i, result: seen.append(i))
+    assert pooled == serial == [column_sum(pair, task) for task in tasks]
+    assert sorted(seen) == list(range(len(tasks)))
+
+
+def test_run_sweep_without_keep(pair):
+    results = {}
+    returned = run_sweep(column_sum, pair, [(0, 1), (1, 2)], workers=2, on_result=results.__setitem__, keep=False)
+    assert returned == [None, None]
+    assert results == {0: column_sum(pair, (0, 1)), 1: column_sum(pair, (1, 2))}
+
+
+def test_zscore_sweep_pool_matches_serial(pair):
+    axes = GRIDS['zscore']['small']
+    assert zscore_sweep(pair, *axes, window=30, workers=2).equals(zscore_sweep(pair, *axes, window=30, workers=1))
+
+
+def test_dual_zscore_sweep_pool_matches_serial(pair):
+    axes = GRIDS['dual_zscore']['small']
+    assert dual_zscore_sweep(pair, *axes, workers=2).equals(dual_zscore_sweep(pair, *axes, workers=1))
+
+
+def test_triangular_sweep_pool_matches_serial():
+    basket = synthetic_returns(1500, 3, seed=2)
+    axes = GRIDS['triangular']['small']
+    assert triangular_sweep(basket, *axes, workers=2).equals(triangular_sweep(basket, *axes, workers=1))
@@ -0,0 +1,68 @@
+"""
+Tick fills of TickBacktest: entries at the first tick of the bar after a signal (or the first tick quoting both legs),
+trade returns from the legs' fills, exits on the first tick reaching the exit threshold or the stop loss.
+"""
+
+import numpy as np
+import pytest
+
+from mt5_algo_hub.ticks import TickBacktest, TickChunk
+
+MINUTE = 60_000
+
+
+class Scripted(TickBacktest):
+    # Signals given by bar number instead of the z-scores
+    def __init__(self, sides, threshold_exit=0.01, stop_loss=0.01):
+        super().__init__([1], [1.0], threshold_exit, stop_loss, timeframe=1)
+        self.sides = sides
+        self.n_bars = 0
+
+    def _bar_signal(self, closes):
+        self.n_bars += 1
+        return self.sides.get(self.n_bars, 0)
+
+
+def chunk(*ticks):
+    # ticks: (time_msc, leg, bid, ask)
+    time_msc, leg, bid, ask = zip(*ticks)
+    return TickChunk(np.array(time_msc, dtype=np.int64), np.array(leg, dtype=np.int8), np.array(bid, dtype=float), np.array(ask, dtype=float))
+
+
+def test_long_trade_returns_from_fills():
+    engine = Scripted({1: 1})
+    engine.feed(chunk(
+        (0, 0, 1.00, 1.01), (1, 1, 2.00, 2.02),
+        (MINUTE, 0, 1.00, 1.01),                    # entry: buy leg 0 at 1.01, sell leg 1 at 2.00
+        (MINUTE + 1, 0, 1.02, 1.03),                # 1.02 / 1.01 - 1 - (2.02 / 2.00 - 1) < exit
+        (MINUTE + 2, 0, 1.04, 1.05),                # exit
+        (MINUTE + 3, 0, 1.10, 1.11),
+    ))
+    ret = (1.04 / 1.01 - 1) - (2.02 / 2.00 - 1)
+    assert engine.results() == pytest.approx((ret * 100, 100.0, ret * 100, 1))
+    trades = engine.trade_table()
+    assert list(trades['Side']) == ['long']
+    assert trades['Return'].iloc[0] == pytest.approx(ret * 100)
+    assert trades['Exit Time'].iloc[0].value == (MINUTE + 2) * 1_000_000
+
+
+def test_entry_waits_for_both_quotes():
+    # The first tick of the bar after the signal has no ask for leg 1 yet
+    engine = Scripted({1: -1}, stop_loss=0.05)
+    engine.feed(chunk((0, 0, 1.00, 1.01), (1, 1, 2.00, np.nan), (MINUTE, 0, 1.00, 1.01), (MINUTE + 5, 1, 2.00, 2.02)))
+    assert engine.nb_trades == 1
+    assert engine.deferred == 1
+    assert engine.fill[0] == MINUTE + 5
+    assert engine.position == -1
+
+
+def test_waiting_entry_across_chunks():
+    engine = Scripted({1: 1, 2: -1}, stop_loss=0.05)
+    engine.feed(chunk((0, 0, 1.00, 1.01), (1, 1, 2.00, np.nan), (MINUTE, 0, 1.00, 1.01), (2 * MINUTE, 0, 1.00, 1.01)))
+    assert engine.nb_trades == 0 and engine.pending == -1
+    # Quoted at the first tick of the next chunk: the last signal is taken there, counted once
+    engine.feed(chunk((2 * MINUTE + 5, 1, 2.00, 2.02), (2 * MINUTE + 6, 0, 1.00, 1.01)))
+    assert engine.nb_trades == 1
+    assert engine.deferred == 1
+    assert engine.fill[0] == 2 * MINUTE + 5
+    assert engine.position == -1
@@ -0,0 +1,101 @@
+"""
+TopK gives the head of the filtered, stably sorted full table whatever the batches and their order, the spill reads
+back the full table, and the sweeps streamed through a TopK give the head of their full table.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.results import ResultStore
+from mt5_algo_hub.strategies import dual_zscore_sweep, triangular_sweep, zscore_sweep
+from mt5_algo_hub.topk import TopK, filter_mask, iter_spill, parse_filter, read_spill
+
+SWEEPS = {'zscore': zscore_sweep, 'dual_zscore': dual_zscore_sweep, 'triangular': triangular_sweep}
+
+
+def expected_top(table, k, sort_by, ascending=False, where=()):
+    filters = [parse_filter(f) for f in where]
+    passed = table[filter_mask(table, filters) & table[sort_by].notna().to_numpy()]
+    return passed.sort_values(sort_by, ascending=ascending, kind='stable').head(k).reset_index(drop=True)
+
+
+def results(n_rows, seed):
+    # Few distinct scores, so many ties, and NaN scores
+    rng = np.random.default_rng(seed)
+    score = rng.integers(-5, 6, n_rows).astype(float)
+    score[rng.random(n_rows) < 0.1] = np.nan
+    return pd.DataFrame({'Entry - z': np.arange(n_rows) * 0.1, 'Final Return': score,
+                         'Nb Trades': rng.integers(0, 30, n_rows), 'Win Rate': rng.random(n_rows) * 100})
+
+
+def batches(n_rows, seed, shuffle):
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.choice(np.arange(1, n_rows), 12, replace=False))
+    parts = np.split(np.arange(n_rows), cuts)
+    if shuffle:
+        parts = [parts[i] for i in rng.permutation(len(parts))]
+    return parts
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('k', [1, 7, 50, 1000])
+@pytest.mark.parametrize('ascending', [False, True])
+def test_topk_matches_sorted_head(seed, k, ascending):
+    table = results(400, seed)
+    where = ['Nb Trades > 10', 'Win Rate >= 20']
+    top = TopK(k, 'Final Return', ascending=ascending, where=where)
+    for rows in batches(len(table), seed, shuffle=True):
+        top.add(table.iloc[rows].reset_index(drop=True), positions=rows)
+    expected = expected_top(table, k, 'Final Return', ascending, where)
+    assert top.table().equals(expected)
+    assert top.n_seen == len(table)
+    assert top.n_passed == len(expected_top(table, len(table), 'Final Return', where=where))
+
+
+def test_topk_without_positions_follows_batches():
+    table = results(300, 9)
+    top = TopK(20, 'Final Return')
+    for rows in batches(len(table), 9, shuffle=False):
+        top.add(table.iloc[rows].reset_index(drop=True))
+    assert top.table().equals(expected_top(table, 20, 'Final Return'))
+
+
+def test_empty_topk():
+    assert TopK(5).table().empty
+
+
+@pytest.mark.parametrize('spill_rows', [1, 37, 100_000])
+def test_spill_reads_back_the_full_table(tmp_path, spill_rows):
+    table = results(400, 3)
+    top = TopK(5, 'Final Return', where=['Nb Trades > 10'], spill=tmp_path, spill_rows=spill_rows)
+    for rows in batches(len(table), 3, shuffle=True):
+        top.add(table.iloc[rows].reset_index(drop=True), positions=rows)
+    top.table()
+    assert read_spill(tmp_path).equals(table)
+    assert read_spill(tmp_path, ['Final Return']).equals(table[['Final Return']])
+    assert sum(len(part) for part in iter_spill(tmp_path, ['Nb Trades'])) == len(table)
+
+
+def test_parse_filter():
+    assert parse_filter('Nb Trades >= 10') == ('Nb Trades', '>=', 10.0)
+    with pytest.raises(ValueError):
+        parse_filter('Nb Trades ~ 10')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+@pytest.mark.parametrize('strategy, n_assets', [('zscore', 2), ('dual_zscore', 2), ('triangular', 3)])
+def test_streamed_sweep_matches_full_table(tmp_path, strategy, n_assets, workers):
+    data = synthetic_returns(1500, n_assets, seed=8)
+    axes = GRIDS[strategy]['small']
+    full = SWEEPS[strategy](data, *axes, workers=1)
+    where = ['Nb Trades > 2']
+    top = TopK(15, 'Win Rate', where=where, spill=tmp_path / 'spill')
+    streamed = SWEEPS[strategy](data, *axes, workers=workers, top=top)
+    assert streamed.equals(expected_top(full, 15, 'Win Rate', where=where))
+    assert read_spill(tmp_path / 'spill').equals(full)
+
+    with ResultStore(tmp_path / 'results.sqlite') as store:
+        stored = SWEEPS[strategy](data, *axes, workers=workers, store=store, top=TopK(15, 'Win Rate', where=where))
+    assert stored.equals(streamed)
@@ -0,0 +1,66 @@
+"""
+adf_batch / engle_granger against statsmodels' adfuller / coint, and the batched MacKinnon p-values against mackinnonp.
+"""
+
+import numpy as np
+import pytest
+from statsmodels.tsa.adfvalues import mackinnonp
+from statsmodels.tsa.stattools import adfuller, coint
+
+from mt5_algo_hub.unitroot import adf, adf_batch, engle_granger, mackinnon_p_values
+
+REGRESSIONS = ['c', 'ct', 'ctt', 'n']
+# adfuller's warning about its future result object
+pytestmark = pytest.mark.filterwarnings('ignore::FutureWarning')
+
+
+@pytest.fixture(scope='module')
+def series():
+    rng = np.random.default_rng(14)
+    n = 800
+    walk = np.cumsum(rng.normal(size=n))
+    ar = np.zeros(n)
+    shocks = rng.normal(size=n)
+    for i in range(1, n):
+        ar[i] = 0.9 * ar[i - 1] + shocks[i]
+    trending = 0.05 * np.arange(n) + ar
+    return np.vstack([walk, ar, trending, 100 + walk + 0.3 * ar])
+
+
+@pytest.mark.parametrize('regression', REGRESSIONS)
+@pytest.mark.parametrize('autolag', ['aic', 'bic', None])
+def test_adf_batch_matches_adfuller(series, regression, autolag):
+    maxlag = None if autolag else 4
+    statistics, p_values, lags, nobs = adf_batch(series, maxlag, regression, autolag)
+    for k, x in enumerate(series):
+        expected = adfuller(x, maxlag=maxlag, regression=regression, autolag=autolag)
+        assert lags[k] == expected[2] and nobs[k] == expected[3]
+        np.testing.assert_allclose(statistics[k], expected[0], rtol=1e-8)
+        np.testing.assert_allclose(p_values[k], expected[1], rtol=1e-8, atol=1e-12)
+        assert adf(x, maxlag, regression, autolag)[2] == expected[2]
+
+
+@pytest.mark.parametrize('trend', REGRESSIONS)
+@pytest.mark.parametrize('autolag', ['aic', 'bic'])
+def test_engle_granger_matches_coint(series, trend, autolag):
+    y0, y1 = series[3], series[0]
+    for pair in ((y0, y1), (series[2], series[0]), (series[0], series[1])):
+        statistic, p_value = engle_granger(*pair, autolag=autolag, trend=trend)
+        expected = coint(*pair, trend=trend, autolag=autolag)
+        np.testing.assert_allclose(statistic, expected[0], rtol=1e-8)
+        np.testing.assert_allclose(p_value, expected[1], rtol=1e-8, atol=1e-12)
+
+
+@pytest.mark.parametrize('regression', REGRESSIONS)
+@pytest.mark.parametrize('N', [1, 2, 3])
+def test_mackinnon_p_values(regression, N):
+    statistics = np.linspace(-30, 5, 701)
+    expected = [mackinnonp(statistic, regression, N) for statistic in statistics]
+    np.testing.assert_allclose(mackinnon_p_values(statistics, regression, N), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_unsupported_autolag(series):
+    with pytest.raises(ValueError):
+        adf_batch(series, autolag='t-stat')
+    with pytest.raises(ValueError):
+        engle_granger(series[0], series[1], autolag='t-stat')
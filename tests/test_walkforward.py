@@ -0,0 +1,109 @@
+"""
+Every walk-forward fold scores its train and test slices like the scalar algos on the same bars, with the indicators
+of the whole history, and picks its winners by the train ranking.
+"""
+
+from itertools import product
+import numpy as np
+import pandas as pd
+import pytest
+
+from mt5_algo_hub.backtest import backtest_kernel, entry_signals
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.indicators import RollingStats
+from mt5_algo_hub.search import rank
+from mt5_algo_hub.strategies import dual_zscore_algo, pair_spread, triangular_algo, zscore_algo
+from mt5_algo_hub.walkforward import out_of_sample, walk_forward, walk_forward_folds
+
+# In the order of the algos' (final_return, win_rate, return_per_trade, nb_trades)
+METRICS = ['Final Return', 'Win Rate', 'Win per Trade', 'Nb Trades']
+TRAIN = ['Train ' + metric for metric in METRICS]
+WINDOW = 40
+ZSCORE_SPACE = dict(zip(['Entry - z', 'Exit Threshold', 'Stop Loss'], GRIDS['zscore']['small']))
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(2000, 2, seed=4)
+
+
+@pytest.fixture(scope='module')
+def zscore_folds(pair):
+    return walk_forward('zscore', pair, ZSCORE_SPACE, 800, 300, fixed={'window': WINDOW}, min_trades=2, top=3, workers=1)
+
+
+def fold_algo(df, bars, z, exit, sl, window):
+    # zscore_algo on the bars of a fold only, its z-score warmed up by the bars before it
+    stats = RollingStats(pair_spread(df))
+    start, stop, _ = bars.indices(len(df))
+    long_entry, short_entry = entry_signals(stats.zscore(window)[start:stop], z)
+    return backtest_kernel(stats.values[start:stop], long_entry, short_entry, exit, sl, start=max(window - start, 0))
+
+
+def params(row):
+    return tuple(row[column] for column in ZSCORE_SPACE)
+
+
+def test_folds_bounds():
+    assert walk_forward_folds(1000, 400, 200) == [(0, 400, 600), (200, 600, 800), (400, 800, 1000)]
+    assert walk_forward_folds(1000, 400, 200, step=300) == [(0, 400, 600), (300, 700, 900)]
+    assert walk_forward_folds(1000, 400, 200, anchored=True) == [(0, 400, 600), (0, 600, 800), (0, 800, 1000)]
+    assert walk_forward_folds(500, 400, 200) == []
+
+
+def test_too_short_history(pair):
+    with pytest.raises(ValueError):
+        walk_forward('zscore', pair.iloc[:500], ZSCORE_SPACE, 400, 200)
+
+
+def test_zscore_folds_match_algo(pair, zscore_folds):
+    folds = walk_forward_folds(len(pair), 800, 300)
+    assert sorted(set(zscore_folds['Fold'])) == list(range(1, len(folds) + 1))
+    for fold, (train_start, test_start, test_stop) in enumerate(folds, 1):
+        rows = zscore_folds[zscore_folds['Fold'] == fold]
+        assert (rows['Train Start'] == pair.index[train_start]).all()
+        assert (rows['Test Start'] == pair.index[test_start]).all()
+        assert (rows['Test End'] == pair.index[test_stop - 1]).all()
+        assert list(rows['Rank']) == [1, 2, 3]
+        for _, row in rows.iterrows():
+            train = fold_algo(pair, slice(train_start, test_start), *params(row), WINDOW)
+            test = fold_algo(pair, slice(test_start, test_stop), *params(row), WINDOW)
+            assert tuple(row[TRAIN]) == train
+            assert tuple(row[METRICS]) == test
+
+
+def test_zscore_winners_are_the_train_ranking(pair, zscore_folds):
+    # The winners of the first fold are the head of the ranked train table of the whole grid
+    train_start, test_start, _ = walk_forward_folds(len(pair), 800, 300)[0]
+    grid = pd.DataFrame(list(product(*ZSCORE_SPACE.values())), columns=list(ZSCORE_SPACE))
+    metrics = [fold_algo(pair, slice(train_start, test_start), *params(row), WINDOW) for _, row in grid.iterrows()]
+    table = pd.concat([grid, pd.DataFrame(metrics, columns=METRICS)], axis=1)
+    expected = rank(table, 'Final Return', 2).head(3)
+    winners = zscore_folds[zscore_folds['Fold'] == 1]
+    assert [params(row) for _, row in winners.iterrows()] == list(expected[list(ZSCORE_SPACE)].itertuples(index=False, name=None))
+
+
+@pytest.mark.parametrize('strategy, n_assets, columns, algo', [
+    ('dual_zscore', 2, ['Entry - z Near', 'Entry - z Far', 'Exit Threshold', 'Stop Loss', 'Window - Near', 'Window - Far'], dual_zscore_algo),
+    ('triangular', 3, ['Exit Threshold', 'Stop Loss', 'Ratio'], triangular_algo),
+])
+def test_anchored_train_matches_algo(strategy, n_assets, columns, algo):
+    # An anchored train slice starts at the first bar: it is the algo on the history up to the test slice
+    data = synthetic_returns(1500, n_assets, seed=4)
+    space = dict(zip(columns, GRIDS[strategy]['small']))
+    results = walk_forward(strategy, data, space, 600, 300, anchored=True, min_trades=0, top=2, workers=1)
+    for fold, (_, test_start, _) in enumerate(walk_forward_folds(len(data), 600, 300, anchored=True), 1):
+        for _, row in results[results['Fold'] == fold].iterrows():
+            expected = algo(data.iloc[:test_start], *(row[column] for column in columns))
+            assert tuple(row[TRAIN]) == expected
+
+
+def test_pool_matches_serial(pair, zscore_folds):
+    pooled = walk_forward('zscore', pair, ZSCORE_SPACE, 800, 300, fixed={'window': WINDOW}, min_trades=2, top=3, workers=2)
+    assert pooled.equals(zscore_folds)
+
+
+def test_out_of_sample(zscore_folds):
+    winners, compounded = out_of_sample(zscore_folds)
+    assert list(winners['Rank']) == [1] * len(winners)
+    assert compounded == pytest.approx((np.prod(1 + winners['Final Return'] / 100) - 1) * 100)
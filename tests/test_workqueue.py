@@ -0,0 +1,73 @@
+"""
+A queued sweep gives the table of zscore_sweep; a worker only finishes the lease it holds, failed units can be retried.
+"""
+
+import pytest
+
+from mt5_algo_hub import workqueue
+from mt5_algo_hub.bench import GRIDS, synthetic_returns
+from mt5_algo_hub.results import ResultStore
+from mt5_algo_hub.strategies import zscore_sweep
+from mt5_algo_hub.workqueue import WorkQueue
+
+AXES = GRIDS['zscore']['small']
+SPACE = dict(zip(['Entry - z', 'Exit Threshold', 'Stop Loss'], AXES))
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return synthetic_returns(1500, 2, seed=6)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(tmp_path / 'results.sqlite') as store:
+        yield store
+
+
+@pytest.fixture
+def broken(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('broken unit')
+
+    monkeypatch.setattr(workqueue, 'evaluate_grid', fail)
+    return monkeypatch
+
+
+def test_queue_sweep_matches_sweep(store, pair):
+    with WorkQueue(store) as queue:
+        table = queue.sweep('zscore', pair, SPACE, poll=0)
+    assert table.equals(zscore_sweep(pair, *AXES, workers=1))
+
+
+def test_expired_lease_is_not_finished(store, pair):
+    with WorkQueue(store, lease=-1.0) as queue:
+        job = queue.submit('zscore', pair, SPACE)
+        late = queue.lease_unit('late')
+        again = queue.lease_unit('again', job)
+        assert late[:2] == again[:2]
+        # The late worker saves its results but leaves the unit to the one that holds the lease
+        assert queue.run_unit(*late) is False
+        assert queue.connection.execute('SELECT state, worker FROM units WHERE job = ? AND unit = ?', late[:2]).fetchone() == ('leased', 'again')
+        assert queue.run_unit(*again) is True
+        assert queue.connection.execute('SELECT state FROM units WHERE job = ? AND unit = ?', late[:2]).fetchone() == ('done',)
+
+
+def test_failed_units_are_retried(store, pair, broken):
+    with WorkQueue(store, max_attempts=2) as queue:
+        job = queue.submit('zscore', pair, SPACE)
+        n_units = sum(queue.status(job).values())
+        assert queue.work(job) == 0
+        assert queue.status(job) == {'failed': n_units}
+        assert {attempts for _, attempts, _ in queue.failures(job)} == {2}
+        with pytest.raises(ValueError, match='broken unit'):
+            queue.collect(job)
+
+        assert queue.retry(job) == n_units
+        assert queue.status(job) == {'pending': n_units}
+        queue.work(job)
+        broken.undo()
+        # Submitting the sweep again puts its failed units back in the queue too
+        assert queue.submit('zscore', pair, SPACE) == job
+        assert queue.work(job) == n_units
+        assert queue.collect(job).equals(zscore_sweep(pair, *AXES, workers=1))